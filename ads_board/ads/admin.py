@@ -1,5 +1,67 @@
 from django.contrib import admin
-from .models import (Advert, Response)
+from django.db.models import QuerySet
 
-admin.site.register(Advert)
-admin.site.register(Response)
+from .models import (Advert, DigestSnapshot, OutgoingEmail, Response)
+from .moderation import (accept_responses, delete_adverts, delete_responses, deletion_summary,
+                         reject_responses)
+
+
+class BulkDeleteMixin:
+    """
+    Admin deleting selections with set-based statements.
+
+    ``bulk_delete`` (a moderation function) does the deletion, and the confirmation page shows
+    counts instead of every related object.
+    """
+
+    bulk_delete = None
+
+    def delete_queryset(self, request, queryset):
+        self.bulk_delete(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        if not isinstance(objs, QuerySet):
+            objs = self.model.objects.filter(pk__in=[obj.pk for obj in objs])
+        preview, model_count = deletion_summary(objs)
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return preview, model_count, perms_needed, []
+
+
+@admin.register(Advert)
+class AdvertAdmin(BulkDeleteMixin, admin.ModelAdmin):
+    list_display = ('title', 'user', 'category', 'created_at', 'response_count', 'accepted_count')
+    list_select_related = ('user',)
+    # Both filters and the ordering are served by the advert indexes
+    list_filter = ('category', 'created_at')
+    ordering = ('-created_at', '-id')
+    raw_id_fields = ('user',)
+    # Counting the whole table on every page is a full scan
+    show_full_result_count = False
+    bulk_delete = staticmethod(delete_adverts)
+
+
+@admin.register(Response)
+class ResponseAdmin(BulkDeleteMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'author', 'status', 'likes', 'dislikes', 'created_at')
+    # Response.__str__ reads the user and the advert
+    list_select_related = ('user', 'advert', 'author')
+    list_filter = ('status', 'advert__category', 'created_at')
+    ordering = ('-created_at', '-id')
+    raw_id_fields = ('author', 'advert', 'user')
+    show_full_result_count = False
+    actions = ['accept_selected', 'reject_selected']
+    bulk_delete = staticmethod(delete_responses)
+
+    @admin.action(description='Accept selected responses')
+    def accept_selected(self, request, queryset):
+        count = accept_responses(queryset)
+        self.message_user(request, f'{count} responses accepted, their authors will be notified.')
+
+    @admin.action(description='Reject selected responses')
+    def reject_selected(self, request, queryset):
+        count = reject_responses(queryset)
+        self.message_user(request, f'{count} responses rejected.')
+
+
+admin.site.register(OutgoingEmail)
+admin.site.register(DigestSnapshot)
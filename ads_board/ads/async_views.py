@@ -0,0 +1,258 @@
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.generic import View
+
+from ads_board import settings
+from ads_board.disconnect import client_disconnected
+from ads_board.instrumentation import note_cache
+from ads_board.routers import AsyncReadReplicaMixin
+from users.authz import AsyncLoginRequiredMixin, ais_author, auser
+from .cache import (
+    advert_page_cache_key,
+    advert_page_timeout,
+    afill_response_counts,
+    aget_adverts_generation,
+    cache_response_counts,
+)
+from .events import get_broker
+from .filters import AdvertFilter
+from .models import Advert, Response
+from .pagination import CursorPaginator, InvalidCursor
+from .thread import athread_page
+
+
+async def alist(queryset):
+    """
+    Fetch the rows of ``queryset`` with the async ORM.
+
+    Args:
+        queryset (QuerySet): The queryset to evaluate.
+
+    Returns:
+        list: The model instances.
+    """
+    return [obj async for obj in queryset.aiterator()]
+
+
+class AsyncAdvertListView(AsyncReadReplicaMixin, AsyncLoginRequiredMixin, View):
+    """
+    Async version of ``AdvertListView``, rendering the same cached fragment.
+    """
+    template_name = 'ads/advert_list.html'
+    paginate_by = 15
+    query_budget = 6
+    cursor_pagination = settings.ADVERT_LIST_CURSOR_PAGINATION
+    page_template_name = 'ads/advert_list_page.html'
+
+    async def get(self, request, *args, **kwargs):
+        """
+        Handle GET request, serving the advert page from the cache when possible.
+        """
+        generation = await aget_adverts_generation()
+        key = advert_page_cache_key(request.GET, variant=f'cursor={self.cursor_pagination}',
+                                    generation=generation)
+        advert_page = await cache.aget(key)
+        note_cache(advert_page is not None)
+        counts = None
+        if advert_page is None:
+            context = await self.get_page_context(request)
+            advert_page = render_to_string(self.page_template_name, context, request)
+            await cache.aset(key, advert_page, advert_page_timeout(request.GET))
+            counts = await sync_to_async(cache_response_counts)(context['advert_list'])
+
+        context = {
+            'advert_page': mark_safe(await afill_response_counts(advert_page, counts)),
+            'time_now': datetime.utcnow(),
+            'is_author': await ais_author(request),
+        }
+        return render(request, self.template_name, context)
+
+    def uses_cursor(self):
+        """
+        Whether this page is paginated with cursors, see ``AdvertListView``.
+        """
+        return (self.cursor_pagination and self.request.GET.get('sort') != 'popular'
+                and not self.request.GET.get('add_title', '').strip())
+
+    async def get_page_context(self, request):
+        """
+        Fetch one page of adverts and build the context of the page fragment.
+        """
+        filterset = AdvertFilter(request.GET, Advert.objects.order_by('-created_at'))
+        # Validating the filters and searching the index run queries
+        queryset = await sync_to_async(lambda: filterset.qs)()
+
+        paginator = None
+        if self.uses_cursor():
+            try:
+                page = await CursorPaginator(queryset, self.paginate_by).apage(request.GET.get('cursor'))
+            except InvalidCursor:
+                raise Http404('Invalid cursor.')
+            is_paginated = page.has_next() or page.has_previous()
+        else:
+            paginator = Paginator(queryset, self.paginate_by)
+            # Set the cached count so validating the page number runs no query
+            paginator.count = await queryset.acount()
+            number = request.GET.get('page') or 1
+            if number == 'last':
+                number = paginator.num_pages
+            try:
+                page = paginator.page(number)
+            except InvalidPage:
+                raise Http404('Invalid page.')
+            page.object_list = await alist(page.object_list)
+            is_paginated = page.has_other_pages()
+
+        query = request.GET.copy()
+        query.pop('cursor', None)
+        query.pop('page', None)
+        filter_query = query.urlencode()
+        query.pop('sort', None)
+        return {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': is_paginated,
+            'object_list': page.object_list,
+            'advert_list': page.object_list,
+            'cursor_pagination': self.uses_cursor(),
+            'filter_query': filter_query,
+            'sort_query': query.urlencode(),
+            'view': self,
+        }
+
+
+class AsyncAdvertDetailView(AsyncReadReplicaMixin, View):
+    """
+    Async version of ``AdvertDetailView``.
+    """
+    template_name = 'ads/advert_detail.html'
+    query_budget = 4
+
+    async def get(self, request, pk):
+        """
+        Handle GET request for the advert page.
+        """
+        # The template compares the owner with the current user
+        await auser(request)
+        # Awaited in sequence: the async ORM runs every query in the one
+        # thread-sensitive executor, so gathering them would not overlap them
+        try:
+            advert = await Advert.objects.with_owner().aget(pk=pk)
+        except Advert.DoesNotExist:
+            raise Http404('No advert found matching the query.')
+        thread = await athread_page(pk)
+        context = {'object': advert, 'advert': advert, 'thread': thread, 'view': self}
+        return render(request, self.template_name, context)
+
+
+class AsyncResponseDetailView(View):
+    """
+    Async version of ``ResponseDetailView``.
+    """
+    template_name = 'ads/response_detail.html'
+    query_budget = 3
+
+    async def get(self, request, pk):
+        """
+        Handle GET request for the response page.
+        """
+        await auser(request)
+        try:
+            response = await Response.objects.select_related('author').aget(pk=pk)
+        except Response.DoesNotExist:
+            raise Http404('No response found matching the query.')
+        return render(request, self.template_name, {'object': response, 'response': response, 'view': self})
+
+
+class AsyncPrivatePageView(AsyncLoginRequiredMixin, View):
+    """
+    Async version of ``PrivatePageView``.
+    """
+    template_name = 'ads/private_page.html'
+    paginate_by = 15
+    adverts_paginate_by = 20
+    # POST: session, user, authz, then creating the group on first use and adding the user
+    query_budget = {'GET': 5, 'POST': 6}
+
+    async def get(self, request):
+        """
+        Handle GET request for the private page.
+        """
+        user = request.user
+        try:
+            adverts = await CursorPaginator(Advert.objects.for_owner(user), self.adverts_paginate_by).apage(
+                request.GET.get('adverts_cursor')
+            )
+            responses = await CursorPaginator(Response.objects.for_owner_dashboard(user), self.paginate_by).apage(
+                request.GET.get('cursor')
+            )
+        except InvalidCursor:
+            raise Http404('Invalid cursor.')
+        is_author = await ais_author(request)
+        context = {
+            'adverts': adverts,
+            'responses': responses,
+            'is_author': is_author,
+        }
+        return render(request, self.template_name, context)
+
+    async def post(self, request):
+        """
+        Handle POST request for the private page, making the user an author
+        and redirecting to the page.
+        """
+        user = request.user
+
+        def become_author():
+            if not request.authz.is_author:
+                author_group = Group.objects.get_or_create(name='authors')[0]
+                user.groups.add(author_group)
+
+        await sync_to_async(become_author)()
+        return redirect('ads:private')
+
+
+class ResponseEventsView(AsyncLoginRequiredMixin, View):
+    """
+    Server-Sent Events stream of the live notifications of the user: new
+    responses to their adverts and acceptances of their own responses.
+
+    An idle client costs a coroutine and a small queue; the stream ends
+    as soon as ``DisconnectMiddleware`` sees the client go away, or at the
+    next keep-alive comment without it.
+    """
+    query_budget = 2
+
+    async def get(self, request):
+        """
+        Handle GET request, opening the event stream.
+        """
+        response = StreamingHttpResponse(self.stream(request.user.pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep reverse proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id):
+        broker = get_broker()
+        subscription = broker.subscribe(user_id)
+        disconnected = client_disconnected()
+        # Under ASGI every request gets its own database connections, held
+        # until the request ends; an idle stream must not keep them open
+        await sync_to_async(connections.close_all)()
+        try:
+            yield f'retry: {settings.ADS_EVENTS_RETRY}\n\n'
+            while disconnected is None or not disconnected.is_set():
+                event = await subscription.get(settings.ADS_EVENTS_HEARTBEAT, disconnected)
+                yield event or ': keep-alive\n\n'
+        finally:
+            broker.unsubscribe(subscription)
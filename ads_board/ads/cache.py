@@ -0,0 +1,160 @@
+import hashlib
+import re
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+from ads_board import settings
+from .models import Advert
+
+# Version counter of everything derived from the adverts table
+ADVERTS_GENERATION_KEY = 'ads:adverts:generation'
+
+# Cache key of the response count of one advert
+RESPONSE_COUNT_KEY = 'ads:advert-responses:{advert_id}'
+
+# Placeholder the cached list pages hold for the response count of an
+# advert; user input is escaped, so it cannot forge one
+RESPONSE_COUNT_SLOT = re.compile(r'<!--responses:(\d+)-->')
+
+
+def get_adverts_generation():
+    """
+    Return the current adverts generation.
+
+    Returns:
+        int: The generation, starting at 1.
+    """
+    generation = cache.get(ADVERTS_GENERATION_KEY)
+    if generation is None:
+        cache.add(ADVERTS_GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(ADVERTS_GENERATION_KEY, 1)
+    return generation
+
+
+async def aget_adverts_generation():
+    """
+    Async version of ``get_adverts_generation``.
+    """
+    generation = await cache.aget(ADVERTS_GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(ADVERTS_GENERATION_KEY, 1, timeout=None)
+        generation = await cache.aget(ADVERTS_GENERATION_KEY, 1)
+    return generation
+
+
+def bump_adverts_generation():
+    """
+    Invalidate every cached advert page at once by moving to a new generation.
+
+    Entries of older generations are never read again and simply expire.
+    """
+    try:
+        cache.incr(ADVERTS_GENERATION_KEY)
+    except ValueError:
+        cache.add(ADVERTS_GENERATION_KEY, 1, timeout=None)
+
+
+def advert_page_cache_key(params, variant='', generation=None):
+    """
+    Build the cache key of an advert list page.
+
+    Args:
+        params (QueryDict): The GET parameters (filters, page or cursor).
+        variant (str): Anything else the rendering depends on.
+        generation (int): The adverts generation, read from the cache if None.
+
+    Returns:
+        str: The cache key, bound to the current adverts generation.
+    """
+    # Escaped, so a value holding '&' or '=' cannot pass for other parameters
+    query = urlencode(sorted(params.lists()), doseq=True)
+    digest = hashlib.md5(f'{variant}?{query}'.encode()).hexdigest()
+    if generation is None:
+        generation = get_adverts_generation()
+    return f'ads:advert-list:{generation}:{digest}'
+
+
+def advert_page_timeout(params):
+    """
+    Return the seconds an advert list page stays cached.
+
+    Response counts change the popularity order without moving to a new
+    generation, so those pages only live for a short while.
+
+    Args:
+        params (QueryDict): The GET parameters.
+
+    Returns:
+        int: The timeout.
+    """
+    if params.get('sort') == 'popular':
+        return settings.ADVERT_POPULAR_CACHE_TIMEOUT
+    return settings.ADVERT_LIST_CACHE_TIMEOUT
+
+
+def cache_response_counts(adverts):
+    """
+    Cache the response counts of adverts just read from the database.
+
+    Args:
+        adverts (iterable[Advert]): The adverts.
+
+    Returns:
+        dict: The response count of each advert id.
+    """
+    counts = {advert.pk: advert.response_count for advert in adverts}
+    cache.set_many({RESPONSE_COUNT_KEY.format(advert_id=pk): count for pk, count in counts.items()},
+                   settings.ADVERT_COUNTERS_CACHE_TIMEOUT)
+    return counts
+
+
+def fill_response_counts(page, counts=None):
+    """
+    Put the current response counts into a cached advert list page.
+
+    The counts are read from their own cache entries, which responses
+    invalidate one advert at a time, and those missing with one query.
+
+    Args:
+        page (str): The rendered page, see ``RESPONSE_COUNT_SLOT``.
+        counts (dict): Response counts by advert id already known.
+
+    Returns:
+        str: The page with the counts.
+    """
+    counts = dict(counts or {})
+    ids = {int(pk) for pk in RESPONSE_COUNT_SLOT.findall(page)}.difference(counts)
+    if ids:
+        keys = {RESPONSE_COUNT_KEY.format(advert_id=pk): pk for pk in ids}
+        counts.update((keys[key], count) for key, count in cache.get_many(keys).items())
+        missing = ids.difference(counts)
+        if missing:
+            counts.update(cache_response_counts(Advert.objects.filter(pk__in=missing).only('response_count')))
+    return RESPONSE_COUNT_SLOT.sub(lambda match: str(counts.get(int(match[1]), 0)), page)
+
+
+async def afill_response_counts(page, counts=None):
+    """
+    Async version of ``fill_response_counts``.
+    """
+    counts = dict(counts or {})
+    ids = {int(pk) for pk in RESPONSE_COUNT_SLOT.findall(page)}.difference(counts)
+    if ids:
+        keys = {RESPONSE_COUNT_KEY.format(advert_id=pk): pk for pk in ids}
+        counts.update((keys[key], count) for key, count in (await cache.aget_many(keys)).items())
+        missing = ids.difference(counts)
+        if missing:
+            adverts = [advert async for advert in Advert.objects.filter(pk__in=missing).only('response_count')]
+            counts.update(cache_response_counts(adverts))
+    return RESPONSE_COUNT_SLOT.sub(lambda match: str(counts.get(int(match[1]), 0)), page)
+
+
+def invalidate_response_counts(advert_ids):
+    """
+    Drop the cached response counts of adverts.
+
+    Args:
+        advert_ids (iterable[int]): The adverts.
+    """
+    cache.delete_many([RESPONSE_COUNT_KEY.format(advert_id=pk) for pk in advert_ids])
@@ -0,0 +1,174 @@
+from collections import defaultdict
+
+import redis
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from ads_board import settings
+from .models import Response, ResponseVote
+from .stats import response_liked, responses_liked
+
+# Redis keys used when votes are buffered
+PENDING_KEY = 'ads:votes:pending'
+PROCESSING_KEY = 'ads:votes:processing'
+FLUSH_LOCK_KEY = 'ads:votes:flush-lock'
+VOTERS_KEY = 'ads:votes:voters:{response_id}'
+
+# Seconds a flush may hold its lock; a killed worker's batch is retried after
+FLUSH_LOCK_TIMEOUT = 60
+
+# Counter column updated for each vote value
+COUNTER_FIELDS = {
+    ResponseVote.LIKE: 'likes',
+    ResponseVote.DISLIKE: 'dislikes',
+}
+
+_redis = None
+
+
+class DuplicateVote(Exception):
+    """
+    Raised when a user votes a second time for the same response.
+    """
+
+
+def get_buffer():
+    """
+    Return the Redis client buffering votes, or None if buffering is off.
+
+    Returns:
+        redis.Redis: The client, created once per process.
+    """
+    global _redis
+    if not settings.ADS_VOTE_BUFFER_URL:
+        return None
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.ADS_VOTE_BUFFER_URL)
+    return _redis
+
+
+def cast_vote(response_id, user, value):
+    """
+    Record a like or dislike of ``user`` for a response.
+
+    Without a buffer the vote row and an ``F()`` update of the counter column
+    are written at once. With a buffer the vote is only queued in Redis and
+    applied by ``flush_votes``.
+
+    Args:
+        response_id (int): The primary key of the response.
+        user (User): The voting user.
+        value (int): ``ResponseVote.LIKE`` or ``ResponseVote.DISLIKE``.
+
+    Raises:
+        DuplicateVote: If the user has already voted for this response.
+    """
+    buffer = get_buffer()
+    if buffer is not None:
+        # SADD answers 0 when the user is already in the response's voter set
+        if not buffer.sadd(VOTERS_KEY.format(response_id=response_id), user.pk):
+            raise DuplicateVote(response_id)
+        buffer.rpush(PENDING_KEY, f'{response_id}:{user.pk}:{value}')
+        return
+
+    field = COUNTER_FIELDS[value]
+    try:
+        with transaction.atomic():
+            ResponseVote.objects.create(response_id=response_id, user=user, value=value)
+            Response.objects.filter(pk=response_id).update(**{field: F(field) + 1})
+            if value == ResponseVote.LIKE:
+                response_liked(response_id)
+    except IntegrityError:
+        raise DuplicateVote(response_id)
+
+
+def flush_votes():
+    """
+    Apply the votes queued in the Redis buffer to the database.
+
+    The pending queue is renamed to a processing queue, which is only
+    deleted once its votes are committed: a batch whose transaction failed,
+    or whose worker died, is applied again by the next flush. Flushes hold
+    a lock so only one works on the processing queue at a time.
+
+    Returns:
+        int: The number of votes applied.
+    """
+    buffer = get_buffer()
+    if buffer is None:
+        return 0
+
+    lock = buffer.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        # A batch left by a failed flush goes before the new votes
+        if not buffer.exists(PROCESSING_KEY):
+            try:
+                buffer.rename(PENDING_KEY, PROCESSING_KEY)
+            except redis.ResponseError:
+                # No pending votes
+                return 0
+        applied = apply_votes(buffer.lrange(PROCESSING_KEY, 0, -1))
+        buffer.delete(PROCESSING_KEY)
+        return applied
+    finally:
+        lock.release()
+
+
+def apply_votes(entries):
+    """
+    Store buffered votes and add them to the counters.
+
+    Vote rows are inserted in bulk and every touched response, and the like
+    total of every touched advert, gets a single ``F()`` update. Votes
+    already stored, by the unbuffered path or an earlier attempt of the
+    batch, are looked up in the same write transaction as the insert; write
+    transactions begin IMMEDIATE and never overlap, so the counters follow
+    exactly the rows inserted.
+
+    Args:
+        entries (list[bytes]): The 'response_id:user_id:value' entries.
+
+    Returns:
+        int: The number of votes inserted.
+    """
+    votes = {}
+    for entry in entries:
+        response_id, user_id, value = map(int, entry.decode().split(':'))
+        votes.setdefault((response_id, user_id), value)
+    if not votes:
+        return 0
+
+    with transaction.atomic():
+        # Votes for responses deleted in the meantime are dropped
+        live = dict(
+            Response.objects.filter(pk__in={response_id for response_id, _ in votes})
+            .values_list('pk', 'advert_id')
+        )
+        votes = {key: value for key, value in votes.items() if key[0] in live}
+
+        existing = set(
+            ResponseVote.objects.filter(
+                response_id__in={response_id for response_id, _ in votes},
+                user_id__in={user_id for _, user_id in votes},
+            ).values_list('response_id', 'user_id')
+        )
+        inserted = ResponseVote.objects.bulk_create([
+            ResponseVote(response_id=response_id, user_id=user_id, value=value)
+            for (response_id, user_id), value in votes.items()
+            if (response_id, user_id) not in existing
+        ])
+
+        deltas = defaultdict(lambda: defaultdict(int))
+        likes = defaultdict(int)
+        for vote in inserted:
+            deltas[vote.response_id][COUNTER_FIELDS[vote.value]] += 1
+            if vote.value == ResponseVote.LIKE:
+                likes[live[vote.response_id]] += 1
+        for response_id, counts in deltas.items():
+            Response.objects.filter(pk=response_id).update(
+                **{field: F(field) + count for field, count in counts.items()}
+            )
+        responses_liked(likes)
+    return len(inserted)
@@ -0,0 +1,197 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from ads_board import settings
+from .models import Advert, Category, DigestSnapshot
+
+# Layout version of the snapshot items; bump it when changing ``build_snapshot``
+DIGEST_VERSION = 2
+
+# Cache key of the snapshot of one week
+SNAPSHOT_KEY = 'ads:digest:v{version}:{week}'
+# Seconds a snapshot stays cached, a bit more than the week it is used for
+SNAPSHOT_TIMEOUT = 8 * 24 * 3600
+
+CATEGORY_LABELS = dict(Advert.CATEGORY_CHOICES)
+
+
+class DigestItem(namedtuple('DigestItem', ['id', 'title', 'category', 'url', 'categories'])):
+    """
+    One advert of a digest snapshot; ``categories`` holds the ids of the
+    Category rows it belongs to, the one of its category choice included.
+    """
+
+    __slots__ = ()
+
+    @property
+    def category_label(self):
+        return CATEGORY_LABELS.get(self.category, self.category)
+
+
+def week_of(moment=None):
+    """
+    Return the Monday of the week of ``moment``, in the local time zone.
+
+    Args:
+        moment (datetime): An aware datetime, now if None.
+
+    Returns:
+        date: The Monday.
+    """
+    today = timezone.localdate(moment)
+    return today - timedelta(days=today.weekday())
+
+
+def week_period(week):
+    """
+    Return the period a digest snapshot covers.
+
+    Args:
+        week (date): The Monday the snapshot is built for.
+
+    Returns:
+        tuple: (start, end) aware datetimes, from the previous Monday to
+            ``week``, local midnight to local midnight.
+    """
+    end = timezone.make_aware(datetime.combine(week, time.min))
+    start = timezone.make_aware(datetime.combine(week - timedelta(days=7), time.min))
+    return start, end
+
+
+def week_adverts(week):
+    """
+    Return the adverts of the snapshot of ``week``, newest first.
+
+    Args:
+        week (date): The Monday the snapshot is built for.
+
+    Returns:
+        QuerySet: The adverts.
+    """
+    period_start, period_end = week_period(week)
+    return (
+        Advert.objects.filter(created_at__gte=period_start, created_at__lt=period_end)
+        .order_by('-created_at', '-id')
+    )
+
+
+def build_snapshot(week):
+    """
+    Materialize the adverts of the week before ``week`` into its snapshot.
+
+    The period runs from the previous Monday to ``week``, local midnight to
+    local midnight, so every consumer of the week sees the same adverts
+    whenever it runs. An existing snapshot of the week is replaced. Each
+    item lists the Category ids of the advert for subscription matching.
+
+    Args:
+        week (date): The Monday the snapshot is built for.
+
+    Returns:
+        DigestSnapshot: The snapshot.
+    """
+    period_start, period_end = week_period(week)
+    adverts = week_adverts(week)
+    rows = adverts.values_list('id', 'title', 'category')
+
+    # Category choices are matched to the Category rows of the same name
+    choice_ids = dict(Category.objects.filter(name__in=CATEGORY_LABELS.values()).values_list('name', 'pk'))
+    linked = defaultdict(set)
+    for advert_id, category_id in (
+        Category.adverts.through.objects
+        .filter(advert__in=adverts)
+        .values_list('advert_id', 'category_id')
+    ):
+        linked[advert_id].add(category_id)
+
+    items = []
+    for pk, title, category in rows:
+        categories = linked[pk]
+        if CATEGORY_LABELS.get(category) in choice_ids:
+            categories.add(choice_ids[CATEGORY_LABELS[category]])
+        url = settings.SITE_URL + reverse('ads:advert-detail', kwargs={'pk': pk})
+        items.append([pk, title, category, url, sorted(categories)])
+    snapshot, _ = DigestSnapshot.objects.update_or_create(
+        week=week,
+        defaults={
+            'version': DIGEST_VERSION,
+            'period_start': period_start,
+            'period_end': period_end,
+            'items': items,
+        },
+    )
+    cache.set(SNAPSHOT_KEY.format(version=DIGEST_VERSION, week=week), snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def find_snapshot(week=None):
+    """
+    Return the snapshot of ``week`` if it has been built.
+
+    Reads hit the cache, then the snapshot table, never the adverts table.
+
+    Args:
+        week (date): The Monday of the week, the current week if None.
+
+    Returns:
+        DigestSnapshot: The snapshot, None if not built yet.
+    """
+    week = week or week_of()
+    key = SNAPSHOT_KEY.format(version=DIGEST_VERSION, week=week)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = DigestSnapshot.objects.filter(week=week, version=DIGEST_VERSION).first()
+        if snapshot is not None:
+            cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_snapshot(week=None):
+    """
+    Return the snapshot of ``week``, building it if no one has yet.
+
+    The adverts table is only queried by the first consumer of the week;
+    the others read it through ``find_snapshot``.
+
+    Args:
+        week (date): The Monday of the week, the current week if None.
+
+    Returns:
+        DigestSnapshot: The snapshot.
+    """
+    week = week or week_of()
+    return find_snapshot(week) or build_snapshot(week)
+
+
+def digest_items(snapshot):
+    """
+    Return the adverts of ``snapshot``.
+
+    Args:
+        snapshot (DigestSnapshot): The snapshot.
+
+    Returns:
+        list[DigestItem]: The adverts, newest first.
+    """
+    return [DigestItem(*item) for item in snapshot.items]
+
+
+def segment_items(items, categories):
+    """
+    Return the adverts of a digest sent to subscribers of ``categories``.
+
+    Args:
+        items (list[DigestItem]): The adverts of the snapshot.
+        categories (frozenset[int]): Subscribed Category ids; empty for
+            users without subscriptions, who get every advert.
+
+    Returns:
+        list[DigestItem]: The adverts of the segment.
+    """
+    if not categories:
+        return items
+    return [item for item in items if not categories.isdisjoint(item.categories)]
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+import redis
+import redis.asyncio
+from django.urls import reverse
+
+from ads_board import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis channel of the events of one user
+CHANNEL = 'ads:events:{user_id}'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class Subscription:
+    """
+    Events of one user for one connected client, queued on its event loop.
+
+    The queue is bounded: a client too slow to keep up loses events rather
+    than growing the memory of the worker.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(settings.ADS_EVENTS_QUEUE_SIZE)
+
+    def put(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout, disconnected=None):
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (float): Seconds to wait.
+            disconnected (asyncio.Event): Stops the wait early when set.
+
+        Returns:
+            str: The encoded event, or None on timeout or disconnection.
+        """
+        getter = asyncio.ensure_future(self.queue.get())
+        waiters = {getter}
+        if disconnected is not None:
+            waiters.add(asyncio.ensure_future(disconnected.wait()))
+        done, pending = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            waiter.cancel()
+        return getter.result() if getter in done else None
+
+
+class LocalBroker:
+    """
+    In-process broker: events reach the clients connected to this process.
+
+    Publishing is thread-safe, so sync views and signal receivers running in
+    worker threads can publish to subscribers waiting on the event loop.
+    """
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """
+        Start receiving the events of ``user_id``; call from the event loop.
+
+        Returns:
+            Subscription: The subscription, to pass to ``unsubscribe``.
+        """
+        subscription = Subscription(user_id)
+        with self.lock:
+            self.subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def publish(self, messages):
+        """
+        Publish events.
+
+        Args:
+            messages (list[tuple]): (user id, encoded event) pairs.
+        """
+        for user_id, payload in messages:
+            self.deliver(user_id, payload)
+
+    def deliver(self, user_id, payload):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, payload)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Broker relaying events through Redis pub/sub, so they reach the clients
+    of every ASGI worker whichever process published them (web or Celery).
+
+    Each worker holds a single pattern subscription whatever the number of
+    connected clients, and dispatches the messages to its local subscribers.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self.listener = None
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.ensure_future(self.listen())
+        return subscription
+
+    def publish(self, messages):
+        pipeline = self.client.pipeline(transaction=False)
+        for user_id, payload in messages:
+            pipeline.publish(CHANNEL.format(user_id=user_id), payload)
+        pipeline.execute()
+
+    async def listen(self):
+        """
+        Relay the messages of every user channel to the local subscribers,
+        reconnecting after errors while anyone is subscribed.
+        """
+        while self.subscriptions:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(CHANNEL.format(user_id='*'))
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            user_id = int(message['channel'].rsplit(b':', 1)[1])
+                            self.deliver(user_id, message['data'].decode())
+            except Exception:
+                logger.warning('Lost the events subscription, reconnecting', exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await client.close()
+
+
+def get_broker():
+    """
+    Return the events broker of the process.
+
+    Returns:
+        LocalBroker: A ``RedisBroker`` if ADS_EVENTS_REDIS_URL is set, the
+            in-process broker otherwise.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = settings.ADS_EVENTS_REDIS_URL
+                _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def publish(events):
+    """
+    Push events to the connected clients of their users.
+
+    Publishing never fails the caller: events are best effort, the emails
+    remain the reliable notification.
+
+    Args:
+        events (iterable[tuple]): (user id, event name, data) triples.
+    """
+    # Encoded once as the Server-Sent Events message sent to every client
+    messages = [
+        (user_id, f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n')
+        for user_id, event, data in events
+    ]
+    if not messages:
+        return
+    try:
+        get_broker().publish(messages)
+    except Exception:
+        logger.warning('Could not publish %d events', len(messages), exc_info=True)
+
+
+def response_event(pk, advert_id, advert_title, username, text):
+    """
+    Return the data of an event about a response.
+
+    Args:
+        pk (int): The response.
+        advert_id (int): Its advert.
+        advert_title (str): The title of its advert.
+        username (str): The name of the user who responded.
+        text (str): The text of the response, shortened in the event.
+
+    Returns:
+        dict: The event data.
+    """
+    return {
+        'id': pk,
+        'advert_id': advert_id,
+        'advert_title': advert_title,
+        'user': username,
+        'text': text[:200],
+        'url': reverse('ads:response-detail', kwargs={'pk': pk}),
+    }
@@ -0,0 +1,171 @@
+import csv
+import json
+import zlib
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from ads_board.disconnect import client_disconnected
+from .filters import AdvertFilter
+from .models import Advert, Response
+
+# Exported columns per kind; the first one is the primary key walked by the keyset
+EXPORTS = {
+    'adverts': (Advert, ['id', 'user_id', 'title', 'content', 'category', 'created_at', 'upload',
+                         'response_count', 'accepted_count', 'likes_total', 'last_response_at']),
+    'responses': (Response, ['id', 'advert_id', 'author_id', 'user_id', 'response_text', 'created_at',
+                             'status', 'likes', 'dislikes']),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Rows fetched per keyset query, and encoded per yielded chunk
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_queryset(kind, params=None):
+    """
+    Return the queryset of an export, filtered like the advert list.
+
+    Responses are restricted to the responses to the matching adverts.
+
+    Args:
+        kind (str): 'adverts' or 'responses'.
+        params (QueryDict): ``AdvertFilter`` parameters.
+
+    Returns:
+        QuerySet: The rows to export.
+    """
+    params = params or {}
+    adverts = AdvertFilter(params, Advert.objects.all()).qs
+    if kind == 'adverts':
+        return adverts
+    # Without a filter the advert subquery would only slow every chunk down
+    if any(params.get(name) for name in AdvertFilter.base_filters if name != 'sort'):
+        return Response.objects.filter(advert__in=adverts.values('pk'))
+    return Response.objects.all()
+
+
+def iter_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """
+    Yield the rows of ``queryset`` in chunks, walking the primary key.
+
+    Every chunk is one indexed range query on the primary key fetched with
+    ``values_list``, so no model instance is built and memory is bounded by
+    ``chunk_size`` whatever the size of the table.
+
+    Args:
+        queryset (QuerySet): The rows to export; its ordering is ignored.
+        fields (list[str]): The columns, the primary key first.
+        chunk_size (int): Rows per query.
+        using (str): Database alias to read from, the read alias if None.
+
+    Yields:
+        list[tuple]: The rows of the next chunk, in primary key order.
+    """
+    if using is None and settings.DATABASE_READ_ALIAS in connections:
+        using = settings.DATABASE_READ_ALIAS
+    queryset = queryset.using(using).order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(page.values_list(*fields)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+class Echo:
+    """
+    File-like object handing back what ``csv.writer`` writes to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(chunks, fields):
+    """
+    Encode row chunks as CSV, one string per chunk, header first.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for rows in chunks:
+        yield ''.join(writer.writerow([encode_value(value) for value in row]) for row in rows)
+
+
+def encode_jsonl(chunks, fields):
+    """
+    Encode row chunks as JSON lines, one string per chunk.
+    """
+    for rows in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(fields, map(encode_value, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def gzip_chunks(chunks):
+    """
+    Compress a stream of byte strings into one gzip stream, on the fly.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(kind, fmt, queryset=None, compress=False, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    """
+    Stream an export of adverts or responses.
+
+    Args:
+        kind (str): 'adverts' or 'responses'.
+        fmt (str): 'csv' or 'jsonl'.
+        queryset (QuerySet): The rows to export, every row if None.
+        compress (bool): Whether to gzip the output.
+        chunk_size (int): Rows per query and per yielded chunk.
+        using (str): Database alias to read from, the read alias if None.
+
+    Returns:
+        iterator[bytes]: The encoded (and compressed) export.
+    """
+    model, fields = EXPORTS[kind]
+    if queryset is None:
+        queryset = model.objects.all()
+    encode = encode_csv if fmt == 'csv' else encode_jsonl
+    chunks = (text.encode() for text in encode(iter_rows(queryset, fields, chunk_size, using), fields))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+async def aiterate(iterator):
+    """
+    Iterate a sync iterator from async code, one item per worker-thread hop.
+
+    Lets ASGI stream an export chunk by chunk; Django 4.2 would otherwise
+    read a sync streaming iterator whole before sending it. Iteration stops
+    when the client disconnects.
+    """
+    step = sync_to_async(next, thread_sensitive=True)
+    disconnected = client_disconnected()
+    while disconnected is None or not disconnected.is_set():
+        item = await step(iterator, None)
+        if item is None:
+            return
+        yield item
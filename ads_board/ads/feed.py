@@ -0,0 +1,121 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import OuterRef, Subquery
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Advert, Response
+from .pagination import MAX_PK, CursorPaginator, InvalidCursor, decode_cursor, encode_cursor
+
+# Responses returned per feed request; clients call again while has_more
+FEED_PAGE_SIZE = 50
+
+# Position before any response, handed out while the feed is empty
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def since_cursor(since):
+    """
+    Turn the ``since`` parameter of the feed into a cursor on newer rows.
+
+    Args:
+        since (str): A cursor returned by the feed, the id of the last seen
+            response or an ISO 8601 timestamp. A response deleted since is
+            replaced by the newest one before it, so a client holding its
+            id still catches up.
+
+    Returns:
+        str: A 'prev' cursor of ``CursorPaginator``.
+
+    Raises:
+        InvalidCursor: If ``since`` is none of these, or an id out of range.
+    """
+    # isdigit() alone also takes digits such as '²', which int() refuses
+    if since.isascii() and since.isdigit():
+        if int(since) > MAX_PK:
+            raise InvalidCursor(since)
+        position = (
+            Response.objects.filter(pk__lte=since).order_by('-pk')
+            .values_list('created_at', 'pk').first()
+        )
+        return encode_cursor(*(position or (EPOCH, 0)), 'prev')
+    moment = parse_datetime(since)
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        # Above any real key, so the cursor skips every row at that exact time
+        return encode_cursor(moment, MAX_PK, 'prev')
+    decode_cursor(since)
+    return since
+
+
+def owner_feed(user, since=None, limit=FEED_PAGE_SIZE):
+    """
+    Return the responses to the adverts of ``user`` newer than ``since``.
+
+    Each call is one keyset range query on the (advert owner, created_at)
+    response index, so its cost follows the number of new responses, not the
+    age of the account.
+
+    Args:
+        user (User): The advert owner.
+        since (str): See ``since_cursor``; None for the newest responses.
+        limit (int): The maximum number of responses.
+
+    Returns:
+        tuple: (responses oldest first, cursor to pass as ``since`` next
+            time, whether newer responses remain).
+
+    Raises:
+        InvalidCursor: If ``since`` is invalid.
+    """
+    paginator = CursorPaginator(Response.objects.for_owner_dashboard(user), limit)
+    cursor = since_cursor(since) if since else encode_cursor(EPOCH, 0, 'prev')
+    # Without a position, start from the newest responses
+    page = paginator.page(cursor if since else None)
+    # Pages list their rows newest first
+    rows = page.object_list[::-1]
+    if rows:
+        cursor = encode_cursor(rows[-1].created_at, rows[-1].pk, 'prev')
+    return rows, cursor, bool(since) and page.has_previous()
+
+
+def fill_advert_owners(responses):
+    """
+    Copy the owner of their advert onto responses written without one.
+
+    ``Response.save`` sets it; bulk loads, which bypass it, call this once
+    afterwards.
+
+    Args:
+        responses (QuerySet): The responses to fill.
+
+    Returns:
+        int: The number of responses updated.
+    """
+    owner = Advert.objects.filter(pk=OuterRef('advert_id')).values('user_id')[:1]
+    return responses.filter(advert_owner=None).update(advert_owner=Subquery(owner))
+
+
+def feed_item(response):
+    """
+    Return the JSON representation of a feed response.
+
+    Args:
+        response (Response): A response of ``owner_feed``.
+
+    Returns:
+        dict: The item.
+    """
+    return {
+        'id': response.pk,
+        'advert_id': response.advert_id,
+        'advert_title': response.advert.title,
+        'text': response.response_text,
+        'status': response.status,
+        'likes': response.likes,
+        'dislikes': response.dislikes,
+        'created_at': response.created_at.isoformat(),
+        'url': reverse('ads:response-detail', kwargs={'pk': response.pk}),
+    }
@@ -1,9 +1,12 @@
 from .models import Category, Advert
 from django.forms import DateTimeInput
-from django_filters import FilterSet, CharFilter, ModelChoiceFilter
+from django_filters import FilterSet, CharFilter, ChoiceFilter, ModelChoiceFilter
 from django.db.models import Q
 from django import template
 
+from users.authz import AuthorizationContext
+from .search import get_search_backend
+
 register = template.Library()
 
 
@@ -18,7 +21,7 @@ def is_author(user):
     Returns:
         bool: True if the user is an author, False otherwise.
     """
-    return user.groups.filter(name='Авторы').exists()
+    return AuthorizationContext.for_user(user).is_author
 
 
 class AdvertFilter(FilterSet):
@@ -28,8 +31,8 @@ class AdvertFilter(FilterSet):
 
     add_title = CharFilter(
         field_name='title',
-        lookup_expr='icontains',
-        label='Заголовок'
+        method='filter_search',
+        label='Поиск'
     )
     add_category = ModelChoiceFilter(
         field_name='category',
@@ -47,6 +50,43 @@ class AdvertFilter(FilterSet):
         ),
     )
 
+    sort = ChoiceFilter(
+        method='filter_sort',
+        choices=[('new', 'Новые'), ('popular', 'Популярные')],
+        label='Сортировка',
+        empty_label=None,
+    )
+
+    def filter_search(self, queryset, name, value):
+        """
+        Custom method for full-text search over title and content.
+
+        Args:
+            queryset (QuerySet): The initial queryset.
+            name (str): The field name.
+            value (str): The search query.
+
+        Returns:
+            QuerySet: The matching adverts, most relevant first.
+        """
+        return get_search_backend().search(queryset, value)
+
+    def filter_sort(self, queryset, name, value):
+        """
+        Custom method ordering adverts by popularity (response count).
+
+        Args:
+            queryset (QuerySet): The initial queryset.
+            name (str): The field name.
+            value (str): 'new' or 'popular'.
+
+        Returns:
+            QuerySet: The ordered queryset.
+        """
+        if value == 'popular':
+            return queryset.popular()
+        return queryset
+
     def filter_created_at(self, queryset, name, value):
         """
         Custom method for filtering based on the created_at field.
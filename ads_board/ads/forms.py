@@ -19,9 +19,10 @@ class AdvertForm(forms.ModelForm):
 
     class Meta:
         model = Advert
-        fields = ['title', 'content', 'category']
+        fields = ['title', 'content', 'category', 'upload']
         labels = {
             'title': 'Заголовок',
             'content': 'Текст объявления',
-            'category': 'Категория'
+            'category': 'Категория',
+            'upload': 'Файл'
         }
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from ads.seeding import seed
+from ads_board.benchmarks.drivers import DRIVERS
+from ads_board.benchmarks.servers import SERVERS
+from ads_board.benchmarks.suite import SCENARIOS, TASK_SCENARIOS, compare, run_suite
+
+
+class Command(BaseCommand):
+    """
+    Seed a throwaway database with a synthetic dataset, drive the board's
+    routes and the weekly digest through it and record throughput, latency
+    percentiles and query counts as JSON.
+    """
+
+    help = 'Benchmark the board against a synthetic dataset and compare with a previous run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--adverts', type=int, default=10000)
+        parser.add_argument('--responses', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per INSERT batch while seeding.')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario and driver.')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Requests in flight for the WSGI, ASGI and server drivers.')
+        parser.add_argument('--connections', type=int, default=2000,
+                            help='Idle event streams held open by the live-events scenario.')
+        parser.add_argument('--drivers', nargs='+', choices=[*DRIVERS, *SERVERS], default=list(DRIVERS),
+                            help='In-process drivers, or servers run in their own process and '
+                                 'driven over HTTP (e.g. --drivers wsgi-server uvicorn).')
+        parser.add_argument('--scenarios', nargs='+', choices=[*SCENARIOS, *TASK_SCENARIOS],
+                            default=[*SCENARIOS, *TASK_SCENARIOS])
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Previous results file to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Allowed relative regression, 0.1 meaning 10%%.')
+        parser.add_argument('--database',
+                            help='SQLite file to benchmark in; kept and reused if it exists. '
+                                 'Defaults to a temporary file removed afterwards.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+
+        keepdb = bool(options['database'])
+        name = options['database'] or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+        reuse = keepdb and os.path.exists(name)
+        connection.settings_dict['TEST']['NAME'] = name
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        # Read aliases follow the default database, as in the test runner
+        for alias in connections:
+            if connections[alias].settings_dict['TEST'].get('MIRROR') == connection.alias:
+                connections[alias].close()
+                connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            if not reuse:
+                self.stdout.write('Seeding the benchmark database...')
+                seed(
+                    users=options['users'],
+                    adverts=options['adverts'],
+                    responses=options['responses'],
+                    batch_size=options['batch_size'],
+                )
+            current = run_suite(
+                options['scenarios'],
+                options['drivers'],
+                options['requests'],
+                options['concurrency'],
+                meta={key: options[key] for key in ('users', 'adverts', 'responses', 'requests', 'concurrency')},
+                log=self.stdout.write,
+                connections=options['connections'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(current, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+        if baseline is not None:
+            regressions = compare(baseline, current, options['threshold'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,42 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ads.query_plans import HOT_QUERIES
+
+# Plan lines reading a whole table instead of seeking through an index
+FULL_SCAN_RE = re.compile(r'\bSCAN (?!.*\bUSING\b.*\bINDEX\b)|\bSeq Scan\b')
+
+
+class Command(BaseCommand):
+    """
+    Check that every registered hot query is served by an index.
+    """
+
+    help = 'Run EXPLAIN QUERY PLAN on the registered hot queries and fail on full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*',
+                            help='Only check the hot queries with these names.')
+
+    def handle(self, *args, **options):
+        names = options['names'] or sorted(HOT_QUERIES)
+        unknown = set(names) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f'Unknown hot queries: {", ".join(sorted(unknown))}')
+
+        failed = []
+        for name in names:
+            plan = HOT_QUERIES[name]().explain()
+            scans = [line for line in plan.splitlines() if FULL_SCAN_RE.search(line)]
+            if scans:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: full table scan'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: ok'))
+            if options['verbosity'] > 1 or scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        if failed:
+            raise CommandError(f'{len(failed)} hot queries fall back to a full table scan.')
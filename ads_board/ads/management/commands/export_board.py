@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from ads.export import EXPORT_CHUNK_SIZE, EXPORTS, FORMATS, export, export_queryset
+
+
+class Command(BaseCommand):
+    """
+    Dump adverts or responses as CSV or JSON lines with bounded memory.
+    """
+
+    help = 'Export adverts or responses as CSV or JSONL, optionally gzipped, filtered like the advert list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip.')
+        parser.add_argument('--output', help='File to write to; standard output by default.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Rows per query.')
+        parser.add_argument('--filter', action='append', default=[], metavar='NAME=VALUE',
+                            help='Advert list filter, e.g. add_category=3; may be repeated.')
+        parser.add_argument('--database', help='Database alias to read from; the read alias by default.')
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Invalid filter {item!r}, expected NAME=VALUE.')
+            params.appendlist(name, value)
+
+        chunks = export(
+            options['kind'],
+            options['format'],
+            export_queryset(options['kind'], params),
+            compress=options['gzip'],
+            chunk_size=options['chunk_size'],
+            using=options['database'],
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
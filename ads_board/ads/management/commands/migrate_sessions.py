@@ -0,0 +1,67 @@
+from collections import defaultdict
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+CACHE_ENGINE = 'django.contrib.sessions.backends.cache'
+CACHED_DB_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+class Command(BaseCommand):
+    """
+    Copy the live database sessions into the sessions cache.
+
+    Run it when switching to a cache-backed session engine so nobody is
+    logged out: with ``cached_db`` it warms the cache, with ``cache`` it
+    moves the sessions over (add ``--delete`` to drop the copied rows).
+    """
+
+    help = 'Copy unexpired database sessions into the cache of SESSION_CACHE_ALIAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Sessions per query and cache round trip.')
+        parser.add_argument('--delete', action='store_true',
+                            help='Delete the copied sessions from the database (cache engine only).')
+
+    def handle(self, *args, **options):
+        engine = settings.SESSION_ENGINE
+        if engine not in (CACHE_ENGINE, CACHED_DB_ENGINE):
+            raise CommandError(f'SESSION_ENGINE {engine} does not keep sessions in a cache.')
+        if options['delete'] and engine != CACHE_ENGINE:
+            raise CommandError(f'{engine} reads missing sessions from the database, keep them there.')
+
+        store_class = import_module(engine).SessionStore
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        now = timezone.now()
+        copied = 0
+        last_key = ''
+        while True:
+            rows = list(
+                Session.objects.filter(expire_date__gt=now, session_key__gt=last_key)
+                .order_by('session_key')
+                .values_list('session_key', 'session_data', 'expire_date')[:options['batch_size']]
+            )
+            if not rows:
+                break
+            last_key = rows[-1][0]
+
+            # set_many takes one timeout: group the sessions by the minute
+            # they expire in, rounding their lifetime down
+            groups = defaultdict(dict)
+            for session_key, session_data, expire_date in rows:
+                store = store_class(session_key=session_key)
+                seconds = int((expire_date - now).total_seconds())
+                groups[seconds // 60 * 60 or seconds][store.cache_key] = store.decode(session_data)
+            for timeout, values in groups.items():
+                cache.set_many(values, timeout)
+
+            if options['delete']:
+                Session.objects.filter(session_key__in=[row[0] for row in rows]).delete()
+            copied += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(f'Copied {copied} sessions to the "{settings.SESSION_CACHE_ALIAS}" cache.'))
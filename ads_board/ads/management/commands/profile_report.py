@@ -0,0 +1,77 @@
+import json
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ads_board import instrumentation
+
+
+class Command(BaseCommand):
+    """
+    Print per-view latency percentiles and the most repeated SQL statements
+    from the samples recorded by ProfilingMiddleware.
+    """
+
+    help = 'Report per-view latency, query and cache statistics of profiled requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--input',
+                            help='Read samples from a JSON lines file instead of Redis.')
+        parser.add_argument('--dump',
+                            help='Write the samples to a JSON lines file, for a later --input, '
+                                 'instead of reporting them.')
+        parser.add_argument('--top-sql', type=int, default=10,
+                            help='Number of repeated SQL statements to show.')
+
+    def handle(self, *args, **options):
+        if options['input']:
+            with open(options['input']) as lines:
+                samples = [json.loads(line) for line in lines if line.strip()]
+        else:
+            # The ring buffer of this fresh process is always empty: only
+            # Redis collects the samples of the serving processes
+            samples = instrumentation.load_from_redis()
+        if not samples:
+            raise CommandError('No samples recorded; set PROFILING_REDIS_URL or pass --input.')
+
+        if options['dump']:
+            with open(options['dump'], 'w') as lines:
+                lines.writelines(json.dumps(sample) + '\n' for sample in samples)
+            self.stdout.write(f'Wrote {len(samples)} samples to {options["dump"]}.')
+            return
+
+        self.write_views(samples)
+        self.write_sql(samples, options['top_sql'])
+
+    def write_views(self, samples):
+        by_view = defaultdict(list)
+        for sample in samples:
+            by_view[sample['view']].append(sample)
+
+        self.stdout.write(
+            f'{"view":<32} {"n":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+            f'{"queries":>8} {"db ms":>8} {"tpl ms":>8} {"cache hit":>9}'
+        )
+        for view, rows in sorted(by_view.items(), key=lambda item: -len(item[1])):
+            walls = [row['wall_time'] * 1000 for row in rows]
+            hits = sum(row['cache_hits'] for row in rows)
+            lookups = hits + sum(row['cache_misses'] for row in rows)
+            self.stdout.write(
+                f'{view:<32} {len(rows):>6} '
+                f'{instrumentation.percentile(walls, 50):>8.1f} '
+                f'{instrumentation.percentile(walls, 95):>8.1f} '
+                f'{instrumentation.percentile(walls, 99):>8.1f} '
+                f'{sum(row["db_count"] for row in rows) / len(rows):>8.1f} '
+                f'{sum(row["db_time"] for row in rows) * 1000 / len(rows):>8.1f} '
+                f'{sum(row["template_time"] for row in rows) * 1000 / len(rows):>8.1f} '
+                f'{(f"{hits / lookups:.0%}" if lookups else "-"):>9}'
+            )
+
+    def write_sql(self, samples, top):
+        statements = Counter()
+        for sample in samples:
+            statements.update(sample['sql'])
+        self.stdout.write('')
+        self.stdout.write(f'Top {top} repeated SQL statements:')
+        for sql, count in statements.most_common(top):
+            self.stdout.write(f'{count:>8}  {sql[:200]}')
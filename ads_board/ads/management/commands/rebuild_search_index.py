@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from ads.models import Advert
+from ads.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the advert search index from scratch.
+    """
+
+    help = 'Rebuild the advert full-text search index in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of adverts indexed per batch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = get_search_backend()
+        backend.clear()
+
+        # Walk the adverts by primary key so memory stays bounded
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Advert.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('id', 'title', 'content')[:batch_size]
+            )
+            if not batch:
+                break
+            backend.index(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} adverts.'))
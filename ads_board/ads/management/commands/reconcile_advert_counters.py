@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from ads.stats import reconcile_counters
+
+
+class Command(BaseCommand):
+    """
+    Recompute the response counters of every advert and repair drift.
+    """
+
+    help = 'Recompute advert response counters from the responses and repair drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Adverts per batch.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the number of drifted adverts.')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_counters(batch_size=options['batch_size'], fix=not options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} adverts have drifted counters.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired the counters of {drifted} adverts.'))
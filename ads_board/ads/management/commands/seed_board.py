@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ads.seeding import SEED_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    """
+    Append a synthetic dataset of users, profiles, adverts, categories and
+    responses to the database with bulk inserts.
+    """
+
+    help = 'Seed the board with synthetic users, adverts and responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--adverts', type=int, default=10000)
+        parser.add_argument('--responses', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per table partition and INSERT batch.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes generating table partitions in parallel.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, for reproducible datasets.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Spread adverts and responses over this many past days.')
+        parser.add_argument('--no-categories', action='store_true',
+                            help='Do not link adverts to categories.')
+        parser.add_argument('--defer-indexes', action='store_true',
+                            help='Drop the advert and response indexes during the load and '
+                                 'rebuild them afterwards; much faster for large loads on SQLite.')
+
+    def handle(self, *args, **options):
+        counts = {}
+
+        def progress(table, rows):
+            counts[table] = counts.get(table, 0) + rows
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{table}: {counts[table]} rows')
+
+        start = time.perf_counter()
+        created = seed(
+            users=options['users'],
+            adverts=options['adverts'],
+            responses=options['responses'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            days=options['days'],
+            workers=options['workers'],
+            categories=not options['no_categories'],
+            defer_indexes=options['defer_indexes'],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - start
+
+        rows = sum(len(ids) for ids in created.values())
+        for table, ids in created.items():
+            if ids:
+                self.stdout.write(f'{table}: {len(ids)} rows, ids {ids.start}-{ids.stop - 1}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s). '
+            f'Users log in with the password "{SEED_PASSWORD}".'
+        ))
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0005_advert_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='advert',
+            index=models.Index(fields=['-created_at', '-id'], name='ads_advert_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advert',
+            index=models.Index(fields=['category', '-created_at'], name='ads_advert_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advert',
+            index=models.Index(fields=['user', '-created_at'], name='ads_advert_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['advert', '-created_at'], name='ads_resp_advert_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['author', '-created_at'], name='ads_resp_author_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ads', '0006_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.SmallIntegerField(choices=[(1, 'Like'), (-1, 'Dislike')])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='ads.response')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Response vote',
+                'verbose_name_plural': 'Response votes',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='responsevote',
+            constraint=models.UniqueConstraint(fields=('response', 'user'), name='ads_response_vote_unique'),
+        ),
+    ]
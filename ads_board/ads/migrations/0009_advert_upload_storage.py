@@ -0,0 +1,24 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:24
+
+import ads.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0008_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advert',
+            name='thumbnail',
+            field=models.FileField(blank=True, editable=False, storage=ads.storage.ContentAddressedStorage(), upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='advert',
+            name='upload',
+            field=models.FileField(blank=True, help_text='Upload a file', storage=ads.storage.ContentAddressedStorage(), upload_to='uploads/'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:26
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Compute the counters of existing adverts from their responses.
+    """
+    Advert = apps.get_model('ads', 'Advert')
+    Response = apps.get_model('ads', 'Response')
+
+    def aggregate(value):
+        return Subquery(
+            Response.objects.filter(advert=OuterRef('pk')).order_by()
+            .values('advert').annotate(value=value).values('value')
+        )
+
+    Advert.objects.update(
+        response_count=Coalesce(aggregate(Count('id')), 0, output_field=IntegerField()),
+        accepted_count=Coalesce(aggregate(Count('id', filter=Q(status=True))), 0, output_field=IntegerField()),
+        likes_total=Coalesce(aggregate(Sum('likes')), 0, output_field=IntegerField()),
+        last_response_at=aggregate(Max('created_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0009_advert_upload_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advert',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='advert',
+            name='last_response_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='advert',
+            name='likes_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='advert',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='advert',
+            index=models.Index(fields=['-response_count', '-id'], name='ads_advert_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0010_advert_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(unique=True)),
+                ('version', models.PositiveSmallIntegerField()),
+                ('period_start', models.DateTimeField()),
+                ('period_end', models.DateTimeField()),
+                ('items', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Digest snapshot',
+                'verbose_name_plural': 'Digest snapshots',
+            },
+        ),
+    ]
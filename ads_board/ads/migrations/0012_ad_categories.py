@@ -0,0 +1,27 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:36
+
+from django.db import migrations
+
+
+def create_ad_categories(apps, schema_editor):
+    """
+    Create a Category row for every advert category choice, so users can
+    subscribe to them.
+    """
+    Advert = apps.get_model('ads', 'Advert')
+    Category = apps.get_model('ads', 'Category')
+    Category.objects.bulk_create(
+        [Category(name=label, is_ad_category=True) for _, label in Advert._meta.get_field('category').choices],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0011_digest_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_ad_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0012_ad_categories'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['-created_at', '-id'], name='ads_resp_created_idx'),
+        ),
+    ]
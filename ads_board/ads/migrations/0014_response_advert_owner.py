@@ -0,0 +1,36 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_advert_owners(apps, schema_editor):
+    """
+    Copy the owner of its advert onto every existing response.
+    """
+    Advert = apps.get_model('ads', 'Advert')
+    Response = apps.get_model('ads', 'Response')
+    owner = Advert.objects.filter(pk=models.OuterRef('advert_id')).values('user_id')[:1]
+    Response.objects.update(advert_owner=models.Subquery(owner))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ads', '0013_response_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='response',
+            name='advert_owner',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='received_responses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_advert_owners, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['advert_owner', '-created_at', '-id'], name='ads_resp_owner_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0014_response_advert_owner'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='response',
+            name='ads_resp_advert_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['advert', '-created_at', '-id'], name='ads_resp_advert_created_idx'),
+        ),
+    ]
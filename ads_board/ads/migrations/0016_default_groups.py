@@ -0,0 +1,47 @@
+# Generated by Django 4.2.3 on 2026-10-18 21:10
+
+from django.contrib.auth.management import create_permissions
+from django.db import migrations
+
+# Permissions of the groups users join on registration and on becoming authors
+GROUP_PERMISSIONS = {
+    'Пользователи': [
+        'add_response', 'response_create', 'view_advert', 'view_category', 'view_response',
+    ],
+    'Авторы': [
+        'add_advert', 'change_advert', 'delete_advert', 'view_advert',
+        'add_category', 'change_category', 'delete_category', 'view_category',
+        'add_response', 'change_response', 'delete_response', 'view_response', 'response_create',
+    ],
+}
+
+
+def create_default_groups(apps, schema_editor):
+    """
+    Create the user and author groups with their permissions, which the
+    database shipped with the project used to hold.
+    """
+    # Permissions are otherwise only created after the last migration
+    ads_config = apps.get_app_config('ads')
+    ads_config.models_module = True
+    create_permissions(ads_config, apps=apps, verbosity=0)
+    ads_config.models_module = None
+
+    Group = apps.get_model('auth', 'Group')
+    Permission = apps.get_model('auth', 'Permission')
+    for name, codenames in GROUP_PERMISSIONS.items():
+        group, _ = Group.objects.get_or_create(name=name)
+        group.permissions.add(*Permission.objects.filter(content_type__app_label='ads', codename__in=codenames))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('ads', '0015_response_thread_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_groups, migrations.RunPython.noop),
+    ]
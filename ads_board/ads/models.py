@@ -1,10 +1,72 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
+from django.utils import timezone
+
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
 
+class AdvertQuerySet(models.QuerySet):
+    """
+    Named querysets bundling the fetch plan of each advert use case.
+    """
+
+    def with_owner(self):
+        """
+        Adverts with their owner joined in, for pages showing the author.
+        """
+        return self.select_related('user')
+
+    def for_owner(self, user):
+        """
+        Adverts of ``user`` as listed on the private page.
+        """
+        return (
+            self.filter(user=user)
+            .only('id', 'title', 'created_at', 'response_count', 'accepted_count', 'likes_total',
+                  'last_response_at')
+            .order_by('-created_at')
+        )
+
+    def popular(self):
+        """
+        Adverts with the most responses first, read off the counter index.
+        """
+        return self.order_by('-response_count', '-id')
+
+
+class ResponseQuerySet(models.QuerySet):
+    """
+    Named querysets bundling the fetch plan of each response use case.
+    """
+
+    def with_parties(self):
+        """
+        Responses with their user and advert joined in, as used by ``__str__``.
+        """
+        return self.select_related('user', 'advert')
+
+    def for_owner_dashboard(self, user):
+        """
+        Responses to the adverts of ``user`` as listed on the private page.
+        """
+        return (
+            self.filter(advert_owner=user)
+            .select_related('advert')
+            .only('id', 'response_text', 'status', 'likes', 'dislikes', 'created_at',
+                  'advert__id', 'advert__title')
+            .order_by('-created_at')
+        )
+
+    def for_author(self, user):
+        """
+        Responses written by ``user`` with the advert they answer.
+        """
+        return self.filter(author=user).select_related('advert').order_by('-created_at')
+
+
 class Advert(models.Model):
     """
     Model representing an advertisement.
@@ -40,12 +102,28 @@ class Advert(models.Model):
     response_text = models.TextField(blank=True)
     # Date and time of advertisement creation.
     created_at = models.DateTimeField(auto_now_add=True)
-    # File upload field for the advertisement.
+    # File upload field for the advertisement, stored once per content.
     upload = models.FileField(
         upload_to='uploads/',
+        storage=ContentAddressedStorage(),
         help_text='Upload a file',
         blank=True
     )
+    # Thumbnail of an uploaded image, made by the upload post-processing task.
+    thumbnail = models.FileField(storage=ContentAddressedStorage(), blank=True, editable=False)
+    # Number of responses to the advertisement (kept up to date by ads.stats).
+    response_count = models.PositiveIntegerField(default=0, editable=False)
+    # Number of accepted responses.
+    accepted_count = models.PositiveIntegerField(default=0, editable=False)
+    # Total number of likes of the responses.
+    likes_total = models.PositiveIntegerField(default=0, editable=False)
+    # Date and time of the latest response.
+    last_response_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = AdvertQuerySet.as_manager()
+
+    # Fields whose previous files are released when they change
+    FILE_FIELDS = ('upload', 'thumbnail')
 
     def __str__(self):
         return self.title
@@ -53,9 +131,28 @@ class Advert(models.Model):
     def get_absolute_url(self):
         return reverse('ads:advert-detail', kwargs={'pk': self.pk})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored names of the loaded file fields, see ads.signals.advert_files_replaced
+        instance._stored_files = {
+            name: instance.__dict__[name] for name in cls.FILE_FIELDS if name in instance.__dict__
+        }
+        return instance
+
     class Meta:
         verbose_name = 'Advertisement'
         verbose_name_plural = 'Advertisements'
+        indexes = [
+            # Newest-first listing and the weekly digest date range.
+            models.Index(fields=['-created_at', '-id'], name='ads_advert_created_idx'),
+            # Listing filtered by category.
+            models.Index(fields=['category', '-created_at'], name='ads_advert_cat_created_idx'),
+            # Adverts of one owner on the private page.
+            models.Index(fields=['user', '-created_at'], name='ads_advert_user_created_idx'),
+            # Listing by popularity.
+            models.Index(fields=['-response_count', '-id'], name='ads_advert_popular_idx'),
+        ]
 
 
 class Response(models.Model):
@@ -70,6 +167,9 @@ class Response(models.Model):
     advert = models.ForeignKey(Advert, on_delete=models.CASCADE)
     # User who made the response (User model).
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='responses')
+    # Owner of the advert, copied from it on creation (indexed with created_at below).
+    advert_owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_responses',
+                                     null=True, editable=False, db_index=False)
     # Text content of the response.
     response_text = models.TextField(verbose_name='Response text')
     # Date and time of response creation.
@@ -81,39 +181,164 @@ class Response(models.Model):
     # Number of dislikes received by the response.
     dislikes = models.PositiveIntegerField(default=0)
 
+    objects = ResponseQuerySet.as_manager()
+
+    # Fields whose changes the post_save receivers react to, see ``changed_fields``
+    TRACKED_FIELDS = ('response_text', 'status')
+
     def __str__(self):
         return f'Response from {self.user.username} to the advertisement: {self.advert.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        self.snapshot(fields)
+
+    def snapshot(self, fields=None):
+        """
+        Remember the stored values of the tracked fields.
+
+        Args:
+            fields (iterable[str]): The fields just loaded or saved; None
+                for all of them.
+        """
+        deferred = self.get_deferred_fields()
+        names = self.TRACKED_FIELDS if fields is None else set(self.TRACKED_FIELDS).intersection(fields)
+        self._stored = {
+            **getattr(self, '_stored', {}),
+            **{name: getattr(self, name) for name in names if name not in deferred},
+        }
+
+    def changed_fields(self, update_fields=None):
+        """
+        Return the tracked fields whose value differs from the stored one.
+
+        Fields never loaded count as unchanged; on a response not saved yet,
+        the fields differing from their default count as changed.
+
+        Args:
+            update_fields (iterable[str]): Limit the answer to these fields,
+                as ``save(update_fields=...)`` does.
+
+        Returns:
+            set[str]: The changed fields.
+        """
+        stored = getattr(self, '_stored', None)
+        if stored is None:
+            changed = {
+                name for name in self.TRACKED_FIELDS
+                if getattr(self, name) != self._meta.get_field(name).get_default()
+            }
+        else:
+            changed = {name for name, value in stored.items() if getattr(self, name) != value}
+        if update_fields is not None:
+            changed.intersection_update(update_fields)
+        return changed
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.advert_owner_id is None:
+            self.advert_owner_id = self.advert.user_id
+        # The changes made by this save, read by the post_save receivers
+        self.saved_changes = self.changed_fields(kwargs.get('update_fields'))
+        # The receivers queue the notification emails in the same transaction
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+        self.snapshot(kwargs.get('update_fields'))
+
     def accept(self):
         """
-        Mark the response as accepted.
+        Mark the response as accepted and count it in its advert's counters.
+
+        Accepting an already accepted response does nothing.
         """
-        self.status = True
-        self.save()
+        from .stats import response_accepted
+
+        with transaction.atomic():
+            # Only the request flipping the flag counts the acceptance
+            if not Response.objects.filter(pk=self.pk, status=False).update(status=True):
+                self.status = True
+                return
+            self.status = True
+            self.save(update_fields=['status'])
+            response_accepted(self.advert_id)
 
     def like(self):
         """
-        Increase the number of likes for the response.
+        Accept the response (the profile page's "accept" action).
         """
-        self.status = True
-        self.save()
+        self.accept()
 
     def dislike(self):
         """
-        Increase the number of dislikes for the response.
+        Withdraw the acceptance of the response (the profile page's "reject"
+        action) and take it out of its advert's counters.
         """
-        self.status = False
-        self.save()
+        from .stats import response_unaccepted
+
+        with transaction.atomic():
+            if not Response.objects.filter(pk=self.pk, status=True).update(status=False):
+                self.status = False
+                return
+            self.status = False
+            self.save(update_fields=['status'])
+            response_unaccepted(self.advert_id)
 
     class Meta:
         permissions = [('response_create', 'Can create response')]
         verbose_name = 'Response'
         verbose_name_plural = 'Responses'
+        indexes = [
+            # Responses to one advert, newest first: the thread of the advert page.
+            models.Index(fields=['advert', '-created_at', '-id'], name='ads_resp_advert_created_idx'),
+            # Responses written by one user.
+            models.Index(fields=['author', '-created_at'], name='ads_resp_author_created_idx'),
+            # Admin changelist ordering and date filter.
+            models.Index(fields=['-created_at', '-id'], name='ads_resp_created_idx'),
+            # Responses to the adverts of one owner, newest first: the private page and its feed.
+            models.Index(fields=['advert_owner', '-created_at', '-id'], name='ads_resp_owner_created_idx'),
+        ]
 
     def get_absolute_url(self):
         return reverse('ads:response-detail', kwargs={'pk': self.pk})
 
 
+class ResponseVote(models.Model):
+    """
+    Model representing a like or dislike given by a user to a response.
+
+    A user can vote once per response; the unique constraint rejects
+    duplicates through its index.
+    """
+
+    LIKE = 1
+    DISLIKE = -1
+    VALUE_CHOICES = [
+        (LIKE, 'Like'),
+        (DISLIKE, 'Dislike'),
+    ]
+
+    # Response the vote was given to (Response model).
+    response = models.ForeignKey(Response, on_delete=models.CASCADE, related_name='votes')
+    # User who voted (User model).
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='response_votes')
+    # Like or dislike.
+    value = models.SmallIntegerField(choices=VALUE_CHOICES)
+    # Date and time of the vote.
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Response vote'
+        verbose_name_plural = 'Response votes'
+        constraints = [
+            models.UniqueConstraint(fields=['response', 'user'], name='ads_response_vote_unique'),
+        ]
+
+
 class Category(models.Model):
     """
     Model representing a category of advertisements.
@@ -132,3 +357,90 @@ class Category(models.Model):
     class Meta:
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Model representing an email queued in the outbox.
+
+    Emails are written in the request transaction and delivered later by the
+    outbox Celery task, with retries and a dead-letter state.
+    """
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead'),
+    ]
+
+    # Subject of the email.
+    subject = models.CharField(max_length=255)
+    # Plain text body of the email.
+    body = models.TextField(blank=True)
+    # Optional HTML alternative of the body.
+    html_body = models.TextField(blank=True)
+    # Sender address, DEFAULT_FROM_EMAIL if empty.
+    from_email = models.CharField(max_length=254, blank=True)
+    # List of recipient addresses.
+    recipients = models.JSONField(default=list)
+    # Delivery status.
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Number of failed delivery attempts.
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Earliest time of the next delivery attempt, or lease expiry while sending.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Token of the worker batch currently delivering the email.
+    claimed_by = models.CharField(max_length=32, blank=True)
+    # Error of the last failed attempt.
+    last_error = models.TextField(blank=True)
+    # Date and time the email was queued.
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Date and time the email was delivered.
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)}'
+
+    class Meta:
+        verbose_name = 'Outgoing email'
+        verbose_name_plural = 'Outgoing emails'
+        indexes = [
+            # Due emails picked up by the outbox worker.
+            models.Index(fields=['status', 'next_attempt_at'], name='ads_outbox_due_idx'),
+        ]
+
+
+class DigestSnapshot(models.Model):
+    """
+    Model representing the adverts of one week, materialized once for every
+    consumer of the weekly digest (emails, the "this week" page).
+
+    Items are stored as compact ``[id, title, category, url, categories]``
+    lists, ``categories`` being the ids of the advert's Category rows; see
+    ``ads.digest`` for building and reading snapshots.
+    """
+
+    # Monday of the week the snapshot was built for; it covers the week before.
+    week = models.DateField(unique=True)
+    # Layout version of the items, snapshots of older versions are rebuilt.
+    version = models.PositiveSmallIntegerField()
+    # Start of the covered period.
+    period_start = models.DateTimeField()
+    # End of the covered period (exclusive).
+    period_end = models.DateTimeField()
+    # The adverts of the period, newest first.
+    items = models.JSONField(default=list)
+    # Date and time the snapshot was built.
+    created_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Digest of {self.week} ({len(self.items)} adverts)'
+
+    class Meta:
+        verbose_name = 'Digest snapshot'
+        verbose_name_plural = 'Digest snapshots'
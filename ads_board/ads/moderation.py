@@ -0,0 +1,234 @@
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+
+from .cache import bump_adverts_generation
+from .events import publish, response_event
+from .models import Advert, Category, Response, ResponseVote
+from .outbox import queue_mails
+from .search import get_search_backend
+from .stats import refresh_counters, response_counts_changed
+from .thread import invalidate_threads
+from .uploads import release_files
+
+# Objects listed by name on the bulk delete confirmation page
+PREVIEW_SIZE = 20
+
+
+def raw_delete(queryset):
+    """
+    Delete the rows of ``queryset`` with one DELETE statement.
+
+    ``QuerySet.delete`` loads every row to cascade and send the per-row
+    signals; this runs the DELETE directly, so callers delete the dependent
+    rows first and do the work of the receivers themselves.
+
+    Args:
+        queryset (QuerySet): The rows to delete.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    model = queryset.model
+    using = router.db_for_write(model)
+    connection = connections[using]
+    selected, params = queryset.order_by().values('pk').query.get_compiler(using).as_sql()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({selected})',
+            params,
+        )
+        return cursor.rowcount
+
+
+def accept_responses(queryset):
+    """
+    Accept the pending responses of ``queryset`` with one UPDATE statement.
+
+    The counters of their adverts are recomputed with one more UPDATE, and
+    the authors are notified through emails queued in the outbox with one
+    INSERT (one email per author) and one batch of live events, instead of
+    one ``post_save`` round per response.
+
+    Args:
+        queryset (QuerySet): The responses to accept.
+
+    Returns:
+        int: The number of responses accepted.
+    """
+    pending = queryset.filter(status=False)
+    with transaction.atomic():
+        rows = list(pending.values_list(
+            'pk', 'advert_id', 'advert__title', 'user__username', 'response_text',
+            'author_id', 'author__username', 'author__email',
+        ))
+        if not rows:
+            return 0
+        accepted = pending.update(status=True)
+        advert_ids = {row[1] for row in rows}
+        refresh_counters(Advert.objects.filter(pk__in=advert_ids))
+        invalidate_threads(advert_ids)
+        # One email per author, listing all their accepted responses
+        by_author = defaultdict(list)
+        for _, _, title, _, _, _, username, email in rows:
+            by_author[username, email].append(title)
+        queue_mails(acceptance_mail(username, email, titles) for (username, email), titles in by_author.items())
+        events = [(row[5], 'accepted', response_event(*row[:5])) for row in rows]
+        transaction.on_commit(lambda: publish(events))
+    return accepted
+
+
+def acceptance_mail(username, email, titles):
+    """
+    Build the email telling an author that responses of theirs were accepted.
+
+    Args:
+        username (str): The author.
+        email (str): Their address.
+        titles (list[str]): The titles of the adverts of the accepted responses.
+
+    Returns:
+        tuple: (subject, message, recipient_list), as taken by ``queue_mails``.
+    """
+    if len(titles) == 1:
+        return 'Ваш отклик приняли!', f'{username}, ваш отклик к {titles[0]} приняли', [email]
+    listed = '\n'.join(f'- {title}' for title in titles)
+    return 'Ваши отклики приняли!', f'{username}, ваши отклики приняли:\n{listed}', [email]
+
+
+def reject_responses(queryset):
+    """
+    Withdraw the acceptance of the responses of ``queryset`` with one UPDATE.
+
+    Args:
+        queryset (QuerySet): The responses to reject.
+
+    Returns:
+        int: The number of responses rejected.
+    """
+    accepted = queryset.filter(status=True)
+    with transaction.atomic():
+        advert_ids = set(accepted.values_list('advert_id', flat=True))
+        rejected = accepted.update(status=False)
+        refresh_counters(Advert.objects.filter(pk__in=advert_ids))
+        invalidate_threads(advert_ids)
+    return rejected
+
+
+def delete_responses(queryset):
+    """
+    Delete the responses of ``queryset`` and their votes with one DELETE each.
+
+    The per-row ``post_delete`` receivers are bypassed; the counters of the
+    adverts are recomputed once instead.
+
+    Args:
+        queryset (QuerySet): The responses to delete.
+
+    Returns:
+        int: The number of responses deleted.
+    """
+    selected = queryset.order_by().values('pk')
+    with transaction.atomic():
+        advert_ids = set(queryset.values_list('advert_id', flat=True))
+        ResponseVote.objects.filter(response__in=selected).delete()
+        deleted = raw_delete(Response.objects.filter(pk__in=selected))
+        refresh_counters(Advert.objects.filter(pk__in=advert_ids))
+        response_counts_changed(advert_ids)
+        invalidate_threads(advert_ids)
+    return deleted
+
+
+# Actions of ``triage_responses``
+TRIAGE_ACTIONS = {
+    'accept': accept_responses,
+    'reject': reject_responses,
+    'delete': delete_responses,
+}
+
+
+def triage_responses(owner, ids, action):
+    """
+    Apply a moderation action to the responses of ``ids`` that answer the
+    adverts of ``owner``.
+
+    Ownership is checked with one query on the denormalized advert owner;
+    the action then runs as one UPDATE or DELETE over the owned responses,
+    with the counters refreshed and the notifications queued once.
+
+    Args:
+        owner (User): The advert owner triaging the responses.
+        ids (list[int]): The responses to triage.
+        action (str): A key of ``TRIAGE_ACTIONS``.
+
+    Returns:
+        tuple: (the owned response ids, the number of responses changed).
+    """
+    owned = list(Response.objects.filter(pk__in=ids, advert_owner=owner).values_list('pk', flat=True))
+    if not owned:
+        return owned, 0
+    return owned, TRIAGE_ACTIONS[action](Response.objects.filter(pk__in=owned))
+
+
+def delete_adverts(queryset):
+    """
+    Delete the adverts of ``queryset`` with their responses, votes and
+    category links, one DELETE statement per table.
+
+    What the per-row receivers do is done once for all of them: the adverts
+    leave the search index, the cached pages are invalidated and the files
+    no advert uses anymore are deleted after commit.
+
+    Args:
+        queryset (QuerySet): The adverts to delete.
+
+    Returns:
+        int: The number of adverts deleted.
+    """
+    with transaction.atomic():
+        rows = list(queryset.values_list('pk', 'upload', 'thumbnail'))
+        if not rows:
+            return 0
+        pks = [pk for pk, *_ in rows]
+        ResponseVote.objects.filter(response__advert__in=pks).delete()
+        raw_delete(Response.objects.filter(advert__in=pks))
+        Category.adverts.through.objects.filter(advert__in=pks).delete()
+        deleted = raw_delete(Advert.objects.filter(pk__in=pks))
+        get_search_backend().remove(pks)
+        invalidate_threads(pks)
+        names = [name for _, *files in rows for name in files]
+        transaction.on_commit(lambda: release_files(names))
+        transaction.on_commit(bump_adverts_generation)
+    return deleted
+
+
+def deletion_summary(queryset):
+    """
+    Describe what deleting ``queryset`` removes, with counting queries only.
+
+    Stands in for the admin's related object collector, which loads and
+    renders every object that goes away.
+
+    Args:
+        queryset (QuerySet): The adverts or responses to delete.
+
+    Returns:
+        tuple: (preview, model_count) as expected by the admin's delete
+            confirmation page: the first objects as strings and the number
+            of objects per model.
+    """
+    if queryset.model is Advert:
+        responses = Response.objects.filter(advert__in=queryset.order_by().values('pk'))
+        preview = [str(advert) for advert in queryset[:PREVIEW_SIZE]]
+    else:
+        responses = queryset
+        preview = [str(response) for response in queryset.with_parties()[:PREVIEW_SIZE]]
+    model_count = {
+        queryset.model._meta.verbose_name_plural: queryset.count(),
+        Response._meta.verbose_name_plural: responses.count(),
+        ResponseVote._meta.verbose_name_plural: ResponseVote.objects.filter(
+            response__in=responses.order_by().values('pk')
+        ).count(),
+    }
+    return preview, {name: count for name, count in model_count.items() if count}
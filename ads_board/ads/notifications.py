@@ -0,0 +1,47 @@
+from django.db import transaction
+
+from .events import publish, response_event
+from .models import Response
+from .outbox import queue_mails
+
+# Transitions of a response its parties are notified of
+CREATED = 'created'
+ACCEPTED = 'accepted'
+
+
+def notify_response(response_id, transitions):
+    """
+    Notify the parties of a response of its state transitions.
+
+    Call it in the transaction that changed the response: the emails are
+    queued in the outbox with one INSERT, so they commit or roll back with
+    the change, and the live events are published in one batch once it
+    commits. The response, its advert and its users are loaded with one
+    query.
+
+    Args:
+        response_id (int): The response.
+        transitions (list[str]): ``CREATED`` and/or ``ACCEPTED``.
+    """
+    response = Response.objects.select_related('advert__user', 'user', 'author').get(pk=response_id)
+    owner = response.advert.user
+    event = response_event(response.pk, response.advert_id, response.advert.title,
+                           response.user.username, response.response_text)
+    messages, events = [], []
+    if CREATED in transitions:
+        messages.append((
+            'На ваше объявление откликнулись!',
+            f'{owner.username}, вам отклик от {response.user.username}! Вот он: "{response.response_text}" ',
+            [owner.email],
+        ))
+        events.append((owner.pk, 'response', event))
+    if ACCEPTED in transitions:
+        messages.append((
+            'Ваш отклик приняли!',
+            f'{response.author.username}, ваш отклик к {response.advert.title} приняли',
+            [response.author.email],
+        ))
+        events.append((response.author_id, 'accepted', event))
+
+    queue_mails(messages)
+    transaction.on_commit(lambda: publish(events))
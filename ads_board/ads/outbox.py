@@ -0,0 +1,215 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ads_board import settings
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_mail(subject, message, recipient_list, from_email=None, html_message=None):
+    """
+    Queue an email in the outbox instead of sending it inline.
+
+    Takes the same arguments as ``django.core.mail.send_mail``. The email row
+    is written in the current transaction and delivery is triggered once that
+    transaction commits, so the caller never waits for the mail server.
+
+    Args:
+        subject (str): The subject of the email.
+        message (str): The plain text body.
+        recipient_list (list[str]): The recipient addresses.
+        from_email (str): The sender, DEFAULT_FROM_EMAIL if None.
+        html_message (str): An optional HTML alternative of the body.
+
+    Returns:
+        OutgoingEmail: The queued email.
+    """
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or '',
+        recipients=list(recipient_list),
+    )
+    transaction.on_commit(schedule_delivery)
+    return email
+
+
+def queue_mails(messages):
+    """
+    Queue many emails in the outbox with one INSERT.
+
+    Delivery is triggered once, when the current transaction commits; the
+    outbox task then sends them in batches over shared SMTP connections.
+
+    Args:
+        messages (iterable[tuple]): (subject, message, recipient_list) triples.
+
+    Returns:
+        list[OutgoingEmail]: The queued emails.
+    """
+    emails = OutgoingEmail.objects.bulk_create([
+        OutgoingEmail(subject=subject, body=message, recipients=list(recipient_list))
+        for subject, message, recipient_list in messages
+    ])
+    if emails:
+        transaction.on_commit(schedule_delivery)
+    return emails
+
+
+def schedule_delivery():
+    """
+    Ask a Celery worker to drain the outbox.
+
+    A broker outage must not break the request that queued the email; the
+    periodic outbox task picks the email up later in that case.
+    """
+    from ads_board.tasks.tasks import deliver_outbox
+
+    try:
+        deliver_outbox.delay()
+    except Exception:
+        logger.warning('Could not enqueue outbox delivery', exc_info=True)
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to ``batch_size`` due emails for delivery.
+
+    Pending emails whose next attempt is due, and sending emails whose lease
+    has expired (their worker died), are marked as sending under a fresh
+    claim token, so concurrent workers never deliver the same email twice.
+
+    Args:
+        batch_size (int): The maximum number of emails to claim.
+
+    Returns:
+        list[OutgoingEmail]: The claimed emails.
+    """
+    now = timezone.now()
+    due = Q(status__in=[OutgoingEmail.PENDING, OutgoingEmail.SENDING], next_attempt_at__lte=now)
+    pks = list(
+        OutgoingEmail.objects.filter(due)
+        .order_by('next_attempt_at', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not pks:
+        return []
+
+    token = uuid.uuid4().hex
+    OutgoingEmail.objects.filter(due, pk__in=pks).update(
+        status=OutgoingEmail.SENDING,
+        claimed_by=token,
+        next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE),
+    )
+    return list(OutgoingEmail.objects.filter(claimed_by=token, status=OutgoingEmail.SENDING))
+
+
+def deliver_batch(batch_size=None):
+    """
+    Deliver one batch of due emails over a single SMTP connection.
+
+    Failed emails are retried with exponential backoff and end up in the
+    dead state after ``OUTBOX_MAX_ATTEMPTS`` attempts.
+
+    Args:
+        batch_size (int): The maximum number of emails to deliver,
+            OUTBOX_BATCH_SIZE if None.
+
+    Returns:
+        int: The number of emails claimed by this batch.
+    """
+    emails = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0
+
+    token = emails[0].claimed_by
+    sent = []
+    connection = get_connection()
+    try:
+        connection.open()
+        opened = None
+    except Exception as exc:
+        opened = exc
+
+    for email in emails:
+        error = opened
+        if error is None:
+            msg = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=email.recipients,
+                connection=connection,
+            )
+            if email.html_body:
+                msg.attach_alternative(email.html_body, 'text/html')
+            try:
+                msg.send()
+            except Exception as exc:
+                error = exc
+        if error is None:
+            sent.append(email.pk)
+        else:
+            mark_failed(email, error)
+
+    if opened is None:
+        connection.close()
+
+    mark_sent(token, sent)
+    return len(emails)
+
+
+def mark_sent(token, pks):
+    """
+    Record the delivery of emails claimed under ``token``.
+
+    Emails whose lease expired during the batch and that another worker
+    claimed since are left to that worker.
+
+    Args:
+        token (str): The claim token of the batch.
+        pks (list[int]): The delivered emails.
+    """
+    OutgoingEmail.objects.filter(pk__in=pks, claimed_by=token).update(
+        status=OutgoingEmail.SENT,
+        claimed_by='',
+        sent_at=timezone.now(),
+    )
+
+
+def mark_failed(email, error):
+    """
+    Record a failed delivery attempt and schedule a retry or give up.
+
+    Nothing is recorded if another worker has claimed the email since its
+    lease expired.
+
+    Args:
+        email (OutgoingEmail): The claimed email that could not be delivered.
+        error (Exception): The delivery error.
+    """
+    token = email.claimed_by
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.claimed_by = ''
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.DEAD
+    else:
+        email.status = OutgoingEmail.PENDING
+        delay = settings.OUTBOX_RETRY_BACKOFF * 2 ** (email.attempts - 1)
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    fields = ['attempts', 'last_error', 'claimed_by', 'status', 'next_attempt_at']
+    if not OutgoingEmail.objects.filter(pk=email.pk, claimed_by=token).update(
+        **{field: getattr(email, field) for field in fields}
+    ):
+        return
+    if email.status == OutgoingEmail.DEAD:
+        logger.error('Outgoing email %s moved to dead letters: %r', email.pk, error)
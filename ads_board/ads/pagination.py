@@ -0,0 +1,163 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Largest primary key a cursor can hold, that of a signed 64-bit column
+MAX_PK = 2 ** 63 - 1
+
+
+class InvalidCursor(Exception):
+    """
+    Raised when a cursor passed by the client cannot be decoded.
+    """
+
+
+def encode_cursor(created_at, pk, direction):
+    """
+    Encode a keyset position into an opaque, URL-safe cursor.
+
+    Args:
+        created_at (datetime): The created_at value of the boundary row.
+        pk (int): The primary key of the boundary row.
+        direction (str): 'next' or 'prev'.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    payload = json.dumps([created_at.isoformat(), pk, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor (str): The encoded cursor.
+
+    Returns:
+        tuple: The (created_at, pk, direction) triple.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(created_at)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    # Keys out of the column range would overflow in the query
+    valid_pk = isinstance(pk, int) and not isinstance(pk, bool) and -MAX_PK - 1 <= pk <= MAX_PK
+    if created_at is None or not valid_pk or direction not in ('next', 'prev'):
+        raise InvalidCursor(cursor)
+    return created_at, pk, direction
+
+
+class CursorPage:
+    """
+    A page of objects produced by ``CursorPaginator``.
+
+    Mirrors the parts of Django's ``Page`` used by the templates, but exposes
+    opaque cursors instead of page numbers.
+    """
+
+    def __init__(self, object_list, next_cursor, prev_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over a queryset ordered newest first by (created_at, id).
+
+    Each page is fetched with a single indexed range query, so the cost of a
+    page does not depend on how deep it is and no COUNT(*) is ever issued.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        """
+        Return the page starting at ``cursor``.
+
+        Args:
+            cursor (str): An encoded cursor, or None for the first page.
+
+        Returns:
+            CursorPage: The requested page.
+
+        Raises:
+            InvalidCursor: If the cursor is malformed.
+        """
+        queryset, direction = self.bounded(cursor)
+        # One extra row tells whether there is anything beyond this page
+        return self.build_page(list(queryset[:self.per_page + 1]), cursor, direction)
+
+    async def apage(self, cursor=None):
+        """
+        Async version of ``page``.
+        """
+        queryset, direction = self.bounded(cursor)
+        rows = [obj async for obj in queryset[:self.per_page + 1].aiterator()]
+        return self.build_page(rows, cursor, direction)
+
+    def bounded(self, cursor):
+        """
+        Return the queryset of the rows beyond ``cursor``, in reading order,
+        and the direction of the cursor.
+        """
+        direction = 'next'
+        queryset = self.queryset
+        if cursor:
+            created_at, pk, direction = decode_cursor(cursor)
+            if direction == 'next':
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+                )
+
+        if direction == 'next':
+            return queryset.order_by('-created_at', '-pk'), direction
+        return queryset.order_by('created_at', 'pk'), direction
+
+    def build_page(self, rows, cursor, direction):
+        """
+        Build the page from up to ``per_page + 1`` rows fetched in reading order.
+        """
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows, None, None)
+
+        first, last = rows[0], rows[-1]
+        if direction == 'next':
+            has_next, has_prev = has_more, bool(cursor)
+        else:
+            has_next, has_prev = True, has_more
+        next_cursor = encode_cursor(last.created_at, last.pk, 'next') if has_next else None
+        prev_cursor = encode_cursor(first.created_at, first.pk, 'prev') if has_prev else None
+        return CursorPage(rows, next_cursor, prev_cursor)
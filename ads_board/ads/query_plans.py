@@ -0,0 +1,98 @@
+from django.http import QueryDict
+from django.utils import timezone
+
+from .digest import week_adverts, week_of
+from .filters import AdvertFilter
+from .models import Advert, Category, Response
+from .pagination import CursorPaginator, encode_cursor
+from .thread import thread_queryset
+
+# Registered hot queries: name -> callable returning the queryset to check
+HOT_QUERIES = {}
+
+# Placeholder primary key used to bind per-user query parameters
+SAMPLE_PK = 1
+
+
+def hot_query(name):
+    """
+    Register a queryset factory as a hot query checked by ``check_query_plans``.
+
+    Args:
+        name (str): A unique name for the query, usually the view it belongs to.
+
+    Returns:
+        callable: The decorator registering the factory.
+    """
+    def decorator(func):
+        HOT_QUERIES[name] = func
+        return func
+    return decorator
+
+
+def advert_list_queryset(**params):
+    """
+    Return the queryset the advert list views build for GET parameters.
+
+    Args:
+        **params: The GET parameters.
+
+    Returns:
+        QuerySet: The filtered adverts.
+    """
+    query = QueryDict(mutable=True)
+    query.update(params)
+    return AdvertFilter(query, Advert.objects.order_by('-created_at')).qs
+
+
+@hot_query('ads:advert-list')
+def advert_list():
+    return advert_list_queryset()
+
+
+@hot_query('ads:advert-list[category]')
+def advert_list_by_category():
+    category = Category.objects.values_list('pk', flat=True).first() or SAMPLE_PK
+    return advert_list_queryset(add_category=category)
+
+
+@hot_query('ads:advert-list[date]')
+def advert_list_by_date():
+    return advert_list_queryset(add_date=timezone.now().isoformat())
+
+
+@hot_query('ads:advert-list[cursor]')
+def advert_list_by_cursor():
+    cursor = encode_cursor(timezone.now(), SAMPLE_PK, 'next')
+    return CursorPaginator(advert_list_queryset(), 15).bounded(cursor)[0]
+
+
+@hot_query('ads:advert-responses')
+def advert_responses():
+    return CursorPaginator(thread_queryset(SAMPLE_PK), 20).bounded(None)[0]
+
+
+@hot_query('ads:private[adverts]')
+def private_adverts():
+    return CursorPaginator(Advert.objects.for_owner(SAMPLE_PK), 20).bounded(None)[0]
+
+
+@hot_query('ads:private[responses]')
+def private_responses():
+    return CursorPaginator(Response.objects.for_owner_dashboard(SAMPLE_PK), 15).bounded(None)[0]
+
+
+@hot_query('ads:private-feed')
+def private_feed():
+    cursor = encode_cursor(timezone.now(), SAMPLE_PK, 'prev')
+    return CursorPaginator(Response.objects.for_owner_dashboard(SAMPLE_PK), 50).bounded(cursor)[0]
+
+
+@hot_query('users:response_list')
+def response_list():
+    return Response.objects.for_author(SAMPLE_PK)
+
+
+@hot_query('tasks:build_digest_snapshot')
+def weekly_digest():
+    return week_adverts(week_of())
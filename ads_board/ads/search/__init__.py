@@ -0,0 +1,30 @@
+from django.utils.module_loading import import_string
+
+from ads_board import settings
+
+from .backends import BaseSearchBackend, LikeSearchBackend, SQLiteFTS5Backend
+
+__all__ = (
+    'BaseSearchBackend',
+    'LikeSearchBackend',
+    'SQLiteFTS5Backend',
+    'get_search_backend',
+)
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Return the configured search backend instance.
+
+    The backend class is taken from the ``ADS_SEARCH_BACKEND`` setting and
+    instantiated once per process.
+
+    Returns:
+        BaseSearchBackend: The search backend.
+    """
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.ADS_SEARCH_BACKEND)()
+    return _backend
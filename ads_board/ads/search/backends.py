@@ -0,0 +1,140 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+# Word tokens of a user query; everything else is treated as a separator
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class BaseSearchBackend:
+    """
+    Interface of an advert search backend.
+
+    A backend keeps its own index of advert titles and contents and turns a
+    user query into a relevance-ordered queryset of adverts.
+    """
+
+    def index(self, adverts):
+        """
+        Add or refresh the given adverts in the index.
+
+        Args:
+            adverts (iterable[Advert]): The adverts to index.
+        """
+        raise NotImplementedError
+
+    def remove(self, pks):
+        """
+        Drop the adverts with the given primary keys from the index.
+
+        Args:
+            pks (iterable[int]): The primary keys to remove.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Drop every entry from the index.
+        """
+        raise NotImplementedError
+
+    def search(self, queryset, query):
+        """
+        Restrict ``queryset`` to adverts matching ``query``, best matches first.
+
+        Args:
+            queryset (QuerySet): The adverts to search in.
+            query (str): The user query.
+
+        Returns:
+            QuerySet: The matching adverts ordered by relevance.
+        """
+        raise NotImplementedError
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """
+    Index-less fallback backend using ``icontains`` on title and content.
+
+    Works on any database but scans the whole table; use it only where no
+    full-text backend is available.
+    """
+
+    def index(self, adverts):
+        pass
+
+    def remove(self, pks):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, queryset, query):
+        condition = Q()
+        for token in TOKEN_RE.findall(query):
+            condition &= Q(title__icontains=token) | Q(content__icontains=token)
+        return queryset.filter(condition)
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Search backend on an SQLite FTS5 inverted index.
+
+    The ``ads_advert_fts`` virtual table is created by the ads migrations and
+    keyed by advert id through its rowid. Matches are ranked with bm25, the
+    title weighing more than the content, and ordered by rank and id in SQL,
+    so every match can be paginated.
+    """
+
+    table = 'ads_advert_fts'
+    title_weight = 10.0
+    content_weight = 1.0
+
+    def index(self, adverts):
+        rows = [(advert.pk, advert.title, advert.content) for advert in adverts]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, title, content) VALUES (%s, %s, %s)', rows)
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def build_match(self, query):
+        """
+        Turn a user query into an FTS5 MATCH expression.
+
+        Every word becomes a quoted prefix term, so partial words still match
+        and FTS5 operators typed by the user are not interpreted.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            str: The MATCH expression, empty if the query has no words.
+        """
+        return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+
+    def search(self, queryset, query):
+        match = self.build_match(query)
+        if not match:
+            return queryset
+        table, advert_table = self.table, queryset.model._meta.db_table
+        matching = RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        rank = RawSQL(
+            f'SELECT bm25({table}, %s, %s) FROM {table} '
+            f'WHERE {table} MATCH %s AND {table}.rowid = {advert_table}.id',
+            [self.title_weight, self.content_weight, match],
+            output_field=FloatField(),
+        )
+        # bm25 is lower for better matches
+        return queryset.filter(pk__in=matching).annotate(search_rank=rank).order_by('search_rank', '-pk')
@@ -0,0 +1,376 @@
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from users.models import Profile, Subscription
+from .cache import bump_adverts_generation
+from .feed import fill_advert_owners
+from .models import Advert, Category, Response
+from .search import get_search_backend
+from .stats import refresh_counters
+
+# Password of every generated user
+SEED_PASSWORD = 'board-seed'
+
+WORDS = (
+    'танк хил маг меч щит лук зелье руна гильдия рейд подземелье квест кузница '
+    'доспех кожа броня посох свиток дракон замок тролль орк эльф гном торговля '
+    'обмен продам куплю ищу группа клан арена турнир награда'
+).split()
+
+# Model signals silenced while seeding
+MODEL_SIGNALS = (pre_save, post_save, pre_delete, post_delete, m2m_changed)
+
+# Fields written per model, in the order of the generated row values
+USER_FIELDS = ['id', 'username', 'email', 'password', 'first_name', 'last_name',
+               'is_superuser', 'is_staff', 'is_active', 'date_joined']
+PROFILE_FIELDS = ['user', 'is_author']
+SUBSCRIPTION_FIELDS = ['user', 'category']
+ADVERT_FIELDS = ['id', 'user', 'title', 'content', 'category', 'response_text', 'upload', 'thumbnail',
+                 'response_count', 'accepted_count', 'likes_total', 'created_at']
+ADVERT_CATEGORY_FIELDS = ['advert', 'category']
+RESPONSE_FIELDS = ['id', 'advert', 'author', 'user', 'response_text', 'created_at',
+                   'status', 'likes', 'dislikes']
+
+# Plan of the running seed, set in worker processes by the pool initializer
+_plan = None
+
+
+@contextmanager
+def muted_signals(*signals):
+    """
+    Disconnect every receiver of the given signals for the duration of the block.
+
+    Keeps the email, search and cache receivers of ``ads.signals`` from
+    running once per generated row.
+    """
+    saved = [(signal, signal.receivers) for signal in signals]
+    for signal in signals:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+def tune_connection():
+    """
+    Give an SQLite connection a large page cache for bulk loading, on top of
+    the pragmas it was opened with.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        # Keep the index pages being filled in memory (the value is in KiB)
+        cursor.execute('PRAGMA cache_size=-262144')
+        # SQLite refuses to change it inside a transaction
+        if not connection.in_atomic_block:
+            cursor.execute('PRAGMA temp_store=MEMORY')
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """
+    Drop the secondary indexes of the given models' tables and rebuild them
+    when the block exits.
+
+    Maintaining several indexes on random keys row by row is what bounds the
+    insert rate of large loads; building each index once over the loaded
+    table is far cheaper. Only SQLite is handled, other databases are left
+    untouched.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+def next_pk(model):
+    """
+    Return the first free primary key of ``model``.
+    """
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize()
+
+
+def chunked(ids, size):
+    """
+    Split a range of primary keys into consecutive ranges of at most ``size``.
+    """
+    for start in range(ids.start, ids.stop, size):
+        yield range(start, min(start + size, ids.stop))
+
+
+def insert_rows(model, fields, rows):
+    """
+    Insert prepared rows into the table of ``model`` with one ``executemany``.
+
+    Unlike ``bulk_create`` no model instance is built and no per-value
+    compilation happens, which is what dominates the cost of large loads.
+    Values must already be in their database representation.
+
+    Args:
+        model (type): The model whose table receives the rows.
+        fields (list[str]): Names of the fields, in the order of the row values.
+        rows (list[tuple]): The rows.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})',
+            rows,
+        )
+
+
+class IndexedAdvert:
+    """
+    The fields of a generated advert read by the search backends.
+    """
+
+    __slots__ = ('pk', 'title', 'content')
+
+    def __init__(self, pk, title, content):
+        self.pk = pk
+        self.title = title
+        self.content = content
+
+
+def generate(table, ids):
+    """
+    Generate the rows of one partition of a table.
+
+    Every partition draws from its own random generator, seeded from the
+    run seed and the partition bounds, so a dataset is the same whatever the
+    number of workers.
+
+    Args:
+        table (str): 'users', 'adverts' or 'responses'.
+        ids (range): The primary keys of the partition.
+
+    Returns:
+        tuple: The table and the rows to insert per model.
+    """
+    plan = _plan
+    rng = random.Random(f'{plan["random_seed"]}:{table}:{ids.start}')
+    # Datetimes are stored as naive UTC strings
+    now = plan['now'].astimezone(dt_timezone.utc).replace(tzinfo=None)
+    span = plan['days'] * 86400
+
+    def timestamp():
+        return str(now - timedelta(seconds=rng.randrange(span)))
+
+    if table == 'users':
+        joined = str(now)
+        # Half of the users subscribe to one to three categories
+        category_ids = sorted(plan['categories'].values())
+        subscriptions = []
+        if category_ids:
+            for pk in ids:
+                if rng.random() < 0.5:
+                    subscriptions.extend((pk, category) for category in rng.sample(category_ids, rng.randint(1, 3)))
+        return table, {
+            'users': [(pk, f'user{pk}', f'user{pk}@example.com', plan['password'], '', '',
+                       False, False, True, joined) for pk in ids],
+            'profiles': [(pk, False) for pk in ids],
+            'subscriptions': subscriptions,
+        }
+
+    if table == 'adverts':
+        user_pool, choices, categories = plan['user_pool'], plan['choices'], plan['categories']
+        rows = [
+            (pk, rng.choice(user_pool), sentence(rng, 3), sentence(rng, 30),
+             rng.choice(choices), '', '', '', 0, 0, 0, timestamp())
+            for pk in ids
+        ]
+        return table, {
+            'adverts': rows,
+            'categories': [(row[0], categories[row[4]]) for row in rows] if categories else [],
+        }
+
+    user_pool, advert_pool = plan['user_pool'], plan['advert_pool']
+    rows = []
+    for pk in ids:
+        user_id = rng.choice(user_pool)
+        rows.append((pk, rng.choice(advert_pool), user_id, user_id,
+                     sentence(rng, 12), timestamp(), False, 0, 0))
+    return table, {'responses': rows}
+
+
+def generate_job(job):
+    return generate(*job)
+
+
+def init_worker(plan):
+    global _plan
+    _plan = plan
+
+
+def write(table, rows):
+    """
+    Insert the rows generated for one partition in one transaction.
+
+    Args:
+        table (str): The table the rows were generated for.
+        rows (dict): The rows per model, as returned by ``generate``.
+
+    Returns:
+        int: The number of rows of ``table`` inserted.
+    """
+    with transaction.atomic():
+        if table == 'users':
+            insert_rows(User, USER_FIELDS, rows['users'])
+            insert_rows(Profile, PROFILE_FIELDS, rows['profiles'])
+            if rows['subscriptions']:
+                insert_rows(Subscription, SUBSCRIPTION_FIELDS, rows['subscriptions'])
+        elif table == 'adverts':
+            insert_rows(Advert, ADVERT_FIELDS, rows['adverts'])
+            if rows['categories']:
+                insert_rows(Category.adverts.through, ADVERT_CATEGORY_FIELDS, rows['categories'])
+            get_search_backend().index(
+                [IndexedAdvert(row[0], row[2], row[3]) for row in rows['adverts']]
+            )
+        else:
+            insert_rows(Response, RESPONSE_FIELDS, rows['responses'])
+    return len(rows[table])
+
+
+def ensure_categories():
+    """
+    Create a Category row for every advert category choice.
+
+    Returns:
+        dict: Category id by advert category value.
+    """
+    labels = dict(Advert.CATEGORY_CHOICES)
+    Category.objects.bulk_create(
+        [Category(name=label, is_ad_category=True) for label in labels.values()],
+        ignore_conflicts=True,
+    )
+    ids = dict(Category.objects.filter(name__in=labels.values()).values_list('name', 'pk'))
+    return {value: ids[label] for value, label in labels.items()}
+
+
+def seed(users=1000, adverts=10000, responses=50000, batch_size=5000, random_seed=0, days=365,
+         workers=1, categories=True, defer_indexes=False, progress=None):
+    """
+    Append a synthetic dataset to the database using bulk inserts.
+
+    Tables are split into partitions of ``batch_size`` primary keys, seeded
+    in dependency order. Each partition is generated as plain tuples and
+    inserted with one ``executemany`` in its own transaction, so memory stays
+    bounded whatever the requested sizes. With several workers, partitions
+    are generated by a pool of processes while this process, the only
+    writer, inserts them; SQLite serializes writers anyway. Model signals
+    are muted, generated adverts are added to the search index, the advert
+    owner of the responses and the advert counters are computed once at the end and the cached advert pages are
+    invalidated.
+
+    Args:
+        users (int): Number of users (with profiles) to create.
+        adverts (int): Number of adverts to create.
+        responses (int): Number of responses to create.
+        batch_size (int): Rows per partition and INSERT batch.
+        random_seed (int): Seed of the random generators, for reproducible datasets.
+        days (int): Adverts and responses are spread over this many past days.
+        workers (int): Number of generating processes; 1 generates in process.
+        categories (bool): Whether to link every advert to the Category of its category
+            and subscribe half of the users to a few categories.
+        defer_indexes (bool): Whether to drop the secondary indexes of the adverts and
+            responses tables during the load and rebuild them afterwards (SQLite only).
+        progress (callable): Called with (table, rows) after each partition.
+
+    Returns:
+        dict: The primary key ranges of the created rows per model.
+    """
+    first_user, first_advert, first_response = next_pk(User), next_pk(Advert), next_pk(Response)
+    user_ids = range(first_user, first_user + users)
+    advert_ids = range(first_advert, first_advert + adverts)
+    response_ids = range(first_response, first_response + responses)
+    plan = {
+        'now': timezone.now(),
+        'password': make_password(SEED_PASSWORD),
+        'random_seed': random_seed,
+        'days': days,
+        # New rows reference the new users and adverts, or existing ones if none
+        'user_pool': user_ids or list(User.objects.values_list('pk', flat=True)),
+        'advert_pool': advert_ids or list(Advert.objects.values_list('pk', flat=True)),
+        'choices': [choice for choice, _ in Advert.CATEGORY_CHOICES],
+        'categories': ensure_categories() if categories else {},
+    }
+    if not plan['advert_pool']:
+        response_ids = range(first_response, first_response)
+    jobs = [
+        (table, part)
+        for table, ids in [('users', user_ids), ('adverts', advert_ids), ('responses', response_ids)]
+        for part in chunked(ids, batch_size)
+    ]
+
+    # Rebuilding indexes only pays off when adding many rows
+    indexed_models = [Advert, Category.adverts.through, Response] if defer_indexes else []
+
+    pool = None
+    if workers > 1:
+        # Forked workers must not inherit the open database connection
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(workers, init_worker, (plan,))
+        # Partitions come back in order, so tables stay in dependency order
+        partitions = pool.imap(generate_job, jobs)
+    else:
+        init_worker(plan)
+        partitions = map(generate_job, jobs)
+
+    try:
+        tune_connection()
+        with muted_signals(*MODEL_SIGNALS), deferred_indexes(*indexed_models):
+            for table, rows in partitions:
+                count = write(table, rows)
+                if progress:
+                    progress(table, count)
+            if response_ids:
+                # Response owners come from adverts possibly generated by other workers
+                fill_advert_owners(Response.objects.filter(pk__gte=response_ids.start, pk__lt=response_ids.stop))
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    if response_ids:
+        # Counters are computed once for the whole load, not per response
+        advert_pool = plan['advert_pool']
+        adverts = Advert.objects.all()
+        if isinstance(advert_pool, range):
+            adverts = adverts.filter(pk__gte=advert_pool.start, pk__lt=advert_pool.stop)
+        refresh_counters(adverts)
+
+    bump_adverts_generation()
+    return {'users': user_ids, 'adverts': advert_ids, 'responses': response_ids}
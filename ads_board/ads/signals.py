@@ -1,44 +1,152 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
 
-from ads.models import Response
+from ads import stats
+from ads.cache import bump_adverts_generation
+from ads.models import Advert, Response
+from ads.notifications import ACCEPTED, CREATED, notify_response
+from ads.search import get_search_backend
+from ads.thread import invalidate_threads
+from ads.uploads import release_files
 
 
 @receiver(post_save, sender=Response)
-def response_created(instance, created, **kwargs):
+def response_saved(instance, created, **kwargs):
     """
-    Signal receiver function for handling response creation.
+    Signal receiver function dispatching the state transitions of a saved
+    response, as told by its change tracking: counts a new response in its
+    advert's counters, invalidates the cached thread of the advert, and
+    queues in the outbox, within the transaction saving the response, the
+    emails to the advert owner of a new response and to the author of an
+    accepted one; their live events are published once it commits.
+
+    Saves changing no tracked field, such as those of likes and dislikes,
+    notify nobody.
 
     Args:
-        instance (Response): The created response instance.
+        instance (Response): The saved response instance.
         created (bool): Indicates if the response was created or modified.
         **kwargs: Additional keyword arguments.
     """
+    # Fixtures are saved with save_base(), which tracks nothing
+    changes = getattr(instance, 'saved_changes', set())
     if created:
-        send_mail(
-            subject='На ваше объявление откликнулись!',
-            message=f'{instance.advert.user.username}, вам отклик от {instance.user.username}! Вот он: "{instance.response_text}" ',
-            from_email=None,
-            recipient_list=[instance.advert.user.email],
-        )
-        return
+        stats.response_created(instance)
+    if created or changes:
+        invalidate_threads([instance.advert_id])
+
+    transitions = []
+    if created:
+        transitions.append(CREATED)
+    if instance.status and (created or 'status' in changes):
+        transitions.append(ACCEPTED)
+    if transitions:
+        notify_response(instance.pk, transitions)
 
 
-@receiver(post_save, sender=Response)
-def response_accept(instance, **kwargs):
+@receiver(post_save, sender=Advert)
+def advert_indexed(instance, **kwargs):
+    """
+    Signal receiver function keeping the search index in sync on advert save.
+
+    Args:
+        instance (Advert): The saved advert instance.
+        **kwargs: Additional keyword arguments.
+    """
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Advert)
+def advert_unindexed(instance, **kwargs):
+    """
+    Signal receiver function dropping a deleted advert from the search index.
+
+    Args:
+        instance (Advert): The deleted advert instance.
+        **kwargs: Additional keyword arguments.
+    """
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Advert)
+@receiver(post_delete, sender=Advert)
+def advert_changed(**kwargs):
+    """
+    Signal receiver function invalidating the cached advert pages.
+
+    Args:
+        **kwargs: Additional keyword arguments.
+    """
+    bump_adverts_generation()
+
+
+@receiver(post_delete, sender=Advert)
+def advert_files_released(instance, **kwargs):
+    """
+    Signal receiver function deleting the files of a deleted advert once no
+    other advert refers to them.
+
+    Args:
+        instance (Advert): The deleted advert instance.
+        **kwargs: Additional keyword arguments.
+    """
+    names = [instance.upload.name, instance.thumbnail.name]
+    transaction.on_commit(lambda: release_files(names))
+
+
+@receiver(post_save, sender=Advert)
+def advert_files_replaced(instance, update_fields=None, **kwargs):
+    """
+    Signal receiver function deleting the files an advert no longer refers
+    to after an update replaced them, once no other advert refers to them.
+
+    Args:
+        instance (Advert): The saved advert instance.
+        update_fields (frozenset): The saved fields, None for all of them.
+        **kwargs: Additional keyword arguments.
+    """
+    stored = getattr(instance, '_stored_files', {})
+    names = []
+    for field in Advert.FILE_FIELDS:
+        if field not in instance.__dict__ or (update_fields is not None and field not in update_fields):
+            continue
+        current = getattr(instance, field).name or ''
+        if stored.get(field) and stored[field] != current:
+            names.append(stored[field])
+        stored[field] = current
+    instance._stored_files = stored
+    if names:
+        transaction.on_commit(lambda: release_files(names))
+
+
+@receiver(post_delete, sender=Response)
+def response_uncounted(instance, **kwargs):
     """
-    Signal receiver function for handling response acceptance.
+    Signal receiver function taking a deleted response out of its advert's
+    counters.
+
+    Nothing is done when the response goes away with its advert.
 
     Args:
-        instance (Response): The response instance.
+        instance (Response): The deleted response instance.
+        origin (Model or QuerySet): What the deletion was started from.
         **kwargs: Additional keyword arguments.
     """
-    if instance.status:
-        send_mail(
-            subject='Ваш отклик приняли!',
-            message=f'{instance.author.username}, ваш отклик к {instance.advert.title} приняли',
-            from_email=None,
-            recipient_list=[instance.author.email],
-        )
+    origin = kwargs.get('origin')
+    if isinstance(origin, Advert) or getattr(origin, 'model', None) is Advert:
         return
+    stats.response_deleted(instance)
+
+
+@receiver(post_delete, sender=Response)
+def response_thread_changed(instance, **kwargs):
+    """
+    Signal receiver function dropping the cached first page of the responses
+    to the advert of a deleted response.
+
+    Args:
+        instance (Response): The deleted response instance.
+        **kwargs: Additional keyword arguments.
+    """
+    invalidate_threads([instance.advert_id])
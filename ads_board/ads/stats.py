@@ -0,0 +1,176 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .cache import invalidate_response_counts
+from .models import Advert, Response
+
+# Counter columns of Advert and the aggregate over its responses they cache
+COUNTERS = {
+    'response_count': Count('id'),
+    'accepted_count': Count('id', filter=Q(status=True)),
+    'likes_total': Sum('likes'),
+    'last_response_at': Max('created_at'),
+}
+
+
+def response_counts_changed(advert_ids):
+    """
+    Drop the cached response counts of adverts, shown on the advert list
+    pages, once the current transaction commits.
+
+    The list pages themselves stay cached: the other counters are not shown
+    there, and the popularity order is refreshed by expiry.
+
+    Args:
+        advert_ids (iterable[int]): The adverts whose response count changed.
+    """
+    advert_ids = set(advert_ids)
+    transaction.on_commit(lambda: invalidate_response_counts(advert_ids))
+
+
+def response_created(response):
+    """
+    Count a new response in the counters of its advert.
+
+    Args:
+        response (Response): The saved response.
+    """
+    created_at = Value(response.created_at)
+    Advert.objects.filter(pk=response.advert_id).update(
+        response_count=F('response_count') + 1,
+        last_response_at=Greatest(Coalesce('last_response_at', created_at), created_at),
+    )
+    response_counts_changed([response.advert_id])
+
+
+def response_accepted(advert_id):
+    """
+    Count a newly accepted response in the counters of its advert.
+
+    Args:
+        advert_id (int): The advert of the response.
+    """
+    Advert.objects.filter(pk=advert_id).update(accepted_count=F('accepted_count') + 1)
+
+
+def response_unaccepted(advert_id):
+    """
+    Take back the acceptance of a response from the counters of its advert.
+
+    The counter never goes below zero, even if it had drifted.
+
+    Args:
+        advert_id (int): The advert of the response.
+    """
+    Advert.objects.filter(pk=advert_id).update(accepted_count=Greatest(F('accepted_count') - 1, 0))
+
+
+def response_deleted(response):
+    """
+    Take a deleted response out of the counters of its advert.
+
+    The latest response date is looked up again through the
+    (advert, created_at) index; the counters never go below zero, even if
+    they had drifted.
+
+    Args:
+        response (Response): The deleted response.
+    """
+    latest = Response.objects.filter(advert=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    Advert.objects.filter(pk=response.advert_id).update(
+        response_count=Greatest(F('response_count') - 1, 0),
+        accepted_count=Greatest(F('accepted_count') - int(response.status), 0),
+        likes_total=Greatest(F('likes_total') - response.likes, 0),
+        last_response_at=Subquery(latest),
+    )
+    response_counts_changed([response.advert_id])
+
+
+def response_liked(response_id):
+    """
+    Add a new like of a response to the counters of its advert.
+
+    Args:
+        response_id (int): The liked response.
+    """
+    Advert.objects.filter(response__pk=response_id).update(likes_total=F('likes_total') + 1)
+
+
+def responses_liked(likes):
+    """
+    Add new likes of responses to the counters of their adverts.
+
+    Args:
+        likes (dict): Number of new likes by advert id.
+    """
+    for advert_id, count in likes.items():
+        Advert.objects.filter(pk=advert_id).update(likes_total=F('likes_total') + count)
+
+
+def refresh_counters(queryset):
+    """
+    Recompute the counters of the given adverts with one UPDATE statement.
+
+    Args:
+        queryset (QuerySet): The adverts to refresh.
+
+    Returns:
+        int: The number of adverts updated.
+    """
+    updates = {}
+    for field, aggregate in COUNTERS.items():
+        subquery = Subquery(
+            Response.objects.filter(advert=OuterRef('pk')).order_by()
+            .values('advert').annotate(value=aggregate).values('value')
+        )
+        updates[field] = subquery if field == 'last_response_at' else Coalesce(
+            subquery, 0, output_field=IntegerField()
+        )
+    return queryset.update(**updates)
+
+
+def reconcile_counters(batch_size=1000, fix=True):
+    """
+    Compare the counters of every advert with its responses and repair drift.
+
+    Adverts are walked in primary key order, one batch at a time: the
+    responses of a batch are aggregated in one grouped query and the adverts
+    whose counters differ are rewritten with ``bulk_update``.
+
+    Args:
+        batch_size (int): Adverts per batch.
+        fix (bool): Whether to write the corrected values, or only count.
+
+    Returns:
+        int: The number of adverts whose counters had drifted.
+    """
+    drifted = 0
+    last_pk = 0
+    fields = list(COUNTERS)
+    while True:
+        adverts = list(
+            Advert.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', *fields)[:batch_size]
+        )
+        if not adverts:
+            return drifted
+        last_pk = adverts[-1].pk
+
+        actual = {
+            row.pop('advert'): row
+            for row in Response.objects.filter(advert__in=adverts).order_by()
+            .values('advert').annotate(**COUNTERS)
+        }
+        stale = []
+        for advert in adverts:
+            values = actual.get(advert.pk, {})
+            expected = {field: values.get(field) or (None if field == 'last_response_at' else 0)
+                        for field in fields}
+            if any(getattr(advert, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(advert, field, value)
+                stale.append(advert)
+        drifted += len(stale)
+        if fix and stale:
+            Advert.objects.bulk_update(stale, fields, batch_size=batch_size)
+            response_counts_changed(advert.pk for advert in stale)
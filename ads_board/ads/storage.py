@@ -0,0 +1,71 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Directory of the content-addressed files, relative to the storage root
+BLOB_DIR = 'blobs'
+# Directory of the uploads stored before content addressing
+LEGACY_UPLOAD_DIR = 'uploads'
+
+
+def hash_content(content):
+    """
+    Return the SHA-256 hex digest of a file, reading it chunk by chunk.
+
+    Args:
+        content (File): The file; it is rewound afterwards.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(digest, extension=''):
+    """
+    Return the storage name of the file whose content hashes to ``digest``.
+
+    Names are fanned out over two directory levels to keep directories small.
+    """
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming files after the SHA-256 of their content.
+
+    Saving content that is already stored writes nothing and returns the
+    existing name, so identical uploads are kept once. Uploads streamed by
+    ``HashingFileUploadHandler`` carry their digest and are moved into place
+    without being read again. The original extension is kept so the content
+    type can still be guessed from the name.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = getattr(content, 'sha256', None) or hash_content(content)
+        name = blob_name(digest, os.path.splitext(name)[1])
+        if self.exists(name):
+            return name
+        return self._save(name, content)
+
+    def is_blob(self, name):
+        return name.startswith(f'{BLOB_DIR}/')
+
+    def is_stored(self, name):
+        """
+        Whether ``name`` is a stored upload or thumbnail, rather than another
+        file of the storage root such as an upload in progress.
+        """
+        return self.is_blob(name) or name.startswith(f'{LEGACY_UPLOAD_DIR}/')
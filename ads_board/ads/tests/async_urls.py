@@ -0,0 +1,27 @@
+"""
+URL configuration of ``ASYNC_VIEWS`` processes, for testing the async views
+under the sync test runner.
+"""
+from django.urls import include, path
+
+from ads import urls as ads_urls
+from ads.async_views import (
+    AsyncAdvertDetailView,
+    AsyncAdvertListView,
+    AsyncPrivatePageView,
+    AsyncResponseDetailView,
+)
+
+# Resolved before the sync views of the same names
+async_patterns = [
+    path('', AsyncAdvertListView.as_view(), name='advert-list'),
+    path('advert/<int:pk>/', AsyncAdvertDetailView.as_view(), name='advert-detail'),
+    path('response/<int:pk>/', AsyncResponseDetailView.as_view(), name='response-detail'),
+    path('private/', AsyncPrivatePageView.as_view(), name='private'),
+]
+
+urlpatterns = [
+    path('', AsyncAdvertListView.as_view(), name='advert-list'),
+    path('users/', include('users.urls')),
+    path('ads/', include((async_patterns + ads_urls.urlpatterns, ads_urls.app_name))),
+]
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+
+from ads.models import Advert, Response
+
+
+class BoardTestCase(TestCase):
+    """
+    Test case with an advert owner, a user who responded to their advert,
+    and empty caches.
+
+    Run with ``ads_board.test_settings``, so views exceeding their
+    ``query_budget`` raise ``QueryBudgetExceeded``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.responder = User.objects.create_user('responder', 'responder@example.com', 'password')
+        cls.advert = Advert.objects.create(user=cls.owner, title='Продам меч', content='Острый меч')
+        cls.response = cls.respond(cls.advert, cls.responder, 'Беру меч')
+
+    @staticmethod
+    def respond(advert, user, text):
+        """
+        Create a response of ``user`` to ``advert``.
+        """
+        return Response.objects.create(advert=advert, user=user, author=user, response_text=text)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
@@ -0,0 +1,60 @@
+import redis
+
+
+class FakeLock:
+    """
+    Non-expiring stand-in for ``redis.lock.Lock``.
+    """
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def acquire(self, blocking=True):
+        if self.name in self.client.locks:
+            return False
+        self.client.locks.add(self.name)
+        return True
+
+    def release(self):
+        self.client.locks.discard(self.name)
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the few Redis commands the buffers use.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.locks = set()
+
+    def sadd(self, key, *members):
+        members = {str(member).encode() for member in members}
+        values = self.data.setdefault(key, set())
+        added = members - values
+        values |= added
+        return len(added)
+
+    def rpush(self, key, *values):
+        items = self.data.setdefault(key, [])
+        items.extend(value.encode() if isinstance(value, str) else value for value in values)
+        return len(items)
+
+    def lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def rename(self, source, destination):
+        if source not in self.data:
+            raise redis.ResponseError('no such key')
+        self.data[destination] = self.data.pop(source)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def lock(self, name, timeout=None):
+        return FakeLock(self, name)
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.test import AsyncClient, override_settings
+from django.urls import resolve, reverse
+
+from ads.async_views import AsyncPrivatePageView
+from .base import BoardTestCase
+
+
+@override_settings(ROOT_URLCONF='ads.tests.async_urls')
+class AsyncViewsTests(BoardTestCase):
+    """
+    The async views render the same pages as the sync ones, within their
+    query budget.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.async_client.force_login(self.owner)
+
+    def test_urlconf(self):
+        self.assertIs(resolve(reverse('ads:private')).func.view_class, AsyncPrivatePageView)
+
+    async def test_advert_list(self):
+        response = await self.async_client.get(reverse('ads:advert-list'))
+        self.assertContains(response, self.advert.title)
+        self.assertContains(response, '(1 откл.)')
+
+    async def test_advert_list_cached(self):
+        await self.async_client.get(reverse('ads:advert-list'))
+        response = await self.async_client.get(reverse('ads:advert-list'), {'sort': 'popular'})
+        self.assertContains(response, self.advert.title)
+        response = await self.async_client.get(reverse('ads:advert-list'))
+        self.assertContains(response, '(1 откл.)')
+
+    async def test_advert_list_invalid_page(self):
+        response = await self.async_client.get(reverse('ads:advert-list'), {'page': 2})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_advert_detail(self):
+        response = await self.async_client.get(reverse('ads:advert-detail', kwargs={'pk': self.advert.pk}))
+        self.assertContains(response, self.advert.content)
+        self.assertContains(response, self.response.response_text)
+
+    async def test_advert_detail_missing(self):
+        response = await self.async_client.get(reverse('ads:advert-detail', kwargs={'pk': self.advert.pk + 1}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_response_detail(self):
+        response = await self.async_client.get(reverse('ads:response-detail', kwargs={'pk': self.response.pk}))
+        self.assertContains(response, self.response.response_text)
+
+    async def test_private_page(self):
+        response = await self.async_client.get(reverse('ads:private'))
+        self.assertContains(response, self.advert.title)
+        self.assertContains(response, self.response.response_text)
+
+    async def test_private_page_invalid_cursor(self):
+        response = await self.async_client.get(reverse('ads:private'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_private_page_become_author(self):
+        response = await self.async_client.post(reverse('ads:private'))
+        self.assertRedirects(response, reverse('ads:private'), fetch_redirect_response=False)
+        self.assertTrue(await self.owner.groups.filter(name='authors').aexists())
+
+    async def test_login_required(self):
+        response = await AsyncClient().get(reverse('ads:private'))
+        self.assertRedirects(response, f"{settings.LOGIN_URL}?next={reverse('ads:private')}",
+                             fetch_redirect_response=False)
@@ -0,0 +1,19 @@
+from django.http import QueryDict
+from django.test import SimpleTestCase
+
+from ads.cache import advert_page_cache_key
+
+
+class AdvertPageCacheKeyTests(SimpleTestCase):
+
+    def key(self, query):
+        return advert_page_cache_key(QueryDict(query), generation=1)
+
+    def test_parameter_order_ignored(self):
+        self.assertEqual(self.key('sort=new&add_title=меч'), self.key('add_title=меч&sort=new'))
+
+    def test_escaped_separators_are_values(self):
+        self.assertNotEqual(self.key('add_title=x%26sort%3Dpopular'), self.key('add_title=x&sort=popular'))
+
+    def test_repeated_parameters(self):
+        self.assertNotEqual(self.key('add_title=a&add_title=b'), self.key('add_title=a%2Cb'))
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ads_board import settings
+from ads import events
+from ads.async_views import ResponseEventsView
+from ads.events import LocalBroker, publish
+from .base import BoardTestCase
+
+
+def decode(payload):
+    event, data = payload.splitlines()[:2]
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """
+    Events reach the subscriptions of their user until they unsubscribe.
+    """
+
+    def setUp(self):
+        self.broker = LocalBroker()
+
+    async def test_publish(self):
+        first = self.broker.subscribe(1)
+        second = self.broker.subscribe(1)
+        other = self.broker.subscribe(2)
+        self.broker.publish([(1, 'one'), (1, 'two')])
+        for subscription in (first, second):
+            self.assertEqual(await subscription.get(1), 'one')
+            self.assertEqual(await subscription.get(1), 'two')
+        self.assertIsNone(await other.get(0.01))
+
+    async def test_publish_from_thread(self):
+        subscription = self.broker.subscribe(1)
+        thread = threading.Thread(target=self.broker.publish, args=([(1, 'one')],))
+        thread.start()
+        self.assertEqual(await subscription.get(1), 'one')
+        thread.join()
+
+    async def test_unsubscribe(self):
+        first = self.broker.subscribe(1)
+        second = self.broker.subscribe(1)
+        self.broker.unsubscribe(first)
+        self.broker.publish([(1, 'one')])
+        self.assertEqual(await second.get(1), 'one')
+        self.assertIsNone(await first.get(0.01))
+        self.broker.unsubscribe(second)
+        self.broker.unsubscribe(second)
+        self.assertEqual(dict(self.broker.subscriptions), {})
+
+    async def test_slow_client_loses_events(self):
+        subscription = self.broker.subscribe(1)
+        self.broker.publish([(1, str(n)) for n in range(settings.ADS_EVENTS_QUEUE_SIZE + 5)])
+        # Deliveries are scheduled on the loop
+        await asyncio.sleep(0)
+        self.assertEqual(subscription.queue.qsize(), settings.ADS_EVENTS_QUEUE_SIZE)
+        self.assertEqual(await subscription.get(1), '0')
+
+    async def test_get_stops_on_disconnect(self):
+        subscription = self.broker.subscribe(1)
+        disconnected = asyncio.Event()
+        disconnected.set()
+        self.assertIsNone(await subscription.get(60, disconnected))
+
+    async def test_stream(self):
+        broker = LocalBroker()
+        with mock.patch('ads.async_views.get_broker', return_value=broker):
+            stream = ResponseEventsView().stream(1)
+            self.assertEqual(await stream.__anext__(), f'retry: {settings.ADS_EVENTS_RETRY}\n\n')
+            self.assertEqual(len(broker.subscriptions[1]), 1)
+            broker.publish([(1, 'event: response\ndata: {}\n\n')])
+            self.assertEqual(await stream.__anext__(), 'event: response\ndata: {}\n\n')
+            await stream.aclose()
+        self.assertEqual(dict(broker.subscriptions), {})
+
+
+class PublishTests(BoardTestCase):
+    """
+    Response changes are published to the connected clients of their parties.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.broker = mock.Mock()
+        patcher = mock.patch.object(events, 'get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return [(user_id, *decode(payload))
+                for call in self.broker.publish.call_args_list for user_id, payload in call.args[0]]
+
+    def test_encoding(self):
+        publish([(self.owner.pk, 'response', {'text': 'Беру меч'})])
+        self.assertEqual(self.broker.publish.call_args.args[0],
+                         [(self.owner.pk, 'event: response\ndata: {"text": "Беру меч"}\n\n')])
+
+    def test_nothing_to_publish(self):
+        publish([])
+        self.broker.publish.assert_not_called()
+
+    def test_broker_errors_ignored(self):
+        self.broker.publish.side_effect = ConnectionError
+        with self.assertLogs('ads.events', 'WARNING'):
+            publish([(self.owner.pk, 'response', {})])
+
+    def test_response_created(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.respond(self.advert, self.responder, 'И щит тоже')
+        (user_id, event, data), = self.published()
+        self.assertEqual((user_id, event), (self.owner.pk, 'response'))
+        self.assertEqual(data['id'], response.pk)
+        self.assertEqual(data['advert_title'], self.advert.title)
+        self.assertEqual(data['user'], self.responder.username)
+
+    def test_published_on_commit_only(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.respond(self.advert, self.responder, 'И щит тоже')
+        self.broker.publish.assert_not_called()
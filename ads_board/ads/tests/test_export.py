@@ -0,0 +1,117 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from ads.export import export
+from ads.models import Advert
+from .base import BoardTestCase
+
+
+class ExportTests(BoardTestCase):
+    """
+    Exports stream every row in primary key order, filtered like the advert list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.shield = Advert.objects.create(user=cls.owner, title='Продам щит', content='Крепкий щит')
+        cls.respond(cls.shield, cls.responder, 'Беру щит')
+
+    def test_csv(self):
+        content = b''.join(export('adverts', 'csv', chunk_size=1)).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row['title'] for row in rows], ['Продам меч', 'Продам щит'])
+        self.assertEqual(rows[0]['id'], str(self.advert.pk))
+        self.assertEqual(rows[0]['response_count'], '1')
+
+    def test_jsonl(self):
+        content = b''.join(export('responses', 'jsonl', chunk_size=1)).decode()
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['response_text'] for row in rows], ['Беру меч', 'Беру щит'])
+        self.assertEqual(rows[0]['advert_id'], self.advert.pk)
+        self.assertEqual(rows[0]['created_at'], self.response.created_at.isoformat())
+
+    def test_gzip(self):
+        plain = b''.join(export('adverts', 'jsonl'))
+        self.assertEqual(gzip.decompress(b''.join(export('adverts', 'jsonl', compress=True))), plain)
+
+
+class ExportViewTests(BoardTestCase):
+    """
+    The export view streams files to staff only.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.owner.is_staff = True
+        self.owner.save(update_fields=['is_staff'])
+
+    def get(self, user, kind='adverts', **params):
+        self.client.force_login(user)
+        return self.client.get(reverse('ads:export', kwargs={'kind': kind}), params)
+
+    def test_staff_only(self):
+        self.assertEqual(self.get(self.responder).status_code, 403)
+        self.client.logout()
+        response = self.client.get(reverse('ads:export', kwargs={'kind': 'adverts'}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_csv_streamed(self):
+        response = self.get(self.owner)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="adverts-\d{8}\.csv"$')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'user_id', 'title'])
+        self.assertEqual(rows[1][:3], [str(self.advert.pk), str(self.owner.pk), 'Продам меч'])
+        self.assertEqual(len(rows), 2)
+
+    def test_jsonl_gzip(self):
+        response = self.get(self.owner, 'responses', format='jsonl', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.jsonl.gz"', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [self.response.pk])
+
+    def test_filtered(self):
+        Advert.objects.create(user=self.owner, title='Продам щит', content='Крепкий щит')
+        response = self.get(self.owner, 'responses', format='jsonl', add_title='щит')
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        response = self.get(self.owner, format='jsonl', add_title='щит')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Продам щит'])
+
+    def test_unknown_export(self):
+        self.assertEqual(self.get(self.owner, 'users').status_code, 404)
+        self.assertEqual(self.get(self.owner, format='xml').status_code, 404)
+
+
+class ExportCommandTests(BoardTestCase):
+    """
+    ``export_board`` writes the same stream to a file.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'export')
+
+    def test_export(self):
+        call_command('export_board', 'responses', '--format', 'jsonl', '--gzip', '--chunk-size', '1',
+                     '--output', self.path)
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual([row['response_text'] for row in rows], ['Беру меч'])
+
+    def test_filter(self):
+        call_command('export_board', 'adverts', '--filter', 'add_title=щит', '--output', self.path)
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(len(list(csv.reader(file))), 1)
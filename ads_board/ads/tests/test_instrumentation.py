@@ -0,0 +1,52 @@
+from unittest import mock
+
+import redis
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ads_board import instrumentation
+from .base import BoardTestCase
+
+
+class FlushTests(SimpleTestCase):
+
+    @override_settings(PROFILING_FLUSH_EVERY=2, PROFILING_REDIS_URL='redis://profiling')
+    def test_redis_outage_does_not_fail_the_request(self):
+        client = mock.Mock()
+        client.pipeline.return_value.execute.side_effect = redis.ConnectionError('down')
+        ring = instrumentation.RingBuffer(10)
+        with mock.patch.object(instrumentation, 'get_redis', return_value=client), \
+                self.assertLogs('ads_board.instrumentation', 'WARNING'):
+            ring.append({'view': 'a'})
+            ring.append({'view': 'b'})
+        self.assertEqual(ring.pending, [])
+
+    def test_sql_fingerprint(self):
+        self.assertEqual(
+            instrumentation.sql_fingerprint('SELECT *\n  FROM t WHERE id IN (%s, %s,%s)'),
+            'SELECT * FROM t WHERE id IN (%s, ...)',
+        )
+        self.assertEqual(len(instrumentation.sql_fingerprint('SELECT ' + 'x' * 500)),
+                         instrumentation.SQL_FINGERPRINT_LENGTH)
+
+
+class MiddlewareTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.responder)
+        instrumentation.buffer.clear()
+        self.addCleanup(instrumentation.buffer.clear)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_REDIS_URL=None, PROFILING_LOCAL_BUFFER=False)
+    def test_no_destination_no_samples(self):
+        self.client.get(reverse('ads:advert-list'))
+        self.assertEqual(instrumentation.buffer.snapshot(), [])
+        self.assertEqual(instrumentation.buffer.pending, [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_REDIS_URL=None, PROFILING_LOCAL_BUFFER=True)
+    def test_local_buffer(self):
+        self.client.get(reverse('ads:advert-list'))
+        [sample] = instrumentation.buffer.snapshot()
+        self.assertEqual(sample['view'], 'ads:advert-list')
+        self.assertEqual(sum(sample['sql'].values()), sample['db_count'])
@@ -0,0 +1,40 @@
+from django.db import transaction
+
+from ads.cache import get_adverts_generation
+from ads.models import Advert, Response, ResponseVote
+from ads.moderation import delete_adverts, delete_responses
+from .base import BoardTestCase
+
+
+class BulkDeleteTests(BoardTestCase):
+    """
+    Bulk deletes remove the dependent rows and do the receivers' work once.
+    """
+
+    def setUp(self):
+        super().setUp()
+        ResponseVote.objects.create(response=self.response, user=self.owner, value=ResponseVote.LIKE)
+
+    def test_delete_responses(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(delete_responses(Response.objects.filter(pk=self.response.pk)), 1)
+        self.assertFalse(Response.objects.exists())
+        self.assertFalse(ResponseVote.objects.exists())
+        self.assertEqual(Advert.objects.get(pk=self.advert.pk).response_count, 0)
+
+    def test_delete_adverts(self):
+        generation = get_adverts_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(delete_adverts(Advert.objects.filter(pk=self.advert.pk)), 1)
+        self.assertFalse(Advert.objects.exists())
+        self.assertFalse(Response.objects.exists())
+        self.assertEqual(get_adverts_generation(), generation + 1)
+
+    def test_rolled_back_delete_keeps_the_generation(self):
+        generation = get_adverts_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                delete_adverts(Advert.objects.filter(pk=self.advert.pk))
+                transaction.set_rollback(True)
+        self.assertTrue(Advert.objects.exists())
+        self.assertEqual(get_adverts_generation(), generation)
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from ads_board import settings
+from ads.models import OutgoingEmail
+from ads.outbox import claim_batch, deliver_batch, mark_sent
+
+
+def failing_send(self, fail_silently=False):
+    raise OSError('connection refused')
+
+
+class OutboxTests(TestCase):
+    """
+    Emails are delivered once, retried with backoff and given up on.
+    """
+
+    def setUp(self):
+        self.email = OutgoingEmail.objects.create(
+            subject='Новый отклик', body='Беру меч', recipients=['owner@example.com'],
+        )
+
+    def refresh(self):
+        self.email.refresh_from_db()
+        return self.email
+
+    def make_due(self):
+        OutgoingEmail.objects.filter(pk=self.email.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1),
+        )
+
+    def test_deliver(self):
+        self.assertEqual(deliver_batch(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['owner@example.com'])
+        email = self.refresh()
+        self.assertEqual(email.status, OutgoingEmail.SENT)
+        self.assertEqual(email.claimed_by, '')
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(deliver_batch(), 0)
+
+    def test_claimed_email_not_claimed_again(self):
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
+
+    def test_expired_lease_reclaimed(self):
+        first, = claim_batch(10)
+        self.make_due()
+        second, = claim_batch(10)
+        self.assertNotEqual(first.claimed_by, second.claimed_by)
+        self.assertEqual(self.refresh().status, OutgoingEmail.SENDING)
+
+    def test_stale_worker_does_not_mark_reclaimed_email(self):
+        stale, = claim_batch(10)
+        self.make_due()
+        current, = claim_batch(10)
+        mark_sent(stale.claimed_by, [stale.pk])
+        email = self.refresh()
+        self.assertEqual(email.status, OutgoingEmail.SENDING)
+        self.assertEqual(email.claimed_by, current.claimed_by)
+        mark_sent(current.claimed_by, [current.pk])
+        self.assertEqual(self.refresh().status, OutgoingEmail.SENT)
+
+    @mock.patch('django.core.mail.EmailMultiAlternatives.send', failing_send)
+    def test_retry_backoff(self):
+        for attempt in range(1, 3):
+            before = timezone.now()
+            self.assertEqual(deliver_batch(), 1)
+            email = self.refresh()
+            self.assertEqual(email.status, OutgoingEmail.PENDING)
+            self.assertEqual(email.attempts, attempt)
+            self.assertIn('connection refused', email.last_error)
+            delay = timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempt - 1))
+            self.assertGreaterEqual(email.next_attempt_at, before + delay)
+            self.assertLessEqual(email.next_attempt_at, timezone.now() + delay)
+            # Not due until the backoff has passed.
+            self.assertEqual(deliver_batch(), 0)
+            self.make_due()
+        self.assertEqual(len(mail.outbox), 0)
+
+    @mock.patch('django.core.mail.EmailMultiAlternatives.send', failing_send)
+    def test_dead_after_max_attempts(self):
+        with self.assertLogs('ads.outbox', 'ERROR'):
+            for _ in range(settings.OUTBOX_MAX_ATTEMPTS):
+                self.assertEqual(self.refresh().status, OutgoingEmail.PENDING)
+                self.make_due()
+                self.assertEqual(deliver_batch(), 1)
+        email = self.refresh()
+        self.assertEqual(email.status, OutgoingEmail.DEAD)
+        self.assertEqual(email.attempts, settings.OUTBOX_MAX_ATTEMPTS)
+        self.make_due()
+        self.assertEqual(deliver_batch(), 0)
+
+    def test_failure_in_batch_does_not_block_the_rest(self):
+        other = OutgoingEmail.objects.create(
+            subject='Отклик принят', body='Беру меч', recipients=['responder@example.com'],
+        )
+        real_send = mail.EmailMultiAlternatives.send
+
+        def send(message, fail_silently=False):
+            if message.subject == self.email.subject:
+                raise OSError('mailbox unavailable')
+            return real_send(message, fail_silently)
+
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', send):
+            self.assertEqual(deliver_batch(), 2)
+        self.assertEqual(self.refresh().status, OutgoingEmail.PENDING)
+        other.refresh_from_db()
+        self.assertEqual(other.status, OutgoingEmail.SENT)
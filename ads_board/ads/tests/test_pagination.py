@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+from django.test import RequestFactory, SimpleTestCase
+from django.urls import reverse
+
+from ads.pagination import MAX_PK, InvalidCursor, decode_cursor, encode_cursor
+from ads.views import AdvertListView
+from .base import BoardTestCase
+
+MOMENT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(MOMENT, 7, 'next')), (MOMENT, 7, 'next'))
+
+    def test_out_of_range_pk(self):
+        for pk in [MAX_PK + 1, -MAX_PK - 2, 10 ** 30, True]:
+            with self.subTest(pk=pk), self.assertRaises(InvalidCursor):
+                decode_cursor(encode_cursor(MOMENT, pk, 'next'))
+
+    def test_searches_use_numbered_pages(self):
+        view = AdvertListView(cursor_pagination=True)
+        for query, expected in [({}, True), ({'add_title': 'меч'}, False), ({'sort': 'popular'}, False)]:
+            with self.subTest(query=query):
+                view.request = RequestFactory().get('/', query)
+                self.assertIs(view.uses_cursor(), expected)
+
+
+class CursorViewTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+        self.cursor = encode_cursor(MOMENT, 10 ** 30, 'next')
+
+    def test_advert_responses(self):
+        response = self.client.get(reverse('ads:advert-responses', kwargs={'pk': self.advert.pk}),
+                                   {'cursor': self.cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_private_page(self):
+        response = self.client.get(reverse('ads:private'), {'cursor': self.cursor})
+        self.assertEqual(response.status_code, 404)
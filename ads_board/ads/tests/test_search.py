@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+
+from ads.models import Advert
+from ads.search import LikeSearchBackend, SQLiteFTS5Backend
+from .base import BoardTestCase
+
+
+class MatchExpressionTests(SimpleTestCase):
+
+    def test_prefix_terms(self):
+        self.assertEqual(SQLiteFTS5Backend().build_match('остр меч'), '"остр"* "меч"*')
+
+    def test_operators_and_quotes_are_words(self):
+        self.assertEqual(SQLiteFTS5Backend().build_match('меч" OR title:щит NEAR(a*'),
+                         '"меч"* "OR"* "title"* "щит"* "NEAR"* "a"*')
+
+    def test_no_words(self):
+        self.assertEqual(SQLiteFTS5Backend().build_match('"*()'), '')
+
+
+class SQLiteFTS5BackendTests(BoardTestCase):
+    """
+    The FTS5 index follows the adverts and ranks title matches first.
+    """
+
+    backend = SQLiteFTS5Backend()
+
+    def create(self, title, content):
+        return Advert.objects.create(user=self.owner, title=title, content=content)
+
+    def search(self, query):
+        return list(self.backend.search(Advert.objects.all(), query).values_list('title', flat=True))
+
+    def test_title_matches_rank_first(self):
+        self.create('Продам щит', 'Подойдёт к любому мечу')
+        self.create('Продам шлем', 'Без щита')
+        self.assertEqual(self.search('щит'), ['Продам щит', 'Продам шлем'])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('остр'), ['Продам меч'])
+
+    def test_operators_in_user_input(self):
+        for query in ['меч" OR "шлем', 'NEAR(меч', 'title:меч', 'меч AND NOT']:
+            with self.subTest(query=query):
+                self.search(query)
+        self.assertEqual(self.search('меч AND'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        advert = self.create('Продам лук', 'Тугой')
+        self.assertEqual(self.search('лук'), ['Продам лук'])
+        advert.title = 'Продам арбалет'
+        advert.save()
+        self.assertEqual(self.search('лук'), [])
+        self.assertEqual(self.search('арбалет'), ['Продам арбалет'])
+        advert.delete()
+        self.assertEqual(self.search('арбалет'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.backend.table}')
+        self.assertEqual(self.search('меч'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', batch_size=1, stdout=out)
+        self.assertIn('Indexed 1 adverts.', out.getvalue())
+        self.assertEqual(self.search('меч'), ['Продам меч'])
+
+
+class LikeSearchBackendTests(BoardTestCase):
+
+    def test_every_word_must_match(self):
+        search = LikeSearchBackend().search
+        self.assertEqual(list(search(Advert.objects.all(), 'меч Острый')), [self.advert])
+        self.assertEqual(list(search(Advert.objects.all(), 'меч Тупой')), [])
@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+
+from ads.models import Advert, Category, Response
+from ads.search import get_search_backend
+from ads.seeding import generate, init_worker, seed
+from users.models import Profile, Subscription
+from .base import BoardTestCase
+
+
+class SeedingTests(BoardTestCase):
+    """
+    Seeding appends the requested rows, consistent with the rest of the board.
+    """
+
+    def seed(self, **kwargs):
+        return seed(**{'users': 5, 'adverts': 7, 'responses': 11, 'batch_size': 3, **kwargs})
+
+    def test_row_counts(self):
+        created = self.seed()
+        self.assertEqual({table: len(ids) for table, ids in created.items()},
+                         {'users': 5, 'adverts': 7, 'responses': 11})
+        self.assertEqual(User.objects.count(), 2 + 5)
+        self.assertEqual(Profile.objects.filter(user__in=created['users']).count(), 5)
+        self.assertEqual(Advert.objects.count(), 1 + 7)
+        self.assertEqual(Response.objects.count(), 1 + 11)
+        self.assertEqual(Category.objects.filter(is_ad_category=True).count(), len(Advert.CATEGORY_CHOICES))
+        self.assertEqual(Category.adverts.through.objects.count(), 7)
+        self.assertTrue(set(Subscription.objects.values_list('user_id', flat=True)) <= set(created['users']))
+
+    def test_rows_appended(self):
+        created = self.seed()
+        self.assertEqual(created['adverts'].start, self.advert.pk + 1)
+        self.assertEqual(created['responses'].start, self.response.pk + 1)
+        adverts = Advert.objects.filter(pk__in=created['adverts'])
+        self.assertEqual(set(adverts.values_list('user_id', flat=True)) - set(created['users']), set())
+        responses = Response.objects.filter(pk__in=created['responses'])
+        self.assertEqual(set(responses.values_list('advert_id', flat=True)) - set(created['adverts']), set())
+        # The response owner is denormalised from the advert
+        for response in responses.select_related('advert'):
+            self.assertEqual(response.advert_owner_id, response.advert.user_id)
+
+    def test_counters(self):
+        created = self.seed()
+        adverts = Advert.objects.filter(pk__in=created['adverts'])
+        self.assertEqual(adverts.aggregate(total=Sum('response_count'))['total'], 11)
+        for advert in adverts:
+            self.assertEqual(advert.response_count, Response.objects.filter(advert=advert).count())
+
+    def test_indexed(self):
+        created = self.seed(adverts=1, responses=0)
+        advert = Advert.objects.get(pk=created['adverts'].start)
+        word = advert.title.split()[-1]
+        found = get_search_backend().search(Advert.objects.all(), word)
+        self.assertIn(advert, found)
+
+    def test_only_users(self):
+        created = self.seed(adverts=0, responses=0)
+        self.assertEqual(len(created['users']), 5)
+        self.assertEqual(Advert.objects.count(), 1)
+
+    def test_responses_to_existing_adverts(self):
+        created = self.seed(users=0, adverts=0, responses=4)
+        self.assertEqual(len(created['responses']), 4)
+        self.assertEqual(Response.objects.filter(advert=self.advert).count(), 1 + 4)
+        self.advert.refresh_from_db()
+        self.assertEqual(self.advert.response_count, 5)
+
+    def test_deferred_indexes_rebuilt(self):
+        def indexes():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name")
+                return [row[0] for row in cursor.fetchall()]
+
+        before = indexes()
+        self.seed(defer_indexes=True)
+        self.assertEqual(indexes(), before)
+
+    def test_reproducible(self):
+        created = self.seed()
+        plan = {
+            'now': self.advert.created_at, 'password': '', 'random_seed': 1, 'days': 30,
+            'user_pool': created['users'], 'advert_pool': created['adverts'],
+            'choices': ['Tanks', 'Smiths'], 'categories': {},
+        }
+        init_worker(plan)
+        first = generate('responses', range(1, 10))
+        # Partitions do not depend on what was generated before
+        generate('adverts', range(1, 10))
+        self.assertEqual(generate('responses', range(1, 10)), first)
+        self.assertNotEqual(generate('responses', range(10, 19))[1]['responses'][0][1:],
+                            first[1]['responses'][0][1:])
+
+    def test_command(self):
+        call_command('seed_board', '--users', '2', '--adverts', '3', '--responses', '4',
+                     '--no-categories', stdout=StringIO())
+        self.assertEqual(User.objects.count(), 2 + 2)
+        self.assertEqual(Advert.objects.count(), 1 + 3)
+        self.assertEqual(Response.objects.count(), 1 + 4)
+        self.assertFalse(Category.adverts.through.objects.exists())
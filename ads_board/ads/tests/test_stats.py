@@ -0,0 +1,21 @@
+from ads import stats
+from ads.models import Advert
+from .base import BoardTestCase
+
+
+class CounterTests(BoardTestCase):
+    """
+    The counters of an advert follow its responses.
+    """
+
+    def counters(self):
+        return Advert.objects.values('response_count', 'accepted_count', 'likes_total').get(pk=self.advert.pk)
+
+    def test_decrements_stop_at_zero(self):
+        # Counters drifted below the responses they count
+        Advert.objects.filter(pk=self.advert.pk).update(response_count=0, accepted_count=0)
+        self.response.likes = 3
+        self.response.status = True
+        stats.response_deleted(self.response)
+        stats.response_unaccepted(self.advert.pk)
+        self.assertEqual(self.counters(), {'response_count': 0, 'accepted_count': 0, 'likes_total': 0})
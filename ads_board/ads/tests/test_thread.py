@@ -0,0 +1,25 @@
+from django.core.cache import cache
+
+from ads.thread import THREAD_CACHE_KEY, invalidate_threads, thread_page, thread_version
+from .base import BoardTestCase
+
+
+class ThreadCacheTests(BoardTestCase):
+    """
+    The cached first page of a thread follows the responses of its advert.
+    """
+
+    def test_new_response_shown(self):
+        thread_page(self.advert.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            newer = self.respond(self.advert, self.responder, 'И щит тоже')
+        self.assertEqual(thread_page(self.advert.pk)['responses'][0]['id'], newer.pk)
+
+    def test_late_stale_write_ignored(self):
+        # A reader that loaded the page before the change stores it afterwards
+        version = thread_version(self.advert.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_threads([self.advert.pk])
+        key = THREAD_CACHE_KEY.format(advert_id=self.advert.pk, version=version)
+        cache.set(key, {'responses': [], 'cursor': None})
+        self.assertEqual(len(thread_page(self.advert.pk)['responses']), 1)
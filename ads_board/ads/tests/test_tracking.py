@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.db import transaction
+
+from ads.models import OutgoingEmail, Response
+from .base import BoardTestCase
+
+
+@mock.patch('ads.notifications.publish')
+class ResponseTrackingTests(BoardTestCase):
+    """
+    Saving a response notifies its parties of its real state transitions
+    only, the emails committing with the response.
+    """
+
+    def setUp(self):
+        super().setUp()
+        OutgoingEmail.objects.all().delete()
+
+    def save(self, response, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            response.save(**kwargs)
+
+    def recipients(self):
+        return [email.recipients for email in OutgoingEmail.objects.order_by('pk')]
+
+    def test_create(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.respond(self.advert, self.responder, 'И щит тоже')
+        self.assertEqual(self.recipients(), [[self.owner.email]])
+        [(user_id, name, data)] = publish.call_args.args[0]
+        self.assertEqual((user_id, name, data['id']), (self.owner.pk, 'response', response.pk))
+
+    def test_create_rolled_back(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.respond(self.advert, self.responder, 'И щит тоже')
+                transaction.set_rollback(True)
+        self.assertEqual(self.recipients(), [])
+        publish.assert_not_called()
+
+    def test_vote_save(self, publish):
+        response = Response.objects.get(pk=self.response.pk)
+        response.likes += 1
+        self.save(response)
+        self.assertEqual(self.recipients(), [])
+        publish.assert_not_called()
+
+    def test_accept(self, publish):
+        response = Response.objects.get(pk=self.response.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            response.accept()
+        self.assertEqual(self.recipients(), [[self.responder.email]])
+        [(user_id, name, _)] = publish.call_args.args[0]
+        self.assertEqual((user_id, name), (self.responder.pk, 'accepted'))
+
+    def test_resave_accepted(self, publish):
+        response = Response.objects.get(pk=self.response.pk)
+        response.status = True
+        self.save(response)
+        OutgoingEmail.objects.all().delete()
+        publish.reset_mock()
+
+        self.save(response)
+        Response.objects.get(pk=response.pk).save()
+        self.assertEqual(self.recipients(), [])
+        publish.assert_not_called()
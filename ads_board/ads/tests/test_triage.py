@@ -0,0 +1,57 @@
+import json
+
+from django.urls import reverse
+
+from ads.models import Advert, Response
+from ads_board import settings
+from .base import BoardTestCase
+
+
+class TriageResponsesTests(BoardTestCase):
+    """
+    Advert owners triage the responses to their adverts in bulk.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+
+    def triage(self, body):
+        return self.client.post(reverse('ads:triage-responses'), body, content_type='application/json')
+
+    def test_accept(self):
+        response = self.triage({'ids': [self.response.pk], 'action': 'accept'})
+        self.assertEqual(response.json(), {
+            'action': 'accept', 'ids': [self.response.pk], 'skipped': [], 'changed': 1,
+        })
+        self.assertTrue(Response.objects.get(pk=self.response.pk).status)
+
+    def test_other_owners_responses_skipped(self):
+        own_advert = Advert.objects.create(user=self.responder, title='Продам щит', content='Крепкий')
+        other = self.respond(own_advert, self.owner, 'Беру щит')
+        response = self.triage({'ids': [self.response.pk, other.pk, 0], 'action': 'delete'})
+        self.assertEqual(response.json()['ids'], [self.response.pk])
+        self.assertEqual(response.json()['skipped'], [0, other.pk])
+        self.assertTrue(Response.objects.filter(pk=other.pk).exists())
+        self.assertFalse(Response.objects.filter(pk=self.response.pk).exists())
+
+    def test_bad_bodies(self):
+        for body in [
+            'not json',
+            [self.response.pk],
+            {'ids': str(self.response.pk), 'action': 'accept'},
+            {'ids': [str(self.response.pk)], 'action': 'accept'},
+            {'ids': [True], 'action': 'accept'},
+            {'ids': [self.response.pk], 'action': ['accept']},
+            {'ids': [self.response.pk], 'action': 'approve'},
+            {'ids': [self.response.pk]},
+        ]:
+            with self.subTest(body=body):
+                content = body if isinstance(body, str) else json.dumps(body)
+                self.assertEqual(self.triage(content).status_code, 400)
+        self.assertFalse(Response.objects.get(pk=self.response.pk).status)
+
+    def test_too_many_ids(self):
+        ids = list(range(1, settings.RESPONSE_TRIAGE_MAX_IDS + 2))
+        response = self.triage({'ids': ids, 'action': 'accept'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from ads.models import Advert
+from ads.uploads import release_files
+from .base import BoardTestCase
+
+
+class MediaTests(BoardTestCase):
+    """
+    Stored files are served and released; other media files are not served.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.media_root = media_root.name
+
+    def store(self, name):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write('меч')
+        return path
+
+    def test_blob_served(self):
+        self.store('blobs/ab/cd/abcd.txt')
+        response = self.client.get(reverse('media', kwargs={'name': 'blobs/ab/cd/abcd.txt'}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_upload_in_progress_not_served(self):
+        self.store('tmp/abcd.upload.txt')
+        for name in ['tmp/abcd.upload.txt', 'blobs/../tmp/abcd.upload.txt']:
+            response = self.client.get(reverse('media', kwargs={'name': name}))
+            self.assertEqual(response.status_code, 404)
+
+    def test_release_keeps_files_in_use(self):
+        used = self.store('blobs/ab/cd/abcd.txt')
+        unused = self.store('blobs/ef/01/ef01.txt')
+        Advert.objects.filter(pk=self.advert.pk).update(upload='blobs/ab/cd/abcd.txt')
+        release_files(['blobs/ab/cd/abcd.txt', 'blobs/ef/01/ef01.txt'])
+        self.assertTrue(os.path.exists(used))
+        self.assertFalse(os.path.exists(unused))
+
+    def edit(self, **data):
+        self.client.force_login(self.owner)
+        data = {'title': self.advert.title, 'content': self.advert.content, 'category': 'Smiths', **data}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('ads:update-advert', kwargs={'pk': self.advert.pk}), data)
+        self.assertRedirects(response, reverse('ads:advert-list'), fetch_redirect_response=False)
+        return Advert.objects.get(pk=self.advert.pk)
+
+    def test_update_releases_replaced_files(self):
+        upload = self.store('blobs/ab/cd/abcd.txt')
+        thumbnail = self.store('blobs/ef/01/ef01.jpg')
+        Advert.objects.filter(pk=self.advert.pk).update(upload='blobs/ab/cd/abcd.txt', thumbnail='blobs/ef/01/ef01.jpg')
+        advert = self.edit(upload=SimpleUploadedFile('shield.txt', 'щит'.encode()))
+        self.assertNotEqual(advert.upload.name, 'blobs/ab/cd/abcd.txt')
+        self.assertTrue(advert.upload.storage.exists(advert.upload.name))
+        self.assertEqual(advert.thumbnail.name, '')
+        self.assertFalse(os.path.exists(upload))
+        self.assertFalse(os.path.exists(thumbnail))
+
+    def test_update_keeps_files(self):
+        upload = self.store('blobs/ab/cd/abcd.txt')
+        Advert.objects.filter(pk=self.advert.pk).update(upload='blobs/ab/cd/abcd.txt')
+        advert = self.edit()
+        self.assertEqual(advert.category, 'Smiths')
+        self.assertEqual(advert.upload.name, 'blobs/ab/cd/abcd.txt')
+        self.assertTrue(os.path.exists(upload))
+
+    def test_replaced_file_kept_while_in_use(self):
+        upload = self.store('blobs/ab/cd/abcd.txt')
+        other = Advert.objects.create(user=self.owner, title='Продам щит', content='Крепкий щит',
+                                      upload='blobs/ab/cd/abcd.txt')
+        Advert.objects.filter(pk=self.advert.pk).update(upload='blobs/ab/cd/abcd.txt')
+        advert = Advert.objects.get(pk=self.advert.pk)
+        advert.upload = ''
+        with self.captureOnCommitCallbacks(execute=True):
+            advert.save(update_fields=['upload'])
+        self.assertTrue(os.path.exists(upload))
+        other.upload = ''
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        self.assertFalse(os.path.exists(upload))
@@ -0,0 +1,117 @@
+from django.contrib.auth.models import Permission
+from django.urls import reverse
+
+from ads.cache import get_adverts_generation
+from ads.digest import build_snapshot, week_of
+from ads.models import DigestSnapshot
+from .base import BoardTestCase
+
+
+class AdvertViewsTests(BoardTestCase):
+    """
+    The advert views render within their query budget.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.responder)
+
+    def test_advert_list(self):
+        response = self.client.get(reverse('ads:advert-list'))
+        self.assertContains(response, self.advert.title)
+
+    def test_advert_list_cached(self):
+        self.client.get(reverse('ads:advert-list'))
+        response = self.client.get(reverse('ads:advert-list'))
+        self.assertContains(response, self.advert.title)
+
+    def test_advert_list_filtered(self):
+        response = self.client.get(reverse('ads:advert-list'), {'add_title': 'меч', 'sort': 'popular'})
+        self.assertContains(response, self.advert.title)
+        self.assertContains(response, 'href="?add_title=%D0%BC%D0%B5%D1%87&sort=new"')
+
+    def test_advert_list_counts_new_responses(self):
+        self.client.get(reverse('ads:advert-list'))
+        generation = get_adverts_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.respond(self.advert, self.responder, 'И щит тоже')
+        response = self.client.get(reverse('ads:advert-list'))
+        self.assertContains(response, '(2 откл.)')
+        # The page itself stayed cached
+        self.assertEqual(get_adverts_generation(), generation)
+
+    def test_advert_detail(self):
+        response = self.client.get(reverse('ads:advert-detail', kwargs={'pk': self.advert.pk}))
+        self.assertContains(response, self.response.response_text)
+
+    def test_advert_responses(self):
+        response = self.client.get(reverse('ads:advert-responses', kwargs={'pk': self.advert.pk}))
+        self.assertEqual([item['id'] for item in response.json()['responses']], [self.response.pk])
+
+    def test_response_detail(self):
+        response = self.client.get(reverse('ads:response-detail', kwargs={'pk': self.response.pk}))
+        self.assertContains(response, self.response.response_text)
+
+    def test_weekly_digest(self):
+        build_snapshot(week_of())
+        response = self.client.get(reverse('ads:weekly-digest'))
+        self.assertContains(response, 'За неделю объявлений не было.')
+
+    def test_weekly_digest_not_built(self):
+        response = self.client.get(reverse('ads:weekly-digest'))
+        self.assertContains(response, 'Подборка за эту неделю ещё не готова.')
+        self.assertFalse(DigestSnapshot.objects.exists())
+
+
+class PrivatePageTests(BoardTestCase):
+    """
+    The private page and its feed render within their query budget.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.owner)
+
+    def test_private_page(self):
+        response = self.client.get(reverse('ads:private'))
+        self.assertContains(response, self.response.response_text)
+
+    def test_become_author(self):
+        response = self.client.post(reverse('ads:private'))
+        self.assertRedirects(response, reverse('ads:private'))
+        self.assertTrue(self.owner.groups.filter(name='authors').exists())
+
+    def test_feed_since_response(self):
+        newer = self.respond(self.advert, self.responder, 'И щит тоже')
+        response = self.client.get(reverse('ads:private-feed'), {'since': self.response.pk})
+        self.assertEqual([item['id'] for item in response.json()['responses']], [newer.pk])
+
+    def test_feed_since_deleted_response(self):
+        deleted = self.respond(self.advert, self.responder, 'Передумал')
+        newer = self.respond(self.advert, self.responder, 'И щит тоже')
+        since = deleted.pk
+        deleted.delete()
+        response = self.client.get(reverse('ads:private-feed'), {'since': since})
+        self.assertEqual([item['id'] for item in response.json()['responses']], [newer.pk])
+
+    def test_feed_invalid_since(self):
+        for since in ['yesterday', '²', str(2 ** 64)]:
+            with self.subTest(since=since):
+                response = self.client.get(reverse('ads:private-feed'), {'since': since})
+                self.assertEqual(response.status_code, 400)
+
+
+class AuthorViewsTests(BoardTestCase):
+    """
+    The views reserved to authors.
+    """
+
+    def test_response_create(self):
+        self.responder.user_permissions.add(Permission.objects.get(codename='response_create'))
+        self.client.force_login(self.responder)
+        response = self.client.post(
+            reverse('ads:response-create', kwargs={'pk': self.advert.pk}),
+            {'response_text': 'Ещё отклик'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(self.advert.response_set.filter(response_text='Ещё отклик').exists())
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.db import IntegrityError
+from django.urls import reverse
+
+from ads import counters
+from ads.counters import PROCESSING_KEY, DuplicateVote, cast_vote, flush_votes
+from ads.models import Advert, Response, ResponseVote
+from .base import BoardTestCase
+from .fakes import FakeRedis
+
+
+class DirectVoteTests(BoardTestCase):
+    """
+    Without a buffer, votes are stored and counted at once.
+    """
+
+    def counts(self):
+        return (
+            Response.objects.values_list('likes', 'dislikes').get(pk=self.response.pk),
+            Advert.objects.values_list('likes_total', flat=True).get(pk=self.advert.pk),
+        )
+
+    def test_like(self):
+        cast_vote(self.response.pk, self.owner, ResponseVote.LIKE)
+        self.assertEqual(self.counts(), ((1, 0), 1))
+
+    def test_duplicate(self):
+        cast_vote(self.response.pk, self.owner, ResponseVote.DISLIKE)
+        with self.assertRaises(DuplicateVote):
+            cast_vote(self.response.pk, self.owner, ResponseVote.LIKE)
+        self.assertEqual(self.counts(), ((0, 1), 0))
+
+
+class VoteViewTests(BoardTestCase):
+    """
+    Votes are cast by logged-in users; repeated votes are ignored.
+    """
+
+    def test_anonymous_redirected_to_login(self):
+        response = self.client.post(reverse('ads:like', kwargs={'pk': self.response.pk}))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(ResponseVote.objects.exists())
+
+    def test_repeated_like(self):
+        self.client.force_login(self.owner)
+        for _ in range(2):
+            response = self.client.post(reverse('ads:like', kwargs={'pk': self.response.pk}))
+            self.assertRedirects(response, reverse('ads:advert-detail', kwargs={'pk': self.advert.pk}))
+        self.assertEqual(Response.objects.get(pk=self.response.pk).likes, 1)
+
+
+class BufferedVoteTests(BoardTestCase):
+    """
+    With a buffer, votes are queued in Redis and applied by ``flush_votes``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.buffer = FakeRedis()
+        patcher = mock.patch.object(counters, 'get_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def likes(self):
+        return Response.objects.get(pk=self.response.pk).likes
+
+    def test_flush(self):
+        cast_vote(self.response.pk, self.owner, ResponseVote.LIKE)
+        with self.assertRaises(DuplicateVote):
+            cast_vote(self.response.pk, self.owner, ResponseVote.LIKE)
+        self.assertEqual(self.likes(), 0)
+        self.assertEqual(flush_votes(), 1)
+        self.assertEqual(self.likes(), 1)
+        self.assertEqual(Advert.objects.get(pk=self.advert.pk).likes_total, 1)
+        self.assertEqual(flush_votes(), 0)
+
+    def test_failed_flush_retried(self):
+        cast_vote(self.response.pk, self.owner, ResponseVote.LIKE)
+        with mock.patch.object(ResponseVote.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                flush_votes()
+        self.assertTrue(self.buffer.exists(PROCESSING_KEY))
+        self.assertEqual(flush_votes(), 1)
+        self.assertEqual(self.likes(), 1)
+
+    def test_votes_stored_meanwhile_not_counted_twice(self):
+        cast_vote(self.response.pk, self.owner, ResponseVote.LIKE)
+        # Stored by the unbuffered path, e.g. after the voter sets were lost
+        ResponseVote.objects.create(response=self.response, user=self.owner, value=ResponseVote.LIKE)
+        self.assertEqual(flush_votes(), 0)
+        self.assertEqual(self.likes(), 0)
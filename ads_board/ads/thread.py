@@ -0,0 +1,169 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from ads_board import settings
+from ads_board.instrumentation import note_cache
+from .models import Response
+from .pagination import CursorPaginator
+
+# Version counter of the cached thread of one advert
+THREAD_VERSION_KEY = 'ads:advert-thread:{advert_id}:version'
+# Cache key of the first page of the responses to one advert, per version
+THREAD_CACHE_KEY = 'ads:advert-thread:{advert_id}:{version}'
+
+
+def thread_queryset(advert_id):
+    """
+    Return the responses to an advert with their users, for the thread.
+
+    Args:
+        advert_id (int): The advert.
+
+    Returns:
+        QuerySet: The responses, read through the (advert, created_at) index.
+    """
+    return (
+        Response.objects.filter(advert_id=advert_id)
+        .select_related('user')
+        .only('advert_id', 'response_text', 'status', 'created_at', 'user__username')
+    )
+
+
+def thread_item(response):
+    """
+    Return the representation of a thread response, shared by the page and
+    the JSON endpoint.
+
+    Args:
+        response (Response): A response of ``thread_queryset``.
+
+    Returns:
+        dict: The item.
+    """
+    return {
+        'id': response.pk,
+        'user': response.user.username,
+        'text': response.response_text,
+        'accepted': response.status,
+        'created_at': response.created_at,
+        'url': reverse('ads:response-detail', kwargs={'pk': response.pk}),
+    }
+
+
+def build_thread(page):
+    return {
+        'responses': [thread_item(response) for response in page],
+        'cursor': page.next_cursor,
+    }
+
+
+def thread_version(advert_id):
+    """
+    Return the current version of the cached thread of an advert.
+
+    Args:
+        advert_id (int): The advert.
+
+    Returns:
+        int: The version, starting at 1.
+    """
+    key = THREAD_VERSION_KEY.format(advert_id=advert_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+async def athread_version(advert_id):
+    """
+    Async version of ``thread_version``.
+    """
+    key = THREAD_VERSION_KEY.format(advert_id=advert_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, 1, timeout=None)
+        version = await cache.aget(key, 1)
+    return version
+
+
+def thread_page(advert_id, cursor=None):
+    """
+    Return a page of the responses to an advert, newest first.
+
+    The first page, the one every visit of the advert shows, is cached
+    under the current version of the thread, which moves on whenever a
+    response of the advert changes.
+
+    Args:
+        advert_id (int): The advert.
+        cursor (str): The cursor of the previous page, None for the first.
+
+    Returns:
+        dict: The responses as ``thread_item`` dicts and the cursor of the
+            next page, None on the last one.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    paginator = CursorPaginator(thread_queryset(advert_id), settings.ADVERT_THREAD_PAGE_SIZE)
+    if cursor:
+        return build_thread(paginator.page(cursor))
+
+    key = THREAD_CACHE_KEY.format(advert_id=advert_id, version=thread_version(advert_id))
+    thread = cache.get(key)
+    note_cache(thread is not None)
+    if thread is None:
+        thread = build_thread(paginator.page())
+        cache.set(key, thread, settings.ADVERT_THREAD_CACHE_TIMEOUT)
+    return thread
+
+
+async def athread_page(advert_id, cursor=None):
+    """
+    Async version of ``thread_page``.
+    """
+    paginator = CursorPaginator(thread_queryset(advert_id), settings.ADVERT_THREAD_PAGE_SIZE)
+    if cursor:
+        return build_thread(await paginator.apage(cursor))
+
+    key = THREAD_CACHE_KEY.format(advert_id=advert_id, version=await athread_version(advert_id))
+    thread = await cache.aget(key)
+    note_cache(thread is not None)
+    if thread is None:
+        thread = build_thread(await paginator.apage())
+        await cache.aset(key, thread, settings.ADVERT_THREAD_CACHE_TIMEOUT)
+    return thread
+
+
+def bump_thread_versions(advert_ids):
+    """
+    Move the cached threads of adverts to a new version.
+
+    Args:
+        advert_ids (iterable[int]): The adverts.
+    """
+    for advert_id in advert_ids:
+        key = THREAD_VERSION_KEY.format(advert_id=advert_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def invalidate_threads(advert_ids):
+    """
+    Invalidate the cached first pages of the threads of adverts once the
+    current transaction commits.
+
+    A reader that read the rows being replaced stores its page under the
+    version it started from, which is never read again once the version has
+    moved on, and simply expires.
+
+    Args:
+        advert_ids (iterable[int]): The adverts whose responses changed.
+    """
+    advert_ids = set(advert_ids)
+    if advert_ids:
+        transaction.on_commit(lambda: bump_thread_versions(advert_ids))
@@ -0,0 +1,299 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import transaction
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Advert
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; thumbnails are skipped without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    """
+    Uploaded file streamed to a temporary file, with the SHA-256 of its content.
+
+    The temporary file lives in ``UPLOAD_TEMP_DIR``, next to the media files,
+    so storing it is a rename rather than a copy.
+    """
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload' + os.path.splitext(name)[1], dir=settings.UPLOAD_TEMP_DIR
+        )
+        # Skips TemporaryUploadedFile.__init__, which creates its own file
+        UploadedFile.__init__(self, file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = None
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """
+    Upload handler writing each file to disk in ``UPLOAD_CHUNK_SIZE`` chunks
+    as it arrives, hashing it on the way.
+
+    The file is never held in memory, and ``ContentAddressedStorage`` moves
+    it into place by its digest without reading it again.
+    """
+
+    chunk_size = settings.UPLOAD_CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset,
+                                       self.content_type_extra)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.digest.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+
+def schedule_processing(advert_id):
+    """
+    Ask a Celery worker to post-process the upload of an advert.
+
+    A broker outage must not break the request that saved the advert; the
+    upload is then served as is.
+    """
+    from ads_board.tasks.tasks import process_upload
+
+    try:
+        process_upload.delay(advert_id)
+    except Exception:
+        logger.warning('Could not enqueue upload processing', exc_info=True)
+
+
+def release_files(names):
+    """
+    Delete stored files no advert refers to anymore.
+
+    Files are only stored inside write transactions (see
+    ``AdvertCreateView`` and ``process_upload``), and the checks and
+    deletions run in one too. Write transactions start with BEGIN IMMEDIATE
+    and so never overlap: a concurrent upload of the same content either
+    commits its reference before the check, or finds the file gone and
+    stores it again.
+
+    Args:
+        names (list[str]): Storage names of files that lost a reference.
+    """
+    storage = Advert._meta.get_field('upload').storage
+    with transaction.atomic():
+        for name in filter(None, set(names)):
+            in_use = Advert.objects.filter(upload=name).exists() or Advert.objects.filter(thumbnail=name).exists()
+            if not in_use:
+                storage.delete(name)
+
+
+def make_thumbnail(upload):
+    """
+    Render a JPEG thumbnail of an image upload.
+
+    Args:
+        upload (FieldFile): The uploaded image.
+
+    Returns:
+        ContentFile: The thumbnail, or None if Pillow is missing or the file
+        is not an image it can read.
+    """
+    if Image is None:
+        return None
+    try:
+        with upload.open('rb'), Image.open(upload) as image:
+            image.thumbnail(settings.UPLOAD_THUMBNAIL_SIZE)
+            thumbnail = ContentFile(b'', name='thumbnail.jpg')
+            image.convert('RGB').save(thumbnail, 'JPEG', quality=85)
+    except (OSError, Image.DecompressionBombError):
+        return None
+    thumbnail.seek(0)
+    return thumbnail
+
+
+def process_upload(advert_id):
+    """
+    Post-process the upload of an advert: drop it if it exceeds
+    ``UPLOAD_MAX_SIZE``, otherwise thumbnail it if it is an image.
+
+    Args:
+        advert_id (int): The advert id.
+
+    Returns:
+        str: What was done, 'rejected', 'thumbnailed' or 'kept'.
+    """
+    advert = Advert.objects.filter(pk=advert_id).only('upload', 'thumbnail').first()
+    if advert is None or not advert.upload:
+        return 'kept'
+
+    name = advert.upload.name
+    if advert.upload.size > settings.UPLOAD_MAX_SIZE:
+        Advert.objects.filter(pk=advert_id).update(upload='', thumbnail='')
+        release_files([name, advert.thumbnail.name])
+        return 'rejected'
+
+    content_type, _ = mimetypes.guess_type(name)
+    if content_type and content_type.startswith('image/') and not advert.thumbnail:
+        thumbnail = make_thumbnail(advert.upload)
+        if thumbnail is not None:
+            # Stored and referenced in one write transaction, see release_files
+            with transaction.atomic():
+                stored = advert.thumbnail.storage.save(thumbnail.name, thumbnail)
+                Advert.objects.filter(pk=advert_id, upload=name).update(thumbnail=stored)
+            return 'thumbnailed'
+    return 'kept'
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Raised when a Range header lies outside of the file.
+    """
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header.
+
+    Args:
+        header (str): The header value, e.g. 'bytes=0-1023' or 'bytes=-500'.
+        size (int): The size of the file.
+
+    Returns:
+        tuple: The inclusive (start, end) byte positions, or None when the
+        header is malformed or asks for several ranges (the whole file is
+        then served).
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last `end` bytes
+        if not int(end):
+            raise RangeNotSatisfiable(header)
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+class RangeReader:
+    """
+    File-like object reading at most ``length`` bytes from an open file.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_file(request, path, name, immutable=False):
+    """
+    Serve a file from disk without loading it in memory.
+
+    With ``MEDIA_SENDFILE_HEADER`` set, the web server is told to send the
+    file and Python sends headers only. Otherwise the file is streamed in
+    ``UPLOAD_CHUNK_SIZE`` blocks, honouring single byte ranges (for seeking
+    in videos and resuming downloads) and conditional requests.
+
+    Args:
+        request (HttpRequest): The request.
+        path (str): Absolute path of the file.
+        name (str): Storage name of the file, relative to ``MEDIA_ROOT``.
+        immutable (bool): Whether the content behind the name never changes.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    stat = os.stat(path)
+    content_type, encoding = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = stream_file(request, path, stat.st_size, content_type, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if immutable:
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
+
+def stream_file(request, path, size, content_type, etag):
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        response = HttpResponse(content_type=content_type)
+        if settings.MEDIA_SENDFILE_ROOT:
+            relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response[header] = settings.MEDIA_SENDFILE_ROOT + relative
+        else:
+            response[header] = path
+        return response
+
+    requested = request.headers.get('Range')
+    # A stale If-Range means the client's partial copy is outdated
+    if requested and request.headers.get('If-Range', etag) != etag:
+        requested = None
+    try:
+        byte_range = parse_range(requested, size) if requested else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeReader(file, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response.block_size = settings.UPLOAD_CHUNK_SIZE
+    return response
@@ -1,32 +1,57 @@
+from django.conf import settings
 from django.urls import path
+
 from .views import (
     AdvertListView,
     AdvertCreateView,
     AdvertDetailView,
+    AdvertResponsesView,
     ResponseCreateView,
     ResponseDetailView,
     PrivatePageView,
     AcceptResponseView,
     DeleteResponseView,
+    TriageResponsesView,
     LikeView,
     DislikeView,
     AdvertDeleteView,
     AdvertUpdateView,
+    WeeklyDigestView,
+    ExportView,
+    OwnerFeedView,
 )
 
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        AsyncAdvertListView as AdvertListView,
+        AsyncAdvertDetailView as AdvertDetailView,
+        AsyncResponseDetailView as ResponseDetailView,
+        AsyncPrivatePageView as PrivatePageView,
+        ResponseEventsView,
+    )
+
 app_name = 'ads'
 
 urlpatterns = [
     path('', AdvertListView.as_view(), name='advert-list'),
     path('advert/create/', AdvertCreateView.as_view(), name='advert-create'),
     path('advert/<int:pk>/', AdvertDetailView.as_view(), name='advert-detail'),
+    path('advert/<int:pk>/responses/', AdvertResponsesView.as_view(), name='advert-responses'),
     path('advert/<int:pk>/response/create/', ResponseCreateView.as_view(), name='response-create'),
     path('response/<int:pk>/', ResponseDetailView.as_view(), name='response-detail'),
     path('private/', PrivatePageView.as_view(), name='private'),
+    path('private/feed/', OwnerFeedView.as_view(), name='private-feed'),
+    path('week/', WeeklyDigestView.as_view(), name='weekly-digest'),
+    path('export/<str:kind>/', ExportView.as_view(), name='export'),
     path('response/accept/<int:response_id>/', AcceptResponseView.as_view(), name='accept-response'),
     path('response/delete/<int:response_id>/', DeleteResponseView.as_view(), name='delete-response'),
+    path('response/triage/', TriageResponsesView.as_view(), name='triage-responses'),
     path('response/<int:pk>/like/', LikeView.as_view(), name='like'),
     path('response/<int:pk>/dislike/', DislikeView.as_view(), name='dislike'),
     path('advert/<int:pk>/delete/', AdvertDeleteView.as_view(), name='delete-advert'),
     path('advert/<int:pk>/update/', AdvertUpdateView.as_view(), name='update-advert'),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Live notifications hold their connection open, which only ASGI affords
+    urlpatterns.append(path('events/', ResponseEventsView.as_view(), name='events'))
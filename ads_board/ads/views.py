@@ -1,17 +1,37 @@
+import json
+import os
 from datetime import datetime
 
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import Group
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils.safestring import mark_safe
 from django.views.generic import CreateView, DetailView, ListView, DeleteView, UpdateView, View
 
 from ads_board import settings
-from users.models import Profile
+from ads_board.instrumentation import note_cache
+from ads_board.routers import ReadReplicaMixin
+from users.authz import AuthzPermissionRequiredMixin
+from .cache import advert_page_cache_key, advert_page_timeout, cache_response_counts, fill_response_counts
+from .counters import DuplicateVote, cast_vote
+from .digest import digest_items, find_snapshot
+from .export import EXPORTS, FORMATS, aiterate, export, export_queryset
+from .feed import feed_item, owner_feed
 from .filters import AdvertFilter
 from .forms import PostForm, AdvertForm
-from .models import Advert, Response
+from .models import Advert, Response, ResponseVote
+from .moderation import TRIAGE_ACTIONS, triage_responses
+from .outbox import queue_mail
+from .pagination import CursorPaginator, InvalidCursor
+from .thread import thread_page
+from .uploads import schedule_processing, serve_file
 
 from django.dispatch import Signal
 
@@ -20,7 +40,7 @@ send_response_email_signal = Signal()
 
 
 # View for the homepage
-class AdvertListView(LoginRequiredMixin, ListView):
+class AdvertListView(ReadReplicaMixin, LoginRequiredMixin, ListView):
     """
     View representing the list of advertisements.
     """
@@ -29,6 +49,39 @@ class AdvertListView(LoginRequiredMixin, ListView):
     template_name = 'ads/advert_list.html'
     context_object_name = 'advert_list'
     paginate_by = 15
+    # Session, user, groups, count, page and the category filter lookup
+    query_budget = 6
+    # Keyset pagination on (created_at, id) instead of offset pages
+    cursor_pagination = settings.ADVERT_LIST_CURSOR_PAGINATION
+    # Cached fragment holding the adverts and the pagination links
+    page_template_name = 'ads/advert_list_page.html'
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET request, serving the advert page from the cache when possible.
+
+        The cached fragment is keyed on the GET parameters and the adverts
+        generation. The response counts, which change far more often, are
+        filled in from their own cache entries, so a hit runs no advert
+        query unless one of them expired.
+        """
+        key = advert_page_cache_key(request.GET, variant=f'cursor={self.cursor_pagination}')
+        advert_page = cache.get(key)
+        note_cache(advert_page is not None)
+        counts = None
+        if advert_page is None:
+            self.object_list = self.get_queryset()
+            context = self.get_context_data()
+            advert_page = render_to_string(self.page_template_name, context, request)
+            cache.set(key, advert_page, advert_page_timeout(request.GET))
+            counts = cache_response_counts(context['advert_list'])
+
+        context = {
+            'advert_page': mark_safe(fill_response_counts(advert_page, counts)),
+            'time_now': datetime.utcnow(),
+            'is_author': request.authz.is_author,
+        }
+        return render(request, self.template_name, context)
 
     def get_queryset(self):
         """
@@ -38,17 +91,47 @@ class AdvertListView(LoginRequiredMixin, ListView):
         self.filterset = AdvertFilter(self.request.GET, queryset)
         return self.filterset.qs
 
+    def uses_cursor(self):
+        """
+        Whether this page is paginated with cursors; keyset cursors follow the
+        creation order, so the popularity sort and searches, ranked by
+        relevance, fall back to numbered pages.
+        """
+        return (self.cursor_pagination and self.request.GET.get('sort') != 'popular'
+                and not self.request.GET.get('add_title', '').strip())
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Paginate the queryset, using opaque cursors when cursor pagination is on.
+        """
+        if not self.uses_cursor():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Invalid cursor.')
+        return None, page, page.object_list, page.has_next() or page.has_previous()
+
     def get_context_data(self, **kwargs):
         """
         Get the additional context data for the template.
         """
         context = super().get_context_data(**kwargs)
-        context['time_now'] = datetime.utcnow()
-        context['is_author'] = self.request.user.groups.filter(name='authors').exists()
+        context['cursor_pagination'] = self.uses_cursor()
+        # Keep the active filters and sort order in the pagination links
+        query = self.request.GET.copy()
+        query.pop('cursor', None)
+        query.pop('page', None)
+        context['filter_query'] = query.urlencode()
+        # And the active filters in the sort links
+        query.pop('sort', None)
+        context['sort_query'] = query.urlencode()
         return context
 
 
-class AdvertCreateView(PermissionRequiredMixin, CreateView):
+class AdvertCreateView(AuthzPermissionRequiredMixin, CreateView):
     """
     View for creating an advertisement.
     """
@@ -58,9 +141,10 @@ class AdvertCreateView(PermissionRequiredMixin, CreateView):
     model = Advert
     template_name = 'ads/advert_create.html'
 
+    @transaction.atomic
     def form_valid(self, form):
         """
-        Save the form data and send an email notification.
+        Save the form data and queue an email notification.
         """
         advert = form.save(commit=False)
         advert.user = self.request.user
@@ -69,12 +153,14 @@ class AdvertCreateView(PermissionRequiredMixin, CreateView):
         form.instance.author = self.request.user
         form.instance.user = self.request.user
 
-        # Send email
+        # Queue email, delivered once the advert is committed
         subject = 'Новое объявление'
         message = f'Ваше объявление "{advert.title}" успешно опубликовано.'
         from_email = settings.DEFAULT_FROM_EMAIL
         recipient_list = [self.request.user.email]
-        send_mail(subject, message, from_email, recipient_list)
+        queue_mail(subject, message, recipient_list, from_email=from_email)
+        if advert.upload:
+            transaction.on_commit(lambda: schedule_processing(advert.pk))
 
         return super().form_valid(form)
 
@@ -85,12 +171,40 @@ class AdvertCreateView(PermissionRequiredMixin, CreateView):
         return reverse('ads:advert-detail', kwargs={'pk': self.object.pk})
 
 
-class AdvertDetailView(DetailView):
+class AdvertDetailView(ReadReplicaMixin, DetailView):
     """
-    View representing the details of an advertisement.
+    View representing the details of an advertisement, with the first page
+    of its responses; ``AdvertResponsesView`` serves the following ones.
     """
     model = Advert
+    queryset = Advert.objects.with_owner()
     template_name = 'ads/advert_detail.html'
+    query_budget = 4
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['thread'] = thread_page(self.object.pk)
+        return context
+
+
+class AdvertResponsesView(ReadReplicaMixin, View):
+    """
+    JSON pages of the responses to an advert, for the infinite scroll of
+    the advert page.
+    """
+    query_budget = 4
+
+    def get(self, request, pk):
+        """
+        Handle GET request for a page of responses after ``cursor``.
+        """
+        try:
+            thread = thread_page(pk, request.GET.get('cursor'))
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+        if not thread['responses'] and not Advert.objects.filter(pk=pk).exists():
+            raise Http404('No advert found matching the query.')
+        return JsonResponse(thread)
 
 
 class AdvertDeleteView(DeleteView):
@@ -111,19 +225,29 @@ class AdvertUpdateView(UpdateView):
     form_class = AdvertForm
     success_url = reverse_lazy('ads:advert-list')
 
+    @transaction.atomic
+    def form_valid(self, form):
+        """
+        Save the form data; a replaced upload is post-processed again and
+        its previous files are released once the advert is committed.
+        """
+        if 'upload' in form.changed_data:
+            # The thumbnail belonged to the previous upload
+            form.instance.thumbnail = ''
+            if form.instance.upload:
+                transaction.on_commit(lambda: schedule_processing(self.object.pk))
+        return super().form_valid(form)
+
 
-class ResponseCreateView(PermissionRequiredMixin, CreateView):
+class ResponseCreateView(AuthzPermissionRequiredMixin, CreateView):
     """
     View for creating a response to an advertisement.
     """
     raise_exception = True
     permission_required = 'ads.response_create'
     model = Response
-    ordering = '-created_at'
-    context_object_name = 'responses'
     fields = ['response_text']
     template_name = 'ads/response_create.html'
-    paginate_by = 5
 
     def form_valid(self, form):
         """
@@ -149,54 +273,103 @@ class ResponseDetailView(DetailView):
     View representing the details of a response.
     """
     model = Response
+    queryset = Response.objects.select_related('author')
     template_name = 'ads/response_detail.html'
+    query_budget = 3
+
+
+class WeeklyDigestView(LoginRequiredMixin, View):
+    """
+    View listing the adverts of the last week, read from the digest snapshot
+    shared with the weekly emails.
+
+    The page only reads the snapshot; the weekly task builds it, and until
+    then the page says the digest is not ready.
+    """
+    template_name = 'ads/weekly_digest.html'
+    # Session and user; the snapshot comes from the cache
+    query_budget = 3
+
+    def get(self, request):
+        """
+        Handle GET request for the "this week" page.
+        """
+        snapshot = find_snapshot()
+        context = {
+            'snapshot': snapshot,
+            'adverts': digest_items(snapshot) if snapshot else [],
+        }
+        return render(request, self.template_name, context)
 
 
 class PrivatePageView(LoginRequiredMixin, View):
     """
     View for the private page of the user.
+
+    Adverts and responses are shown one keyset page at a time, so the page
+    costs the same however long the account has been active.
     """
     template_name = 'ads/private_page.html'
+    paginate_by = 15
+    adverts_paginate_by = 20
+    # POST: session, user, authz, then creating the group on first use and adding the user
+    query_budget = {'GET': 5, 'POST': 6}
 
     def get(self, request):
         """
         Handle GET request for the private page.
         """
         user = request.user
-        adverts = Advert.objects.filter(user=user)
-        responses = Response.objects.filter(advert__user=user)
-        is_author = Profile.objects.filter(user=user, is_author=True).exists()
+        try:
+            adverts = CursorPaginator(Advert.objects.for_owner(user), self.adverts_paginate_by).page(
+                request.GET.get('adverts_cursor')
+            )
+            responses = CursorPaginator(Response.objects.for_owner_dashboard(user), self.paginate_by).page(
+                request.GET.get('cursor')
+            )
+        except InvalidCursor:
+            raise Http404('Invalid cursor.')
 
         context = {
             'adverts': adverts,
             'responses': responses,
-            'is_author': is_author,
+            'is_author': request.authz.is_author,
         }
         return render(request, self.template_name, context)
 
     def post(self, request):
         """
-        Handle POST request for the private page.
+        Handle POST request for the private page, making the user an author
+        and redirecting to the page.
         """
-        user = request.user
-
-        if not Profile.objects.filter(user=user, is_author=True).exists():
+        if not request.authz.is_author:
             author_group = Group.objects.get_or_create(name='authors')[0]
-            user.groups.add(author_group)
-            user.save()
-            is_author = True
-        else:
-            is_author = False
+            request.user.groups.add(author_group)
+        return redirect('ads:private')
 
-        adverts = Advert.objects.filter(user=user)
-        responses = Response.objects.filter(advert__user=user)
 
-        context = {
-            'adverts': adverts,
-            'responses': responses,
-            'is_author': is_author,
-        }
-        return render(request, self.template_name, context)
+class OwnerFeedView(LoginRequiredMixin, View):
+    """
+    JSON feed of the responses to the adverts of the user since a position.
+
+    ``since`` takes the cursor of the previous call, the id of the last
+    seen response or a timestamp; see ``ads.feed.owner_feed``.
+    """
+    query_budget = 4
+
+    def get(self, request):
+        """
+        Handle GET request for the feed.
+        """
+        try:
+            rows, cursor, has_more = owner_feed(request.user, request.GET.get('since'))
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid since.'}, status=400)
+        return JsonResponse({
+            'responses': [feed_item(response) for response in rows],
+            'cursor': cursor,
+            'has_more': has_more,
+        })
 
 
 class AcceptResponseView(LoginRequiredMixin, View):
@@ -209,8 +382,7 @@ class AcceptResponseView(LoginRequiredMixin, View):
         Handle GET request for accepting a response.
         """
         response = get_object_or_404(Response, pk=response_id)
-        response.accepted = True
-        response.save()
+        response.accept()
         return redirect('ads:private')
 
     def post(self, request, response_id):
@@ -218,8 +390,7 @@ class AcceptResponseView(LoginRequiredMixin, View):
         Handle POST request for accepting a response.
         """
         response = get_object_or_404(Response, pk=response_id)
-        response.accepted = True
-        response.save()
+        response.accept()
         return redirect('ads:private')
 
 
@@ -249,24 +420,139 @@ class DeleteResponseView(LoginRequiredMixin, View):
         return redirect('ads:private')
 
 
-class LikeView(View):
+class TriageResponsesView(LoginRequiredMixin, View):
     """
-    View for liking a response.
+    Accept, reject or delete many responses to the adverts of the user at once.
+
+    Takes a JSON body ``{"ids": [1, 2], "action": "accept"}``, action being
+    one of ``TRIAGE_ACTIONS``; ids that do not exist or answer someone
+    else's adverts are returned as ``skipped``.
     """
+    # Session, user and ownership check, then up to five statements per action
+    query_budget = 8
+
+    def post(self, request):
+        """
+        Handle POST request, triaging the responses.
+        """
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            data = None
+        ids = data.get('ids') if isinstance(data, dict) else None
+        action = data.get('action') if isinstance(data, dict) else None
+        # bool is an int subclass, but no id
+        if (not isinstance(ids, list) or not isinstance(action, str)
+                or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)):
+            return JsonResponse({'error': 'Expected {"ids": [integers], "action": "..."}.'}, status=400)
+        ids = set(ids)
+        if action not in TRIAGE_ACTIONS:
+            return JsonResponse({'error': f'Unknown action {action}.'}, status=400)
+        if len(ids) > settings.RESPONSE_TRIAGE_MAX_IDS:
+            return JsonResponse({'error': f'At most {settings.RESPONSE_TRIAGE_MAX_IDS} ids.'}, status=400)
+
+        with transaction.atomic():
+            owned, changed = triage_responses(request.user, ids, action)
+        return JsonResponse({
+            'action': action,
+            'ids': sorted(owned),
+            'skipped': sorted(ids.difference(owned)),
+            'changed': changed,
+        })
+
+
+class VoteView(LoginRequiredMixin, View):
+    """
+    Base view for voting on a response.
+    """
+    value = None
 
     def post(self, request, pk):
         """
-        Handle POST request for liking a response.
+        Handle POST request for voting on a response.
+
+        A repeated vote of the same user is ignored.
         """
-        response = get_object_or_404(Response, pk=pk)
-        response.likes += 1
-        response.save()
-        return redirect('ads:advert-detail', pk=response.article.pk)
+        response = get_object_or_404(Response.objects.only('id', 'advert_id'), pk=pk)
+        try:
+            cast_vote(response.pk, request.user, self.value)
+        except DuplicateVote:
+            pass
+        return redirect('ads:advert-detail', pk=response.advert_id)
 
 
-class DislikeView(View):
-    def post(self, request, pk):
-        response = get_object_or_404(Response, pk=pk)
-        response.dislikes += 1
-        response.save()
-        return redirect('ads:advert-detail', pk=response.article.pk)
+class LikeView(VoteView):
+    """
+    View for liking a response.
+    """
+    value = ResponseVote.LIKE
+
+
+class DislikeView(VoteView):
+    """
+    View for disliking a response.
+    """
+    value = ResponseVote.DISLIKE
+
+
+class MediaView(View):
+    """
+    View serving uploaded files.
+
+    Files are streamed or handed to the web server, never read in memory.
+    Content-addressed files never change and are cached for good. Only
+    stored uploads and thumbnails are served, not the other files of
+    ``MEDIA_ROOT`` such as the uploads in progress.
+    """
+
+    def get(self, request, name):
+        """
+        Handle GET request for an uploaded file, honouring byte ranges.
+        """
+        storage = Advert._meta.get_field('upload').storage
+        try:
+            path = storage.path(name)
+        except SuspiciousFileOperation:
+            raise Http404('Invalid file name.')
+        # The name as resolved, so 'blobs/../tmp/...' is not taken for a blob
+        name = os.path.relpath(path, storage.path('')).replace(os.sep, '/')
+        if not storage.is_stored(name) or not os.path.isfile(path):
+            raise Http404('No such file.')
+        return serve_file(request, path, name, immutable=storage.is_blob(name))
+
+
+class ExportView(UserPassesTestMixin, View):
+    """
+    Staff-only view streaming adverts or responses as CSV or JSON lines.
+
+    Takes the advert list filters, plus ``format`` ('csv' or 'jsonl') and
+    ``gzip=1`` to compress the stream. Rows are read in keyset chunks while
+    the response is sent, so memory does not grow with the table.
+    """
+
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, kind):
+        """
+        Handle GET request for an export.
+        """
+        fmt = request.GET.get('format', 'csv')
+        if kind not in EXPORTS or fmt not in FORMATS:
+            raise Http404('Unknown export.')
+        compress = request.GET.get('gzip') == '1'
+        content = export(kind, fmt, export_queryset(kind, request.GET), compress=compress)
+        if isinstance(request, ASGIRequest):
+            content = aiterate(content)
+
+        filename = f'{kind}-{datetime.utcnow():%Y%m%d}.{fmt}'
+        if compress:
+            filename += '.gz'
+        response = StreamingHttpResponse(
+            content,
+            content_type='application/gzip' if compress else f'{FORMATS[fmt]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from ads_board.disconnect import DisconnectMiddleware
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ads_board.settings')
+# Serve the hot read views with their async implementations
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
-application = get_asgi_application()
+# Let streaming views (live events, exports) stop when their client leaves
+application = DisconnectMiddleware(get_asgi_application())
@@ -0,0 +1,7 @@
+"""
+Benchmark harness for the ads board.
+
+``drivers`` issues requests against the real URL routes through the Django
+test client or in-process WSGI/ASGI load generators, ``suite`` defines the
+scenarios, collects the results and compares runs.
+"""
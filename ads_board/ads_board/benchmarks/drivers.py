@@ -0,0 +1,141 @@
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import Client
+
+HOST = 'testserver'
+
+
+def split_path(path):
+    path, _, query = path.partition('?')
+    return path, query
+
+
+def run_client(path, requests, session_key, concurrency=1):
+    """
+    Issue ``requests`` sequential GET requests through the Django test client.
+
+    Returns:
+        list[tuple]: (latency in seconds, status code) per request.
+    """
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+    results = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        results.append((time.perf_counter() - start, response.status_code))
+    return results
+
+
+def run_wsgi(path, requests, session_key, concurrency=8):
+    """
+    Issue GET requests to the WSGI application from ``concurrency`` threads.
+
+    Returns:
+        list[tuple]: (latency in seconds, status code) per request.
+    """
+    handler = WSGIHandler()
+    path_info, query = split_path(path)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={session_key}'
+
+    def one(_):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path_info,
+            'QUERY_STRING': query,
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': HOST,
+            'HTTP_COOKIE': cookie,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(b''),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        start = time.perf_counter()
+        body = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return time.perf_counter() - start, int(status[0].split()[0])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def run_asgi(path, requests, session_key, concurrency=64):
+    """
+    Issue GET requests to the ASGI application with ``concurrency`` requests
+    in flight on one event loop.
+
+    Returns:
+        list[tuple]: (latency in seconds, status code) per request.
+    """
+    handler = ASGIHandler()
+    path_info, query = split_path(path)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={session_key}'.encode()
+
+    async def one(semaphore):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path_info,
+            'raw_path': path_info.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', HOST.encode()), (b'cookie', cookie)],
+            'server': (HOST, 80),
+            'client': ('127.0.0.1', 0),
+        }
+        done = asyncio.Event()
+        requested = []
+        status = []
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                done.set()
+
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            return time.perf_counter() - start, status[0]
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*[one(semaphore) for _ in range(requests)])
+
+    return asyncio.run(run())
+
+
+DRIVERS = {
+    'client': run_client,
+    'wsgi': run_wsgi,
+    'asgi': run_asgi,
+}
@@ -0,0 +1,237 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import connection
+
+HOST = '127.0.0.1'
+
+# Command line of each server, run from the project directory; {port} is
+# replaced by a free port
+SERVERS = {
+    # The current deployment: Django's threaded WSGI server
+    'wsgi-server': [sys.executable, 'manage.py', 'runserver', '--noreload', '--skip-checks', f'{HOST}:{{port}}'],
+    # uvicorn with the async read views
+    'uvicorn': [sys.executable, '-m', 'uvicorn', 'ads_board.asgi:application',
+                '--host', HOST, '--port', '{port}', '--log-level', 'warning', '--no-access-log'],
+    # uvicorn with the sync views, to tell the server from the views apart
+    'uvicorn-sync': [sys.executable, '-m', 'uvicorn', 'ads_board.asgi:application',
+                     '--host', HOST, '--port', '{port}', '--log-level', 'warning', '--no-access-log'],
+}
+
+# Environment of each server on top of the settings and database
+SERVER_ENV = {
+    'wsgi-server': {},
+    'uvicorn': {'ASYNC_VIEWS': '1'},
+    'uvicorn-sync': {'ASYNC_VIEWS': '0'},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(process, port, timeout=30):
+    """
+    Wait until the server listens on ``port``.
+
+    Raises:
+        RuntimeError: If the server exits or does not listen in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'The server exited with status {process.returncode}.')
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'The server did not listen on port {port} in {timeout} seconds.')
+
+
+@contextmanager
+def server(name, database=None):
+    """
+    Run the board in a server process for the duration of the block.
+
+    The server uses the current settings module and the database of the
+    default connection, so it serves the benchmark dataset.
+
+    Args:
+        name (str): The server, a key of ``SERVERS``.
+        database (str): The SQLite file to serve, the default database if None.
+
+    Yields:
+        tuple: The server process and the port it listens on.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        'DATABASE_NAME': str(database or connection.settings_dict['NAME']),
+        **SERVER_ENV[name],
+    }
+    command = [part.format(port=port) for part in SERVERS[name]]
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(process, port)
+        yield process, port
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+@contextmanager
+def serve(name, database=None):
+    """
+    Run the board in a server process, see ``server``.
+
+    Yields:
+        callable: A driver issuing requests to the server, see ``run_http``.
+    """
+    with server(name, database) as (_, port):
+        yield partial(run_http, port)
+
+
+def rss_kb(pid):
+    """
+    Return the resident memory of process ``pid`` in KiB, None if unknown.
+    """
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_http(port, path, requests, session_key, concurrency=64):
+    """
+    Issue GET requests over HTTP with ``concurrency`` requests in flight,
+    one connection per request.
+
+    Returns:
+        list[tuple]: (latency in seconds, status code) per request.
+    """
+    request = (
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {HOST}\r\n'
+        f'Cookie: {settings.SESSION_COOKIE_NAME}={session_key}\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode()
+
+    async def one(semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            reader, writer = await asyncio.open_connection(HOST, port)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await reader.readline()
+                # Read the rest of the response up to the closed connection
+                while await reader.read(65536):
+                    pass
+            finally:
+                writer.close()
+            return time.perf_counter() - start, int(status_line.split()[1])
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*[one(semaphore) for _ in range(requests)])
+
+    return asyncio.run(run())
+
+
+def run_sse(port, path, session_key, connections, pid=None, fanout=None, timeout=60):
+    """
+    Open ``connections`` Server-Sent Events streams and hold them idle.
+
+    Args:
+        port (int): The port of the server.
+        path (str): The path of the stream.
+        session_key (str): The session of the user listening.
+        connections (int): The number of streams to open.
+        pid (int): The server process, to measure its memory.
+        fanout (callable): Called once every stream is open to publish one
+            event to the user; the time until every stream received it is
+            measured.
+        timeout (float): Seconds to wait for the streams and the event.
+
+    Returns:
+        dict: The metrics of the run.
+    """
+    request = (
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {HOST}\r\n'
+        f'Cookie: {settings.SESSION_COOKIE_NAME}={session_key}\r\n'
+        'Accept: text/event-stream\r\n\r\n'
+    ).encode()
+
+    async def open_stream(semaphore):
+        async with semaphore:
+            reader, writer = await asyncio.open_connection(HOST, port)
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            if int(status_line.split()[1]) != 200:
+                writer.close()
+                raise RuntimeError(status_line.decode().strip())
+            # Headers, then the first message (the reconnection delay)
+            await reader.readuntil(b'\r\n\r\n')
+            await reader.readuntil(b'\n\n')
+            return reader, writer
+
+    async def run():
+        rss_before = rss_kb(pid) if pid else None
+        # Connect in bounded bursts, as browsers reconnecting would
+        semaphore = asyncio.Semaphore(100)
+        start = time.perf_counter()
+        results = await asyncio.wait_for(
+            asyncio.gather(*[open_stream(semaphore) for _ in range(connections)], return_exceptions=True),
+            timeout,
+        )
+        connect_seconds = time.perf_counter() - start
+        streams = [result for result in results if not isinstance(result, BaseException)]
+        rss_after = rss_kb(pid) if pid else None
+
+        fanout_ms = None
+        if fanout is not None and streams:
+            start = time.perf_counter()
+            await asyncio.to_thread(fanout)
+            await asyncio.wait_for(
+                asyncio.gather(*[reader.readuntil(b'event: ') for reader, _ in streams]), timeout
+            )
+            fanout_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        for _, writer in streams:
+            writer.close()
+        metrics = {
+            'connections': len(streams),
+            'errors': len(results) - len(streams),
+            'connect_seconds': round(connect_seconds, 3),
+            'fanout_ms': fanout_ms,
+        }
+        if rss_before is not None and rss_after is not None:
+            metrics.update(
+                server_rss_kb=rss_after,
+                rss_kb_per_connection=round((rss_after - rss_before) / max(len(streams), 1), 2),
+            )
+        return metrics
+
+    return asyncio.run(run())
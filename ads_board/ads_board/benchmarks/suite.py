@@ -0,0 +1,337 @@
+import platform
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from functools import partial
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core import mail
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from ads.events import publish
+from ads.export import export
+from ads.models import Advert, Response
+from ads_board import instrumentation
+from ads_board.celery import app as celery_app
+from ads_board.instrumentation import percentile
+from ads_board.routers import read_from
+from .drivers import DRIVERS
+from .servers import SERVERS, run_sse, serve, server
+
+# Request scenarios: name -> callable building the path from the context
+SCENARIOS = {
+    'advert-list': lambda ctx: '/ads/',
+    'advert-list-deep': lambda ctx: f'/ads/?page={ctx["deep_page"]}',
+    'advert-search': lambda ctx: '/ads/?' + urlencode({'add_title': 'меч'}),
+    'advert-popular': lambda ctx: '/ads/?sort=popular',
+    'advert-detail': lambda ctx: f'/ads/advert/{ctx["advert_id"]}/',
+    'advert-responses': lambda ctx: f'/ads/advert/{ctx["advert_id"]}/responses/',
+    'private-page': lambda ctx: '/ads/private/',
+    'response-list': lambda ctx: '/users/profile/responses/',
+}
+
+# Scenarios not driven over HTTP
+TASK_SCENARIOS = ('weekly-digest', 'write-contention', 'export', 'live-events')
+
+# Variants of the export scenario: (kind, format, gzip)
+EXPORT_VARIANTS = (
+    ('adverts', 'csv', False),
+    ('adverts', 'jsonl', False),
+    ('adverts', 'csv', True),
+    ('responses', 'csv', False),
+    ('responses', 'jsonl', True),
+)
+
+
+def build_context():
+    """
+    Pick the acting user and sample objects the scenarios need.
+
+    The acting user owns the oldest advert, so the private page has data.
+
+    Returns:
+        dict: The scenario context, including a logged in session key.
+    """
+    advert = Advert.objects.order_by('pk').select_related('user').first()
+    if advert is None:
+        raise ValueError('The benchmark dataset has no adverts.')
+    user = advert.user
+    # Through the configured engine, so cache-backed sessions start warm
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return {
+        'session_key': session.session_key,
+        'user_id': user.pk,
+        'advert_id': advert.pk,
+        'deep_page': max(Advert.objects.count() // 15 // 2, 1),
+    }
+
+
+def summarize(latencies, elapsed, samples):
+    """
+    Turn raw latencies and profiling samples into the recorded metrics.
+    """
+    millis = [latency * 1000 for latency in latencies]
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(millis, 50), 3),
+        'p95_ms': round(percentile(millis, 95), 3),
+        'p99_ms': round(percentile(millis, 99), 3),
+        'queries': round(sum(s['db_count'] for s in samples) / len(samples), 2) if samples else None,
+        'session_queries': round(
+            sum(count for s in samples for sql, count in s['sql'].items() if 'django_session' in sql)
+            / len(samples), 2
+        ) if samples else None,
+    }
+
+
+def run_scenario(name, driver, ctx, requests, concurrency, warmup=5, run=None):
+    """
+    Run one request scenario with one driver.
+
+    Returns:
+        dict: The metrics of the run.
+    """
+    path = SCENARIOS[name](ctx)
+    run = run or DRIVERS[driver]
+    run(path, warmup, ctx['session_key'], concurrency=1)
+    instrumentation.buffer.clear()
+    with override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_REDIS_URL=None, PROFILING_LOCAL_BUFFER=True):
+        start = time.perf_counter()
+        results = run(path, requests, ctx['session_key'], concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+    errors = sum(1 for _, status in results if status >= 400)
+    metrics = summarize([latency for latency, _ in results], elapsed, instrumentation.buffer.snapshot())
+    metrics.update(driver=driver, path=path, concurrency=concurrency, errors=errors)
+    return metrics
+
+
+def run_weekly_digest():
+    """
+    Run the weekly digest task in process and measure it.
+
+    Rendering cost is reported as the number of subscription segments and
+    of digest bodies rendered, next to the number of emails.
+
+    Returns:
+        dict: The metrics of the run, throughput in emails per second.
+    """
+    from ads_board.tasks.tasks import send_email
+
+    eager = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    try:
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            mail.outbox = []
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                summary = send_email()
+                elapsed = time.perf_counter() - start
+            sent = len(mail.outbox)
+            mail.outbox = []
+    finally:
+        celery_app.conf.task_always_eager = eager
+    return {
+        'driver': 'task',
+        'emails': sent,
+        'segments': summary['segments'],
+        'renders': summary['renders'],
+        'seconds': round(elapsed, 3),
+        'throughput': round(sent / elapsed, 2) if elapsed else 0,
+        'queries': len(queries.captured_queries),
+    }
+
+
+def run_write_contention(requests, concurrency):
+    """
+    Run read-then-write transactions on responses, as votes and acceptances
+    do, from ``concurrency`` threads, interleaved with advert page reads
+    through the read alias.
+
+    Failed operations ("database is locked") are counted as errors.
+
+    Returns:
+        dict: The metrics of the run.
+    """
+    response_ids = list(Response.objects.order_by('pk').values_list('pk', flat=True)[:1000])
+    if not response_ids:
+        raise ValueError('The benchmark dataset has no responses.')
+
+    def write(pk):
+        with transaction.atomic():
+            Response.objects.filter(pk=pk).values_list('likes', flat=True).first()
+            Response.objects.filter(pk=pk).update(likes=F('likes') + 1)
+
+    read_alias = settings.DATABASE_READ_ALIAS if settings.DATABASE_READ_ALIAS in connections else None
+
+    def read():
+        with read_from(read_alias):
+            list(Advert.objects.order_by('-created_at', '-pk')[:15])
+
+    def one(index):
+        start = time.perf_counter()
+        try:
+            if index % 2:
+                read()
+            else:
+                write(response_ids[index % len(response_ids)])
+        except OperationalError:
+            return time.perf_counter() - start, 500
+        return time.perf_counter() - start, 200
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+    errors = sum(1 for _, status in results if status >= 400)
+    metrics = summarize([latency for latency, _ in results], elapsed, [])
+    # Failures return at once; only completed operations count as throughput
+    metrics.update(driver='threads', concurrency=concurrency, errors=errors,
+                   throughput=round((len(results) - errors) / elapsed, 2))
+    return metrics
+
+
+def run_export(kind, fmt, compress):
+    """
+    Run a full export in process, discarding the output, and measure it.
+
+    The peak of memory allocated while exporting is traced, so an export
+    holding the table in memory shows up as a regression next to one
+    streaming it in chunks.
+
+    Returns:
+        dict: The metrics of the run, throughput in rows per second.
+    """
+    rows = Advert.objects.count() if kind == 'adverts' else Response.objects.count()
+    size = 0
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            # Read from the default alias so its queries are captured
+            for chunk in export(kind, fmt, compress=compress, using=DEFAULT_DB_ALIAS):
+                size += len(chunk)
+            elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'driver': 'task',
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(elapsed, 3),
+        'throughput': round(rows / elapsed, 2) if elapsed else 0,
+        'mb_per_second': round(size / elapsed / 2 ** 20, 2) if elapsed else 0,
+        'peak_memory_kb': round(peak / 1024),
+        'queries': len(queries.captured_queries),
+    }
+
+
+def run_live_events(ctx, connections):
+    """
+    Hold ``connections`` idle live event streams of one user open on one
+    uvicorn worker, and measure what they cost the worker.
+
+    With ADS_EVENTS_REDIS_URL set, one event is then published to the user
+    from this process, and the time until every stream received it is
+    reported as ``fanout_ms``.
+
+    Returns:
+        dict: The metrics of the run.
+    """
+    fanout = None
+    if settings.ADS_EVENTS_REDIS_URL:
+        fanout = partial(publish, [(ctx['user_id'], 'ping', {})])
+    with server('uvicorn') as (process, port):
+        metrics = run_sse(port, '/ads/events/', ctx['session_key'], connections, pid=process.pid, fanout=fanout)
+    metrics.update(driver='uvicorn')
+    return metrics
+
+
+def run_suite(scenarios, drivers, requests, concurrency, meta=None, log=print, connections=2000):
+    """
+    Run the selected scenarios with every selected driver.
+
+    Drivers naming one of ``SERVERS`` start that server in its own process
+    for the whole run and drive it over HTTP; query counts are not
+    recorded for them. ``connections`` is the number of live event streams
+    held open by the live-events scenario.
+
+    Returns:
+        dict: The results document, ready to be written as JSON.
+    """
+    ctx = build_context()
+    results = {}
+    with ExitStack() as stack:
+        runners = {
+            driver: stack.enter_context(serve(driver)) if driver in SERVERS else DRIVERS[driver]
+            for driver in drivers
+        }
+        for name in scenarios:
+            if name == 'export':
+                for kind, fmt, compress in EXPORT_VARIANTS:
+                    key = f'{name}[{kind}.{fmt}{".gz" if compress else ""}]'
+                    results[key] = run_export(kind, fmt, compress)
+                    log(f'{key}: {results[key]}')
+                continue
+            if name == 'live-events':
+                results[name] = run_live_events(ctx, connections)
+                log(f'{name}: {results[name]}')
+                continue
+            if name in TASK_SCENARIOS:
+                if name == 'write-contention':
+                    results[name] = run_write_contention(requests, concurrency)
+                else:
+                    results[name] = run_weekly_digest()
+                log(f'{name}: {results[name]}')
+                continue
+            for driver in drivers:
+                key = f'{name}[{driver}]'
+                results[key] = run_scenario(name, driver, ctx, requests, concurrency, run=runners[driver])
+                log(f'{key}: {results[key]}')
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            **(meta or {}),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two results documents.
+
+    A scenario regresses when its throughput drops, or its p95 latency or
+    query count grows, by more than ``threshold`` (a fraction), or when it
+    has more failed requests.
+
+    Returns:
+        list[str]: One message per regression.
+    """
+    regressions = []
+    for key, now in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        if before.get('throughput') and now['throughput'] < before['throughput'] * (1 - threshold):
+            regressions.append(f'{key}: throughput {before["throughput"]} -> {now["throughput"]}')
+        if before.get('p95_ms') and now['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f'{key}: p95 {before["p95_ms"]} ms -> {now["p95_ms"]} ms')
+        if before.get('queries') and now.get('queries') and now['queries'] > before['queries'] * (1 + threshold):
+            regressions.append(f'{key}: queries {before["queries"]} -> {now["queries"]}')
+        if now.get('errors', 0) > before.get('errors', 0):
+            regressions.append(f'{key}: errors {before.get("errors", 0)} -> {now["errors"]}')
+    return regressions
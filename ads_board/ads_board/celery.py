@@ -11,14 +11,30 @@ app = Celery('ads_board')
 # Configure Celery using the Django settings
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-# Automatically discover tasks in the app
+# Automatically discover tasks in the apps and in the project package
 app.autodiscover_tasks()
+app.autodiscover_tasks(['ads_board'])
 
 # Configure the Celery beat schedule
 app.conf.beat_schedule = {
+    'build_digest_snapshot_every_monday': {
+        'task': 'ads_board.tasks.build_digest_snapshot',
+        'schedule': crontab(hour=0, minute=5, day_of_week='monday'),
+        'args': (),
+    },
     'send_email_every_monday_8am': {
         'task': 'ads_board.tasks.send_email',
         'schedule': crontab(hour=8, minute=0, day_of_week='monday'),
         'args': (),
     },
+    'flush_response_votes_every_10_seconds': {
+        'task': 'ads_board.tasks.flush_response_votes',
+        'schedule': 10.0,
+        'args': (),
+    },
+    'deliver_outbox_every_minute': {
+        'task': 'ads_board.tasks.deliver_outbox',
+        'schedule': 60.0,
+        'args': (),
+    },
 }
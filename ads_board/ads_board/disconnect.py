@@ -0,0 +1,60 @@
+import asyncio
+from contextvars import ContextVar
+
+# Event set when the client of the current ASGI request goes away
+_disconnected = ContextVar('client_disconnected', default=None)
+
+
+def client_disconnected():
+    """
+    Return the event set when the client of the current request disconnects.
+
+    Returns:
+        asyncio.Event: The event, or None outside ``DisconnectMiddleware``
+            (WSGI, tests).
+    """
+    return _disconnected.get()
+
+
+class DisconnectMiddleware:
+    """
+    ASGI middleware telling streaming views that their client is gone.
+
+    Django 4.2 reads the request body and then never looks at the ASGI
+    receive channel again, so a long-lived stream (Server-Sent Events, an
+    export) keeps running after the client disconnects. Once the response
+    has started, this middleware waits for ``http.disconnect`` on the
+    channel and sets the event returned by ``client_disconnected``; what is
+    sent afterwards is dropped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        disconnected = asyncio.Event()
+        watcher = None
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def watched_send(message):
+            nonlocal watcher
+            # The body has been read by now, the channel is free to watch
+            if watcher is None and message['type'] == 'http.response.start':
+                watcher = asyncio.ensure_future(watch())
+            if not disconnected.is_set():
+                await send(message)
+
+        token = _disconnected.set(disconnected)
+        try:
+            await self.app(scope, receive, watched_send)
+        finally:
+            _disconnected.reset(token)
+            if watcher is not None:
+                watcher.cancel()
@@ -0,0 +1,327 @@
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+# Redis list receiving flushed samples
+REDIS_KEY = 'ads_board:profiling'
+
+# Seconds a flush may wait on Redis before the samples are dropped
+REDIS_TIMEOUT = 0.5
+
+# Placeholder lists of IN clauses, whose length varies between queries
+SQL_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+# Characters of SQL kept per statement fingerprint
+SQL_FINGERPRINT_LENGTH = 200
+
+# Sample of the request being handled in the current thread/task
+_current = ContextVar('profiling_sample', default=None)
+# Execute wrappers of the request being handled in the current thread/task
+_query_wrappers = ContextVar('query_wrappers', default=())
+_redis = None
+_template_timer_installed = False
+
+
+class RingBuffer:
+    """
+    Bounded, thread-safe buffer of the most recent request samples.
+    """
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def append(self, sample):
+        with self.lock:
+            if settings.PROFILING_LOCAL_BUFFER:
+                self.samples.append(sample)
+            if not settings.PROFILING_REDIS_URL:
+                return
+            self.pending.append(sample)
+            if len(self.pending) < settings.PROFILING_FLUSH_EVERY:
+                return
+            pending, self.pending = self.pending, []
+        flush_to_redis(pending)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.samples)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.pending = []
+
+
+buffer = RingBuffer(settings.PROFILING_BUFFER_SIZE)
+
+
+def get_redis():
+    """
+    Return the Redis client receiving flushed samples, or None if not set up.
+    """
+    global _redis
+    if not settings.PROFILING_REDIS_URL:
+        return None
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.PROFILING_REDIS_URL, socket_timeout=REDIS_TIMEOUT,
+                                      socket_connect_timeout=REDIS_TIMEOUT)
+    return _redis
+
+
+def flush_to_redis(samples):
+    """
+    Push samples to the Redis list, keeping it at the ring buffer size.
+
+    It runs on the request that filled the batch: a Redis outage only loses
+    the batch, logged, and never fails the request.
+
+    Args:
+        samples (list[dict]): The samples to push.
+    """
+    client = get_redis()
+    if client is None or not samples:
+        return
+    pipe = client.pipeline()
+    pipe.lpush(REDIS_KEY, *[json.dumps(sample) for sample in samples])
+    pipe.ltrim(REDIS_KEY, 0, settings.PROFILING_BUFFER_SIZE - 1)
+    try:
+        pipe.execute()
+    except redis.RedisError:
+        logger.warning('Could not flush %d profiling samples to Redis', len(samples), exc_info=True)
+
+
+def load_from_redis():
+    """
+    Return the samples flushed to Redis by every process, newest first.
+    """
+    client = get_redis()
+    if client is None:
+        return []
+    return [json.loads(raw) for raw in client.lrange(REDIS_KEY, 0, -1)]
+
+
+def profiling_enabled():
+    """
+    Whether requests are sampled: samples need somewhere to go, Redis or the
+    in-process ring buffer the benchmarks read.
+    """
+    return bool(settings.PROFILING_SAMPLE_RATE
+                and (settings.PROFILING_REDIS_URL or settings.PROFILING_LOCAL_BUFFER))
+
+
+def sql_fingerprint(sql):
+    """
+    Return the statement of ``sql``, whatever the length of its IN lists,
+    with whitespace collapsed and cut to ``SQL_FINGERPRINT_LENGTH``.
+
+    Args:
+        sql (str): A parametrized SQL statement.
+
+    Returns:
+        str: The fingerprint.
+    """
+    return ' '.join(SQL_PLACEHOLDER_LIST.sub('%s, ...', sql).split())[:SQL_FINGERPRINT_LENGTH]
+
+
+def note_cache(hit):
+    """
+    Count a cache hit or miss against the request being profiled, if any.
+
+    Args:
+        hit (bool): Whether the lookup was a hit.
+    """
+    sample = _current.get()
+    if sample is not None:
+        sample['cache_hits' if hit else 'cache_misses'] += 1
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """
+    Run ``wrapper`` around every query of the block, as ``execute_wrapper``.
+
+    Unlike ``connection.execute_wrapper`` it follows the context rather than
+    the connection objects of the current thread, so it also sees the
+    queries async code runs in worker threads through ``sync_to_async``.
+
+    Args:
+        wrapper (callable): An execute wrapper, see ``execute_wrapper``.
+    """
+    token = _query_wrappers.set((*_query_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _query_wrappers.reset(token)
+
+
+def dispatch_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection, calling the wrappers
+    registered with ``wrap_queries`` in the current context.
+    """
+    for wrapper in reversed(_query_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_dispatch(connection, **kwargs):
+    """
+    Signal receiver function adding ``dispatch_query`` to new connections.
+    """
+    if dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_query)
+
+
+connection_created.connect(install_query_dispatch)
+
+
+def install_template_timer():
+    """
+    Wrap the Django template backend so render time is added to the sample.
+
+    Only top-level renders (``render_to_string``, ``TemplateResponse``) go
+    through the backend, so includes and extends are not counted twice.
+    """
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    _template_timer_installed = True
+    render = Template.render
+
+    def timed_render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return render(self, context, request)
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            sample['template_time'] += time.perf_counter() - start
+
+    Template.render = timed_render
+
+
+def percentile(values, pct):
+    """
+    Return the nearest-rank percentile of ``values``.
+
+    Args:
+        values (list[float]): The values, in any order.
+        pct (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, 0 for no values.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class ProfilingMiddleware:
+    """
+    Middleware recording wall time, database queries and time, template
+    render time and cache hits/misses of a sample of requests.
+
+    Samples are keyed by URL name and flushed to Redis, or kept in the
+    in-process ring buffer with ``PROFILING_LOCAL_BUFFER``.
+    ``PROFILING_SAMPLE_RATE`` is the fraction of requests recorded; 0, or
+    neither destination, turns the middleware into a pass-through. Works in
+    both sync and async middleware chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_template_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not profiling_enabled() or random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        sample, time_query = self.new_sample(request)
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            with wrap_queries(time_query):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(sample, request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not profiling_enabled() or random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        sample, time_query = self.new_sample(request)
+        token = _current.set(sample)
+        start = time.perf_counter()
+        try:
+            with wrap_queries(time_query):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(sample, request, response, time.perf_counter() - start)
+        return response
+
+    def new_sample(self, request):
+        """
+        Return an empty sample for ``request`` and the execute wrapper filling it.
+        """
+        sample = {
+            'view': None,
+            'method': request.method,
+            'status': None,
+            'wall_time': 0.0,
+            'db_count': 0,
+            'db_time': 0.0,
+            'template_time': 0.0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            # Executions of each statement, by fingerprint
+            'sql': {},
+        }
+
+        def time_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                sample['db_time'] += time.perf_counter() - start
+                sample['db_count'] += 1
+                fingerprint = sql_fingerprint(sql)
+                sample['sql'][fingerprint] = sample['sql'].get(fingerprint, 0) + 1
+
+        return sample, time_query
+
+    def record(self, sample, request, response, wall_time):
+        sample['wall_time'] = wall_time
+        sample['status'] = response.status_code
+        match = request.resolver_match
+        sample['view'] = match.view_name if match else request.path
+        buffer.append(sample)
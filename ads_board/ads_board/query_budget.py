@@ -0,0 +1,92 @@
+import logging
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from ads_board.instrumentation import wrap_queries
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_RE = re.compile(r'\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE SAVEPOINT)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised in 'raise' mode when a view runs more queries than its budget.
+    """
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware checking the number of database queries of each request
+    against the ``query_budget`` declared by the view, either a number or a
+    dict mapping HTTP methods to numbers.
+
+    ``QUERY_BUDGET_MODE`` selects what happens on overrun: 'raise' fails the
+    request with ``QueryBudgetExceeded`` (meant for the test suite), 'warn'
+    logs a warning and None disables the check. Views without a budget are
+    never checked. The budget covers the whole request, session and user
+    lookups included. Works in both sync and async middleware chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = settings.QUERY_BUDGET_MODE
+        if not mode:
+            return self.get_response(request)
+
+        executed = []
+        with wrap_queries(self.counter(executed)):
+            response = self.get_response(request)
+        self.check(request, executed, mode)
+        return response
+
+    async def __acall__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if not mode:
+            return await self.get_response(request)
+
+        executed = []
+        with wrap_queries(self.counter(executed)):
+            response = await self.get_response(request)
+        self.check(request, executed, mode)
+        return response
+
+    def counter(self, executed):
+        """
+        Return an execute wrapper appending the SQL of counted queries to ``executed``.
+        """
+        def count_query(execute, sql, params, many, context):
+            # Transaction control statements are not counted
+            if not TRANSACTION_RE.match(sql):
+                executed.append(sql)
+            return execute(sql, params, many, context)
+
+        return count_query
+
+    def check(self, request, executed, mode):
+        budget = getattr(request, 'query_budget', None)
+        if isinstance(budget, dict):
+            budget = budget.get(request.method)
+        if budget is not None and len(executed) > budget:
+            message = (
+                f'{request.resolver_match.view_name} ran {len(executed)} queries, '
+                f'budget is {budget}:\n' + '\n'.join(executed)
+            )
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', view_func)
+        request.query_budget = getattr(view_class, 'query_budget', None)
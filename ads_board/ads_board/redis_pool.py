@@ -0,0 +1,27 @@
+import threading
+
+from redis import ConnectionPool
+
+
+class SharedConnectionPool(ConnectionPool):
+    """
+    Redis connection pool shared by every cache client of the process.
+
+    Django builds one cache backend, and so one pool, per thread and, under
+    ASGI, per request context. Returning the same pool for the same URL and
+    options keeps the number of Redis connections bounded by
+    ``max_connections`` per process instead. Pools reset themselves after a
+    fork.
+    """
+
+    _pools = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        key = (url, tuple(sorted(kwargs.items())))
+        with cls._lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls._pools[key] = super().from_url(url, **kwargs)
+        return pool
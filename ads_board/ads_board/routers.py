@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Alias reads are sent to in the current thread/task, None for the default
+_read_alias = ContextVar('read_alias', default=None)
+
+
+@contextmanager
+def read_from(alias):
+    """
+    Send the ORM reads of the block to the database ``alias``.
+
+    Args:
+        alias (str): The database alias, None for the default database.
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Database router sending reads made under ``read_from`` (as set up by
+    ``ReadReplicaMixin``) to the read alias and every write to the default
+    database. Migrations only run on the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReadReplicaMixin:
+    """
+    View mixin serving GET and HEAD requests from ``settings.DATABASE_READ_ALIAS``.
+
+    The response is rendered inside the view so that queries run by the
+    template go to the read alias too. Other methods, and everything outside
+    the view (sessions, middlewares), use the default database.
+    """
+
+    read_alias = settings.DATABASE_READ_ALIAS
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.read_alias not in connections:
+            return super().dispatch(request, *args, **kwargs)
+        with read_from(self.read_alias):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
+class AsyncReadReplicaMixin:
+    """
+    ``ReadReplicaMixin`` for async views.
+
+    The read alias is set in a context variable, which ``sync_to_async``
+    carries over to the thread running the async ORM's queries.
+    """
+
+    read_alias = settings.DATABASE_READ_ALIAS
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.read_alias not in connections:
+            return await super().dispatch(request, *args, **kwargs)
+        with read_from(self.read_alias):
+            response = await super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
@@ -35,6 +35,47 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Moscow'
 
+# Number of users handled by one weekly digest subtask
+WEEKLY_DIGEST_CHUNK_SIZE = 500
+
+# Use keyset (cursor) pagination instead of page numbers on the advert list
+ADVERT_LIST_CURSOR_PAGINATION = False
+
+# Route the hot read views (advert list and detail, response detail, private
+# page) to their async implementations in ads.async_views; asgi.py turns
+# this on, WSGI processes keep the sync views
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+
+# Full-text search backend for adverts (see ads.search.backends)
+ADS_SEARCH_BACKEND = 'ads.search.backends.SQLiteFTS5Backend'
+
+# Redis URL buffering response likes/dislikes before they are flushed to the
+# database in batches; None applies every vote immediately
+ADS_VOTE_BUFFER_URL = None
+
+# Live response notifications (Server-Sent Events, see ads.events): Redis
+# URL relaying events between processes (None delivers them in process
+# only), events queued per connected client, seconds between keep-alive
+# comments and milliseconds browsers wait before reconnecting
+ADS_EVENTS_REDIS_URL = None
+ADS_EVENTS_QUEUE_SIZE = 100
+ADS_EVENTS_HEARTBEAT = 15
+ADS_EVENTS_RETRY = 5000
+
+# What to do when a view exceeds its declared query_budget: 'raise' (use in
+# the test suite), 'warn' or None to skip the check
+QUERY_BUDGET_MODE = 'warn' if DEBUG else None
+
+# Request profiling: fraction of requests sampled, size of the in-process
+# ring buffer, samples per flush, Redis URL receiving them and whether to
+# also keep them in the ring buffer (read in process by the benchmarks).
+# With neither Redis nor the ring buffer, nothing is sampled
+PROFILING_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+PROFILING_BUFFER_SIZE = 10000
+PROFILING_FLUSH_EVERY = 100
+PROFILING_REDIS_URL = None
+PROFILING_LOCAL_BUFFER = False
+
 LOGIN_REDIRECT_URL = "/"
 LOGIN_URL = "/users/login"
 LOGOUT_REDIRECT_URL = "/users/login"
@@ -55,11 +96,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ads_board.instrumentation.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'ads_board.query_budget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.authz.AuthorizationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,6 +127,13 @@ EMAIL_USE_SSL = True
 DEFAULT_FROM_EMAIL = 'Ku79313081435@yandex.ru'
 SERVER_EMAIL = 'Ku79313081435@yandex.ru'
 
+# Outbox: emails delivered per batch, attempts before an email is moved to
+# dead letters, base retry delay and lease of a claimed batch (seconds)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 60
+OUTBOX_LEASE = 300
+
 ROOT_URLCONF = 'ads_board.urls'
 
 SITE_ID = 1
@@ -113,13 +164,112 @@ WSGI_APPLICATION = 'ads_board.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Pragmas run on every new SQLite connection: the WAL journal lets readers
+# work alongside the writer, and writers wait for the lock instead of
+# failing with "database is locked"
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,
+    'cache_size': -65536,
+    'busy_timeout': 5000,
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'ENGINE': 'ads_board.sqlite3',
+        'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+        # Persistent connections, in seconds
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pragmas': SQLITE_PRAGMAS},
+    },
+    # Read alias of read-only views: a separate, query-only connection to
+    # the same file unless DATABASE_REPLICA_NAME points at a replica
+    'replica': {
+        'ENGINE': 'ads_board.sqlite3',
+        'NAME': os.environ.get('DATABASE_REPLICA_NAME', os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3')),
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pragmas': {**SQLITE_PRAGMAS, 'query_only': 'ON'}},
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['ads_board.routers.ReadReplicaRouter']
+
+# Database alias serving the views using ReadReplicaMixin
+
+DATABASE_READ_ALIAS = 'replica'
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default (development and tests), Redis when
+# REDIS_CACHE_URL is set in the environment. Sessions get an alias of their
+# own so clearing the page cache does not log anyone out
+
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL')
+
+if REDIS_CACHE_URL:
+    # One connection pool per process shared by every thread and request,
+    # see ads_board.redis_pool
+    REDIS_CACHE_OPTIONS = {
+        'pool_class': 'ads_board.redis_pool.SharedConnectionPool',
+        'max_connections': int(os.environ.get('REDIS_CACHE_MAX_CONNECTIONS', 50)),
+        'socket_connect_timeout': 1,
+        'socket_timeout': 1,
+        'health_check_interval': 30,
+    }
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'OPTIONS': REDIS_CACHE_OPTIONS,
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'sessions',
+            'OPTIONS': REDIS_CACHE_OPTIONS,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sessions',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+
+# Sessions
+# Read from the sessions cache and written through to the database
+# (cached_db), so authenticated requests run no session query. Set
+# SESSION_ENGINE=django.contrib.sessions.backends.cache to keep them in
+# Redis only, after copying the live ones with `manage.py migrate_sessions`
+
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Seconds a rendered advert list page stays cached; pages sorted by
+# popularity, which response counts reorder, and the response counts shown
+# on the pages stay cached for less
+ADVERT_LIST_CACHE_TIMEOUT = 300
+ADVERT_POPULAR_CACHE_TIMEOUT = 60
+ADVERT_COUNTERS_CACHE_TIMEOUT = 60
+
+# Responses per page of the thread on the advert page, and seconds its
+# first page stays cached (it is dropped as soon as a response changes)
+ADVERT_THREAD_PAGE_SIZE = 20
+ADVERT_THREAD_CACHE_TIMEOUT = 3600
+
+# Most responses an owner can accept, reject or delete in one triage request
+RESPONSE_TRIAGE_MAX_IDS = 500
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -156,6 +306,29 @@ STATIC_URL = 'static/'
 
 MEDIA_ROOT = 'media/'
 MEDIA_URL = '/media/'
+
+# Uploads
+# Large files are streamed to UPLOAD_TEMP_DIR in UPLOAD_CHUNK_SIZE
+# chunks and hashed on the way, then stored once per content under
+# MEDIA_ROOT/blobs; small ones stay in memory
+
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'ads.uploads.HashingFileUploadHandler',
+]
+UPLOAD_TEMP_DIR = os.path.join(MEDIA_ROOT, 'tmp')
+UPLOAD_CHUNK_SIZE = 256 * 1024
+# Uploads above this size are dropped by the post-processing task
+UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+UPLOAD_THUMBNAIL_SIZE = (320, 320)
+
+# Header handing media files to the web server, e.g. 'X-Sendfile' (Apache)
+# or 'X-Accel-Redirect' (nginx); None streams them from Django. The header
+# value is MEDIA_SENDFILE_ROOT followed by the file name, or the absolute
+# path of the file when MEDIA_SENDFILE_ROOT is None
+
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_ROOT = None
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
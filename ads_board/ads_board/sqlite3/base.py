@@ -0,0 +1,33 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend tuned for concurrent use by the web and Celery processes.
+
+    Every new connection runs the pragmas listed under ``OPTIONS['pragmas']``
+    (WAL journal, busy timeout...). Transactions start with
+    ``BEGIN IMMEDIATE``: a deferred transaction that reads and then writes
+    cannot wait for the write lock and fails at once with "database is
+    locked", whereas an immediate one waits up to the busy timeout.
+    Query-only connections (the read alias) cannot take the write lock and
+    start plain deferred transactions.
+    """
+
+    query_only = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # Not a sqlite3.connect() argument
+        self.pragmas = params.pop('pragmas', {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        self.query_only = bool(conn.execute('PRAGMA query_only').fetchone()[0])
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN' if self.query_only else 'BEGIN IMMEDIATE')
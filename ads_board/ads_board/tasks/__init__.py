@@ -0,0 +1,17 @@
+from .tasks import (
+    build_digest_snapshot,
+    deliver_outbox,
+    flush_response_votes,
+    process_upload,
+    send_email,
+    send_email_chunk,
+)
+
+__all__ = (
+    'build_digest_snapshot',
+    'deliver_outbox',
+    'flush_response_votes',
+    'process_upload',
+    'send_email',
+    'send_email_chunk',
+)
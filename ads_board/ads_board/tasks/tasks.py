@@ -1,52 +1,178 @@
-from datetime import timedelta
-from django.utils import timezone
+from collections import defaultdict
+
 from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
 from django.contrib.auth.models import User
 from celery import shared_task
 
-from ads.models import Advert
+from ads.counters import flush_votes
+from ads.digest import build_snapshot, digest_items, get_snapshot, segment_items, week_of
+from ads.outbox import deliver_batch
+from ads.uploads import process_upload as process_advert_upload
 from ads_board import settings
+from users.models import Subscription
+
+
+def iter_subscriber_chunks(chunk_size):
+    """
+    Yield the registered users in chunks of ``chunk_size``, with the
+    categories each one is subscribed to.
+
+    Users are walked with keyset pagination on the primary key, so every chunk
+    is a cheap indexed range query and the full user table is never held in
+    memory. The subscriptions of a chunk are read with one more query.
+
+    Args:
+        chunk_size (int): The maximum number of users per chunk.
+
+    Yields:
+        list[tuple]: (email address, frozenset of Category ids) per user of
+            the next chunk; the set is empty for users without subscriptions.
+    """
+    last_pk = 0
+    while True:
+        rows = (
+            User.objects
+            .filter(pk__gt=last_pk)
+            .exclude(email='')
+            .order_by('pk')
+            .values_list('pk', 'email')[:chunk_size]
+        )
+        users = list(rows.iterator(chunk_size=chunk_size))
+        if not users:
+            return
+        last_pk = users[-1][0]
+        subscriptions = defaultdict(set)
+        for user_id, category_id in (
+            Subscription.objects
+            .filter(user_id__gte=users[0][0], user_id__lte=last_pk)
+            .values_list('user_id', 'category_id')
+        ):
+            subscriptions[user_id].add(category_id)
+        yield [(email, frozenset(subscriptions.get(pk, ()))) for pk, email in users]
+        if len(users) < chunk_size:
+            return
 
 
-@shared_task
+@shared_task(name='ads_board.tasks.send_email')
 def send_email():
     """
     Celery task to send weekly email with new adverts to all registered users.
+
+    Users are grouped into segments of identical category subscriptions.
+    Each distinct digest body is rendered once from the week's digest
+    snapshot and handed to ``send_email_chunk`` subtasks, each covering up to
+    one chunk of users of the segment, so rendering scales with the number
+    of segments rather than users. Subscribers with no new advert in their
+    categories get no email.
+
+    Returns:
+        dict: The number of emails sent, of segments and of rendered bodies.
     """
-    today = timezone.now()
-    last_week = today - timedelta(days=7)
+    chunk_size = settings.WEEKLY_DIGEST_CHUNK_SIZE
+    # Adverts of the last week, as materialized by build_digest_snapshot
+    items = digest_items(get_snapshot())
 
-    # Get all adverts created in the last week
-    adverts = Advert.objects.filter(created_at__gte=last_week)
+    # Body per segment, and per distinct list of adverts: segments of
+    # different subscriptions matching the same adverts share one render
+    segment_bodies = {}
+    bodies = {}
+    pending = defaultdict(list)
+    emails = 0
 
-    # Get all registered users
-    users = User.objects.all()
+    def send(segment):
+        nonlocal emails
+        recipients = pending.pop(segment)
+        send_email_chunk.delay(segment_bodies[segment], recipients)
+        emails += len(recipients)
 
-    for user in users:
-        # Get the email address of the user
-        email = user.email
+    for chunk in iter_subscriber_chunks(chunk_size):
+        for email, segment in chunk:
+            if segment not in segment_bodies:
+                adverts = segment_items(items, segment)
+                key = tuple(item.id for item in adverts)
+                if segment and not adverts:
+                    segment_bodies[segment] = None
+                else:
+                    if key not in bodies:
+                        # Generate HTML content for the email; item URLs are absolute already
+                        bodies[key] = render_to_string('ads/daily_advert.html', {'adverts': adverts})
+                    segment_bodies[segment] = bodies[key]
+            if segment_bodies[segment] is None:
+                continue
+            pending[segment].append(email)
+            if len(pending[segment]) >= chunk_size:
+                send(segment)
+
+    for segment in list(pending):
+        send(segment)
+    return {'emails': emails, 'segments': len(segment_bodies), 'renders': len(bodies)}
+
+
+@shared_task(name='ads_board.tasks.build_digest_snapshot')
+def build_digest_snapshot():
+    """
+    Celery task to materialize the adverts of the last week into the digest
+    snapshot read by the weekly emails and the "this week" page.
+
+    Returns:
+        int: The number of adverts in the snapshot.
+    """
+    return len(build_snapshot(week_of()).items)
 
-        # Generate HTML content for the email, passing the adverts and the site link
-        html_content = render_to_string(
-            'daily_advert.html',
-            {
-                'adverts': adverts,
-                'link': settings.SITE_URL,
-            }
-        )
 
-        # Create an EmailMultiAlternatives object for sending the email
+@shared_task(name='ads_board.tasks.send_email_chunk')
+def send_email_chunk(html_content, recipients):
+    """
+    Celery task to send the rendered weekly digest to a chunk of users.
+
+    All messages of the chunk go through a single SMTP connection.
+
+    Args:
+        html_content (str): The rendered digest body.
+        recipients (list[str]): The email addresses of the chunk.
+    """
+    messages = []
+    for email in recipients:
+        # Create an EmailMultiAlternatives object for each user of the chunk
         msg = EmailMultiAlternatives(
             subject='Weekly Adverts',
             body='',
             from_email=settings.DEFAULT_FROM_EMAIL,
             to=[email],
         )
-
         # Attach the HTML content to the email
         msg.attach_alternative(html_content, 'text/html')
+        messages.append(msg)
+
+    # Send the whole chunk over one pooled connection
+    connection = get_connection()
+    connection.send_messages(messages)
+
+
+@shared_task(name='ads_board.tasks.flush_response_votes')
+def flush_response_votes():
+    """
+    Celery task to apply the buffered response likes/dislikes in one batch.
+    """
+    return flush_votes()
+
 
-        # Send the email to the user
-        msg.send()
+@shared_task(name='ads_board.tasks.deliver_outbox')
+def deliver_outbox():
+    """
+    Celery task to deliver the due emails of the outbox.
+
+    Delivers one batch and re-enqueues itself while full batches remain.
+    """
+    if deliver_batch() >= settings.OUTBOX_BATCH_SIZE:
+        deliver_outbox.delay()
+
+
+@shared_task(name='ads_board.tasks.process_upload')
+def process_upload(advert_id):
+    """
+    Celery task to post-process the upload of an advert (size cap, thumbnail).
+    """
+    return process_advert_upload(advert_id)
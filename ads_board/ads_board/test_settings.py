@@ -0,0 +1,22 @@
+"""
+Settings of the test suite:
+
+    python manage.py test --settings=ads_board.test_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+
+# Views running more queries than their query_budget fail the test
+QUERY_BUDGET_MODE = 'raise'
+
+# Celery tasks run in process, on commit of the test transaction
+CELERY_TASK_ALWAYS_EAGER = True
+
+# Events stay in process
+ADS_EVENTS_REDIS_URL = None
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Read-only views read through the test transaction too; a second SQLite
+# connection would not see the data of the test
+DATABASE_READ_ALIAS = 'default'
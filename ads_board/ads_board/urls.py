@@ -16,14 +16,17 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 
-from ads.views import AdvertListView
+from ads.views import AdvertListView, MediaView
 from ads_board import settings
 
+if settings.ASYNC_VIEWS:
+    from ads.async_views import AsyncAdvertListView as AdvertListView
+
 urlpatterns = [
     path('', AdvertListView.as_view(), name='advert-list'),
     path('admin/', admin.site.urls),
     path('users/', include('users.urls')),
     path('ads/', include('ads.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(f'{settings.MEDIA_URL.strip("/")}/<path:name>', MediaView.as_view(), name='media'),
+]
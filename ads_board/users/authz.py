@@ -0,0 +1,251 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.mixins import AccessMixin, PermissionRequiredMixin
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject, empty
+
+from ads_board.instrumentation import note_cache
+from .models import Profile
+
+# Groups whose members are authors; both names are used across the site
+AUTHOR_GROUPS = frozenset(['authors', 'Авторы'])
+
+# Cache key holding the authorization data of one session
+SESSION_DATA_KEY = 'users:authz:session:{session_key}'
+# Cache keys versioning the authorization data of one user and of everyone
+USER_VERSION_KEY = 'users:authz:version:{user_id}'
+GLOBAL_VERSION_KEY = 'users:authz:version'
+
+
+def bump_version(key):
+    """
+    Invalidate the authorization data cached under a version key.
+
+    Args:
+        key (str): The version key to increment.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+class AuthorizationContext:
+    """
+    Lazily loaded groups, permissions and author status of a user.
+
+    Each piece is loaded with at most one query the first time it is needed
+    and kept for the rest of the request. With a session, loaded pieces are
+    also cached per session until the user's groups, permissions or profile
+    change; reading them back costs one cache round trip and no query.
+    """
+
+    def __init__(self, user, session=None):
+        self.user = user
+        self.cache_key = None
+        if user.is_authenticated and session is not None and session.session_key:
+            self.cache_key = SESSION_DATA_KEY.format(session_key=session.session_key)
+        self._data = None
+        # Let code holding only the user (e.g. template filters) reuse us
+        user._authz = self
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Return the context attached to ``user``, creating one if needed.
+
+        Args:
+            user (User): The user.
+
+        Returns:
+            AuthorizationContext: The user's context.
+        """
+        return getattr(user, '_authz', None) or cls(user)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = {}
+            if self.cache_key is not None:
+                user_version_key = USER_VERSION_KEY.format(user_id=self.user.pk)
+                cached = cache.get_many([self.cache_key, GLOBAL_VERSION_KEY, user_version_key])
+                version = [cached.get(GLOBAL_VERSION_KEY, 0), cached.get(user_version_key, 0)]
+                stored = cached.get(self.cache_key)
+                hit = bool(stored) and stored['version'] == version
+                note_cache(hit)
+                if hit:
+                    self._data = stored
+                else:
+                    self._data = {'version': version}
+        return self._data
+
+    def _get(self, name, load):
+        data = self.data
+        if name not in data:
+            data.update(load())
+            if self.cache_key is not None:
+                cache.set(self.cache_key, data, settings.SESSION_COOKIE_AGE)
+        return data[name]
+
+    def _load_identity(self):
+        # Groups and the profile flag come from one query
+        rows = User.objects.filter(pk=self.user.pk).values_list('groups__name', 'profile__is_author')
+        return {
+            'groups': [name for name, _ in rows if name],
+            'profile_author': any(is_author for _, is_author in rows),
+        }
+
+    @property
+    def groups(self):
+        """
+        Names of the groups of the user.
+        """
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(self._get('groups', self._load_identity))
+
+    @property
+    def permissions(self):
+        """
+        Permission strings ('app_label.codename') granted to the user.
+        """
+        if not self.user.is_active:
+            return frozenset()
+        return frozenset(self._get(
+            'permissions', lambda: {'permissions': sorted(self.user.get_all_permissions())}
+        ))
+
+    @property
+    def is_author(self):
+        """
+        Whether the user is an author, through a group or the profile flag.
+        """
+        if not self.user.is_authenticated:
+            return False
+        return bool(self.groups & AUTHOR_GROUPS) or self._get('profile_author', self._load_identity)
+
+    def has_perm(self, perm):
+        """
+        Same as ``User.has_perm`` for model-level permissions.
+        """
+        if self.user.is_active and self.user.is_superuser:
+            return True
+        return perm in self.permissions
+
+    def has_perms(self, perms):
+        """
+        Same as ``User.has_perms`` for model-level permissions.
+        """
+        return all(self.has_perm(perm) for perm in perms)
+
+
+class AuthorizationMiddleware:
+    """
+    Middleware attaching a lazy ``AuthorizationContext`` as ``request.authz``.
+
+    Must come after the session and authentication middlewares. Works in
+    both sync and async middleware chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.authz = SimpleLazyObject(
+            lambda: AuthorizationContext(request.user, request.session)
+        )
+        # In an async chain get_response returns the coroutine to await
+        return self.get_response(request)
+
+
+class AuthzPermissionRequiredMixin(PermissionRequiredMixin):
+    """
+    ``PermissionRequiredMixin`` checking permissions through ``request.authz``.
+    """
+
+    def has_permission(self):
+        return self.request.authz.has_perms(self.get_permission_required())
+
+
+async def auser(request):
+    """
+    Return ``request.user``, loading it off the event loop if needed.
+
+    The lazy user of ``AuthenticationMiddleware`` reads the session and the
+    user from the database on first access, which async code must not do.
+
+    Args:
+        request (HttpRequest): The request.
+
+    Returns:
+        User: The loaded user, or an AnonymousUser.
+    """
+    user = request.user
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        # Any attribute access evaluates the lazy object
+        await sync_to_async(lambda: user.is_authenticated)()
+    return user
+
+
+async def ais_author(request):
+    """
+    Return ``request.authz.is_author``, loading it off the event loop.
+    """
+    return await sync_to_async(lambda: request.authz.is_author)()
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    ``LoginRequiredMixin`` for async views.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await auser(request)
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_access_changed(instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal receiver function invalidating the cached data of users whose
+    groups or permissions changed.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_version(USER_VERSION_KEY.format(user_id=instance.pk))
+    elif pk_set:
+        for user_id in pk_set:
+            bump_version(USER_VERSION_KEY.format(user_id=user_id))
+    else:
+        # A group was cleared of all users; their ids are not known anymore
+        bump_version(GLOBAL_VERSION_KEY)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(action, **kwargs):
+    """
+    Signal receiver function invalidating everyone's cached permissions when
+    the permissions of a group change.
+    """
+    if action.startswith('post_'):
+        bump_version(GLOBAL_VERSION_KEY)
+
+
+@receiver(post_save, sender=Profile)
+def profile_changed(instance, **kwargs):
+    """
+    Signal receiver function invalidating the cached author status of a user.
+    """
+    bump_version(USER_VERSION_KEY.format(user_id=instance.user_id))
@@ -4,6 +4,9 @@ from django.contrib.auth.models import User
 from django.db.transaction import commit
 from django.shortcuts import reverse
 
+from ads.models import Category
+from .models import Subscription
+
 
 class RegistrationForm(UserCreationForm):
     """
@@ -60,3 +63,29 @@ class LoginForm(forms.Form):
 
     username = forms.CharField(label='Имя пользователя', max_length=254)
     password = forms.CharField(label='Пароль', widget=forms.PasswordInput)
+
+
+class SubscriptionForm(forms.Form):
+    """
+    A form for choosing the categories of the weekly digest.
+    No category means every advert.
+    """
+
+    categories = forms.ModelMultipleChoiceField(
+        label='Категории',
+        queryset=Category.objects.order_by('name'),
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+    )
+
+    def save(self, user):
+        """
+        Replace the subscriptions of the user with the chosen categories.
+        """
+        chosen = {category.pk for category in self.cleaned_data['categories']}
+        current = set(user.subscriptions.values_list('category_id', flat=True))
+        user.subscriptions.exclude(category_id__in=chosen).delete()
+        Subscription.objects.bulk_create(
+            [Subscription(user=user, category_id=pk) for pk in chosen - current],
+            ignore_conflicts=True,
+        )
@@ -17,3 +17,22 @@ class Profile(models.Model):
         Returns the username of the associated User instance.
         """
         return self.user.username
+
+
+class Subscription(models.Model):
+    """
+    A model representing the subscription of a user to a category of adverts.
+    The weekly digest of a subscribed user only lists adverts of the user's categories.
+    """
+    # Subscribed user.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='subscriptions')
+    # Category whose adverts the user receives.
+    category = models.ForeignKey('ads.Category', on_delete=models.CASCADE, related_name='subscriptions')
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.category_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='users_subscription_unique'),
+        ]
@@ -0,0 +1,84 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+
+from ads.tests.base import BoardTestCase
+from users.authz import AuthorizationContext
+from users.models import Profile
+
+
+class AuthorizationCacheTests(BoardTestCase):
+    """
+    Authorization data is cached per session until the groups, permissions
+    or profile of the user change.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        self.session.create()
+        self.group = Group.objects.create(name='authors')
+        self.perm = Permission.objects.get(codename='add_advert')
+
+    def authz(self):
+        # A fresh user and context per request, as the middleware builds them
+        user = User.objects.get(pk=self.responder.pk)
+        return AuthorizationContext(user, self.session)
+
+    def test_cached(self):
+        authz = self.authz()
+        self.assertFalse(authz.is_author)
+        self.assertFalse(authz.has_perm('ads.add_advert'))
+        authz = self.authz()
+        with self.assertNumQueries(0):
+            self.assertFalse(authz.is_author)
+            self.assertFalse(authz.has_perm('ads.add_advert'))
+
+    def test_without_session_not_cached(self):
+        self.assertFalse(AuthorizationContext(self.responder).is_author)
+        with self.assertNumQueries(1):
+            self.assertFalse(AuthorizationContext(self.responder).is_author)
+
+    def test_user_added_to_group(self):
+        self.assertFalse(self.authz().is_author)
+        self.responder.groups.add(self.group)
+        self.assertTrue(self.authz().is_author)
+        self.responder.groups.remove(self.group)
+        self.assertFalse(self.authz().is_author)
+
+    def test_group_gains_user(self):
+        self.assertFalse(self.authz().is_author)
+        self.group.user_set.add(self.responder)
+        self.assertTrue(self.authz().is_author)
+
+    def test_group_cleared(self):
+        self.group.user_set.add(self.responder)
+        self.assertTrue(self.authz().is_author)
+        self.group.user_set.clear()
+        self.assertFalse(self.authz().is_author)
+
+    def test_group_permissions_changed(self):
+        self.responder.groups.add(self.group)
+        self.assertFalse(self.authz().has_perm('ads.add_advert'))
+        self.group.permissions.add(self.perm)
+        self.assertTrue(self.authz().has_perm('ads.add_advert'))
+
+    def test_user_permissions_changed(self):
+        self.assertFalse(self.authz().has_perm('ads.add_advert'))
+        self.responder.user_permissions.add(self.perm)
+        self.assertTrue(self.authz().has_perm('ads.add_advert'))
+
+    def test_profile_changed(self):
+        profile = Profile.objects.create(user=self.responder)
+        self.assertFalse(self.authz().is_author)
+        profile.is_author = True
+        profile.save()
+        self.assertTrue(self.authz().is_author)
+
+    def test_other_users_unaffected(self):
+        self.assertFalse(self.authz().is_author)
+        self.owner.groups.add(self.group)
+        authz = self.authz()
+        with self.assertNumQueries(0):
+            self.assertFalse(authz.is_author)
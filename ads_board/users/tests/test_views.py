@@ -0,0 +1,25 @@
+from django.urls import reverse
+
+from ads.tests.base import BoardTestCase
+
+
+class UserViewsTests(BoardTestCase):
+    """
+    The user views render within their query budget.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.responder)
+
+    def test_response_list(self):
+        response = self.client.get(reverse('users:response_list'))
+        self.assertContains(response, self.advert.title)
+
+    def test_private_redirects(self):
+        response = self.client.get(reverse('users:private'))
+        self.assertRedirects(response, reverse('ads:private'))
+
+    def test_subscriptions(self):
+        response = self.client.get(reverse('users:subscriptions'))
+        self.assertEqual(response.status_code, 200)
@@ -6,7 +6,8 @@ from .views import (
     PrivateProfileView,
     ResponseListView,
     ResponseDeleteView,
-    ConfirmationView
+    ConfirmationView,
+    SubscriptionView,
 )
 
 app_name = 'users'
@@ -18,5 +19,6 @@ urlpatterns = [
     path('private/', PrivateProfileView.as_view(), name='private'),
     path('confirmation/', ConfirmationView.as_view(), name='confirmation'),
     path('profile/responses/', ResponseListView.as_view(), name='response_list'),
+    path('profile/subscriptions/', SubscriptionView.as_view(), name='subscriptions'),
     path('profile/response/<int:pk>/delete/', ResponseDeleteView.as_view(), name='delete_response'),
 ]
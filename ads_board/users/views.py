@@ -9,15 +9,14 @@ from django.views.generic import ListView, DeleteView
 from django.urls import reverse_lazy
 from django.views import View
 from django.views.generic.edit import CreateView
-from django.core.mail import send_mail
+from django.db import transaction
 
-from .forms import RegistrationForm, LoginForm
-from ads.models import Response, Advert
+from .forms import RegistrationForm, LoginForm, SubscriptionForm
+from ads.models import Response
+from ads.outbox import queue_mail
 import random
 import string
 
-from .models import Profile
-
 
 def generate_confirmation_code():
     """Generate a random confirmation code."""
@@ -37,8 +36,9 @@ class SignUp(CreateView):
     template_name = 'users/signup.html'
     success_url = reverse_lazy('ads:advert-list')
 
+    @transaction.atomic
     def form_valid(self, form):
-        """Save the user, add them to the 'Пользователи' group, and send a confirmation email."""
+        """Save the user, add them to the 'Пользователи' group, and queue a confirmation email."""
         user = form.save()
         group = Group.objects.get_or_create(name='Пользователи')[0]
         user.groups.add(group)
@@ -52,8 +52,8 @@ class SignUp(CreateView):
             'confirmation_code': confirmation_code,
         })
 
-        # Send the email with the confirmation code and a welcome message
-        send_mail(
+        # Queue the email with the confirmation code and a welcome message
+        queue_mail(
             subject='Добро пожаловать на наш сайт объявлений!',
             message='',
             from_email=None,
@@ -126,9 +126,10 @@ class ResponseListView(LoginRequiredMixin, ListView):
 
     template_name = 'users/response_list.html'
     context_object_name = 'responses'
+    query_budget = 3
 
     def get_queryset(self):
-        return Response.objects.filter(author=self.request.user)
+        return Response.objects.for_author(self.request.user)
 
 
 class ResponseDeleteView(LoginRequiredMixin, DeleteView):
@@ -164,45 +165,41 @@ class ResponseDeleteView(LoginRequiredMixin, DeleteView):
 class PrivateProfileView(LoginRequiredMixin, View):
     """
     View for the user's private profile page.
-    Shows the user's adverts, responses, and author status.
+    The page itself is served, one page of activity at a time, by
+    ``ads:private``; this view handles its "become author" form.
     """
 
-    template_name = 'ads/private_page.html'
+    # POST: session, user, authz, then creating the group on first use and adding the user
+    query_budget = {'GET': 2, 'POST': 6}
 
     def get(self, request):
-        user = request.user
-        adverts = Advert.objects.filter(user=user)
-        responses = Response.objects.filter(advert__user=user)
-        is_author = Profile.objects.filter(user=user, is_author=True).exists()
-
-        context = {
-            'user': user,
-            'adverts': adverts,
-            'responses': responses,
-            'is_author': is_author,
-        }
-        return render(request, self.template_name, context)
+        return redirect('ads:private')
 
     def post(self, request):
-        user = request.user
-        is_author = False
-
-        if not Profile.objects.filter(user=user, is_author=True).exists():
+        if not request.authz.is_author:
             author_group = Group.objects.get_or_create(name='Авторы')[0]
-            user.groups.add(author_group)
-            user.save()
-            is_author = True
-
-        adverts = Advert.objects.filter(user=user)
-        responses = Response.objects.filter(advert__user=user)
-
-        context = {
-            'user': user,
-            'adverts': adverts,
-            'responses': responses,
-            'is_author': is_author,
-        }
-        return render(request, self.template_name, context)
+            request.user.groups.add(author_group)
+        return redirect('ads:private')
+
+
+class SubscriptionView(LoginRequiredMixin, View):
+    """
+    View for choosing the categories of the weekly digest.
+    """
+
+    template_name = 'users/subscriptions.html'
+
+    def get(self, request):
+        initial = {'categories': list(request.user.subscriptions.values_list('category_id', flat=True))}
+        return render(request, self.template_name, {'form': SubscriptionForm(initial=initial)})
+
+    def post(self, request):
+        form = SubscriptionForm(request.POST)
+        if form.is_valid():
+            with transaction.atomic():
+                form.save(request.user)
+            return redirect('users:subscriptions')
+        return render(request, self.template_name, {'form': form})
 
 
 @login_required